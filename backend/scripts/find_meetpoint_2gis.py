@@ -1,12 +1,15 @@
 import json
 import os
+import random
 import time
 from collections import defaultdict
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
 
 import geopandas as gpd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from shapely.geometry import Point, Polygon
 
 from find_transport_stop_near_meetpoint import find_transport_stop_near_meetpoint
@@ -14,6 +17,8 @@ from find_transport_stop_near_meetpoint import find_transport_stop_near_meetpoin
 # ====================== НАСТРОЙКИ ==========================
 GIS2_API_KEY = os.getenv("GIS2_API_KEY")
 SERVICE_MATRIX_LIMIT = 3500
+MATRIX_MAX_WORKERS = int(os.getenv("GIS2_MATRIX_WORKERS", "4"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 
 # ===========================================================
@@ -22,11 +27,31 @@ SERVICE_MATRIX_LIMIT = 3500
 class DistanceMatrixCalculator:
     """Класс для расчёта матриц расстояний через 2GIS API."""
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ):
         self.api_key = api_key
         self.url_sync = "https://routing.api.2gis.com/get_dist_matrix"
         self.max_sources = 10  # Новый лимит API 2GIS
         self.max_targets = 10  # Новый лимит API 2GIS
+        self.max_pairs = 100  # Не более 100 комбинаций источник-цель в запросе
+        self.max_workers = max(1, int(max_workers))  # Сколько плиток запрашивать параллельно
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # Общий keep-alive пул соединений: TLS-рукопожатие один раз на соединение,
+        # а не на каждую плитку.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
     def _process_batch(
         self, sources: List[Dict], targets: List[Dict]
@@ -44,59 +69,135 @@ class DistanceMatrixCalculator:
         params = {"key": self.api_key, "version": "2.0"}
         headers = {"Content-Type": "application/json"}
 
-        response = requests.post(
-            self.url_sync, params=params, headers=headers, json=payload
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.url_sync,
+                    params=params,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"Ошибка сети 2GIS: {e}") from e
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise RuntimeError(
+                        f"Ошибка API 2GIS: {response.status_code} - {response.text}"
+                    )
+            # Экспоненциальная задержка с джиттером перед повтором плитки
+            time.sleep(self.backoff * (2**attempt) * (1 + random.random()))
+        raise RuntimeError("Не удалось выполнить запрос к API 2GIS")
+
+    # ------------------------- ПЛАНИРОВАНИЕ ПЛИТОК -------------------------
+    def plan_tiles(self, n_sources: int, n_targets: int) -> List[Tuple[int, int, int, int]]:
+        """Покрывает матрицу n_sources × n_targets непересекающимися плитками.
+
+        Каждая ячейка попадает ровно в одну плитку ``(s_start, s_end, t_start, t_end)``.
+        Источники делятся на равные группы не больше ``max_sources``, а для каждой
+        группы берётся максимальная ширина по целям, при которой число пар
+        не превышает ``max_pairs``.
+        """
+        if n_sources <= 0 or n_targets <= 0:
+            return []
+
+        tiles = []
+        source_chunks = -(-n_sources // self.max_sources)
+        for chunk in range(source_chunks):
+            s_start = chunk * n_sources // source_chunks
+            s_end = (chunk + 1) * n_sources // source_chunks
+            s_size = s_end - s_start
+            t_size = max(1, min(self.max_targets, self.max_pairs // s_size))
+            for t_start in range(0, n_targets, t_size):
+                tiles.append((s_start, s_end, t_start, min(n_targets, t_start + t_size)))
+        return tiles
+
+    def describe_plan(self, n_sources: int, n_targets: int) -> Dict[str, Any]:
+        """Сводка плана до выполнения: сколько плиток и HTTP-вызовов потребуется."""
+        tiles = self.plan_tiles(n_sources, n_targets)
+        return {
+            "sources": n_sources,
+            "targets": n_targets,
+            "pairs": n_sources * n_targets,
+            "tiles": len(tiles),
+            "expected_calls": len(tiles),
+            "max_tile": max(
+                ((s_end - s_start, t_end - t_start) for s_start, s_end, t_start, t_end in tiles),
+                default=(0, 0),
+            ),
+        }
+
+    def _run_tiles(self, sources: List[Dict], targets: List[Dict]):
+        """Выполняет план и отдаёт пары (плитка, ответ API или None при ошибке)."""
+        tiles = self.plan_tiles(len(sources), len(targets))
+        plan = self.describe_plan(len(sources), len(targets))
+        print(
+            f"▶ План матрицы {plan['sources']}×{plan['targets']}: "
+            f"{plan['tiles']} плиток, {plan['expected_calls']} запросов"
         )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise RuntimeError(
-                f"Ошибка API 2GIS: {response.status_code} - {response.text}"
-            )
+
+        def run_tile(item):
+            tile_index, (s_start, s_end, t_start, t_end) = item
+            try:
+                return self._process_batch(
+                    sources[s_start:s_end], targets[t_start:t_end]
+                )
+            except Exception as e:
+                print(f"Ошибка пакета {tile_index + 1}: {e}")
+                return None
+
+        if self.max_workers == 1 or len(tiles) <= 1:
+            batches = map(run_tile, enumerate(tiles))
+            yield from zip(tiles, batches)
+            return
+
+        # Плитки выполняются параллельно, executor.map отдаёт ответы в порядке плана.
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as pool:
+            yield from zip(tiles, pool.map(run_tile, enumerate(tiles)))
+
+    def calculate_duration_matrix(
+        self, sources: List[Dict], targets: List[Dict]
+    ) -> np.ndarray:
+        """Плотная матрица длительностей (сек); недоступные пары — np.inf."""
+        durations = np.full((len(sources), len(targets)), np.inf, dtype=float)
+        for (s_start, s_end, t_start, _), batch in self._run_tiles(sources, targets):
+            if batch is None:
+                continue
+            s_size = s_end - s_start
+            for r in batch.get("routes", []):
+                if r.get("status") != "OK":
+                    continue
+                durations[s_start + r["source_id"], t_start + r["target_id"] - s_size] = r[
+                    "duration"
+                ]
+        return durations
 
     def calculate_matrix(
         self, sources: List[Dict], targets: List[Dict]
     ) -> Dict[str, Any]:
         """Главная функция: возвращает все маршруты."""
-        if len(sources) <= self.max_sources and len(targets) <= self.max_targets:
-            return self._process_batch(sources, targets)
-        else:
-            return self._process_large_matrix(sources, targets)
+        return self._process_large_matrix(sources, targets)
 
     def _process_large_matrix(
         self, sources: List[Dict], targets: List[Dict]
     ) -> Dict[str, Any]:
-        """Разбивает большую матрицу на пакеты (<=100 комбинаций)."""
+        """Разбивает большую матрицу на плитки (<=100 комбинаций) без перекрытий."""
         all_routes = []
         total_time = 0
         batch_count = 0
 
-        for s_start in range(0, len(sources)):
-            for t_start in range(0, len(targets)):
-                # определяем динамически размер пакета, чтобы не превышать 100 пар
-                for s_end in range(s_start + 1, min(len(sources), s_start + 10) + 1):
-                    for t_end in range(
-                        t_start + 1, min(len(targets), t_start + 10) + 1
-                    ):
-                        s_batch = sources[s_start:s_end]
-                        t_batch = targets[t_start:t_end]
-
-                        # если комбинаций >100 — уменьшаем пакет
-                        if len(s_batch) * len(t_batch) > 100:
-                            t_batch = t_batch[: max(1, 100 // len(s_batch))]
-
-                        batch_count += 1
-                        try:
-                            batch = self._process_batch(s_batch, t_batch)
-                            for r in batch.get("routes", []):
-                                r["source_id"] = s_start + r["source_id"]
-                                r["target_id"] = t_start + (
-                                    r["target_id"] - len(s_batch)
-                                )
-                                all_routes.append(r)
-                            total_time += batch.get("generation_time", 0)
-                        except Exception as e:
-                            print(f"Ошибка пакета {batch_count}: {e}")
+        for (s_start, s_end, t_start, _), batch in self._run_tiles(sources, targets):
+            batch_count += 1
+            if batch is None:
+                continue
+            for r in batch.get("routes", []):
+                r["source_id"] = s_start + r["source_id"]
+                r["target_id"] = t_start + (r["target_id"] - (s_end - s_start))
+                all_routes.append(r)
+            total_time += batch.get("generation_time", 0)
 
         return {
             "routes": all_routes,
@@ -178,14 +279,7 @@ def build_matrix_2gis(client: DistanceMatrixCalculator, sources, targets, profil
         start_points = [{"lat": p.y, "lon": p.x} for p in group_sources]
         target_points = [{"lat": p.y, "lon": p.x} for p in targets]
 
-        result = client.calculate_matrix(start_points, target_points)
-        routes = result.get("routes", [])
-
-        for route in routes:
-            s = route["source_id"]
-            t = route["target_id"]
-            if route.get("status") == "OK" and s < len(idxs) and t < num_targets:
-                durations[idxs[s], t] = route["duration"]
+        durations[idxs, :] = client.calculate_duration_matrix(start_points, target_points)
 
     return durations
 
@@ -194,13 +288,7 @@ def build_main_vector_2gis(client: DistanceMatrixCalculator, candidates, dest, p
     """Матрица времени от кандидатов до одной точки."""
     start_points = [{"lat": p.y, "lon": p.x} for p in candidates]
     target_points = [{"lat": dest.y, "lon": dest.x}]
-    result = client.calculate_matrix(start_points, target_points)
-    routes = result.get("routes", [])
-    durations = np.full(len(candidates), np.inf, dtype=float)
-    for r in routes:
-        if r.get("status") == "OK":
-            durations[r["source_id"]] = r["duration"]
-    return durations
+    return client.calculate_duration_matrix(start_points, target_points)[:, 0]
 
 
 # ===========================================================
@@ -251,7 +339,7 @@ if __name__ == "__main__":
     ]
     people_profiles = ["car", "car", "car", "car"]
 
-    client_2gis = DistanceMatrixCalculator(GIS2_API_KEY)
+    client_2gis = DistanceMatrixCalculator(GIS2_API_KEY, max_workers=MATRIX_MAX_WORKERS)
 
     base_search_area = create_base_search_area(people_points)
     pre_candidates, (x_step, y_step) = generate_candidates(
@@ -0,0 +1,8 @@
+"""Shared setup; run ``python -m pytest`` from ``backend``."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# The scripts import their siblings by bare module name.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
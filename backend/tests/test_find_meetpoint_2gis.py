@@ -0,0 +1,121 @@
+"""Tile planning and concurrent tile execution for the 2GIS distance matrix."""
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from find_meetpoint_2gis import DistanceMatrixCalculator
+
+
+@pytest.fixture
+def calculator():
+    return DistanceMatrixCalculator("test-key", max_workers=1)
+
+
+@pytest.mark.parametrize("n_sources, n_targets", [(1, 1), (3, 250), (10, 10), (11, 7), (23, 37), (40, 3)])
+def test_tiles_cover_every_cell_once_within_limits(calculator, n_sources, n_targets):
+    coverage = np.zeros((n_sources, n_targets), dtype=int)
+
+    for s_start, s_end, t_start, t_end in calculator.plan_tiles(n_sources, n_targets):
+        assert 0 < s_end - s_start <= calculator.max_sources
+        assert 0 < t_end - t_start <= calculator.max_targets
+        assert (s_end - s_start) * (t_end - t_start) <= calculator.max_pairs
+        coverage[s_start:s_end, t_start:t_end] += 1
+
+    assert (coverage == 1).all()
+
+
+def test_empty_matrix_has_no_tiles(calculator):
+    assert calculator.plan_tiles(0, 5) == []
+    assert calculator.describe_plan(5, 0)["tiles"] == 0
+
+
+def test_describe_plan_matches_plan_tiles(calculator):
+    plan = calculator.describe_plan(23, 37)
+
+    assert plan["pairs"] == 23 * 37
+    assert plan["tiles"] == plan["expected_calls"] == len(calculator.plan_tiles(23, 37))
+    assert plan["max_tile"] == (8, 10)
+
+
+def fake_batch(sources, targets):
+    """Answer a tile like the API would, with duration ``1000 * source + target``."""
+    time.sleep(random.random() * 0.01)
+    routes = [
+        {"source_id": i, "target_id": len(sources) + j, "status": "OK", "duration": 1000 * s["id"] + t["id"]}
+        for i, s in enumerate(sources)
+        for j, t in enumerate(targets)
+    ]
+    return {"routes": routes, "generation_time": 1}
+
+
+def test_concurrent_tiles_reassemble_in_plan_order():
+    calculator = DistanceMatrixCalculator("test-key", max_workers=4)
+    threads = set()
+
+    def process_batch(sources, targets):
+        threads.add(threading.get_ident())
+        return fake_batch(sources, targets)
+
+    calculator._process_batch = process_batch
+    sources = [{"id": i} for i in range(23)]
+    targets = [{"id": j} for j in range(37)]
+
+    durations = calculator.calculate_duration_matrix(sources, targets)
+    assert (durations == 1000 * np.arange(23)[:, None] + np.arange(37)).all()
+    assert len(threads) > 1
+
+    result = calculator.calculate_matrix(sources, targets)
+    assert result["metadata"]["batches"] == calculator.describe_plan(23, 37)["tiles"]
+    assert sorted((r["source_id"], r["target_id"]) for r in result["routes"]) == [
+        (i, j) for i in range(23) for j in range(37)
+    ]
+
+
+def test_failed_tile_leaves_its_cells_unreachable():
+    calculator = DistanceMatrixCalculator("test-key", max_workers=2)
+
+    def process_batch(sources, targets):
+        if sources[0]["id"] == 0 and targets[0]["id"] == 0:
+            raise RuntimeError("boom")
+        return fake_batch(sources, targets)
+
+    calculator._process_batch = process_batch
+    durations = calculator.calculate_duration_matrix([{"id": i} for i in range(12)], [{"id": j} for j in range(12)])
+
+    s_start, s_end, t_start, t_end = calculator.plan_tiles(12, 12)[0]
+    assert np.isinf(durations[s_start:s_end, t_start:t_end]).all()
+    assert np.isfinite(durations).sum() == 144 - (s_end - s_start) * (t_end - t_start)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+def test_retryable_status_is_retried():
+    calculator = DistanceMatrixCalculator("test-key", max_retries=2, backoff=0.0)
+    responses = [FakeResponse(429), FakeResponse(503), FakeResponse(200, {"routes": []})]
+    calculator.session.post = lambda *args, **kwargs: responses.pop(0)
+
+    assert calculator._process_batch([{}], [{}]) == {"routes": []}
+    assert responses == []
+
+
+def test_client_error_is_not_retried():
+    calculator = DistanceMatrixCalculator("test-key", max_retries=2, backoff=0.0)
+    responses = [FakeResponse(400), FakeResponse(200, {"routes": []})]
+    calculator.session.post = lambda *args, **kwargs: responses.pop(0)
+
+    with pytest.raises(RuntimeError):
+        calculator._process_batch([{}], [{}])
+    assert len(responses) == 1
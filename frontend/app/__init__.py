@@ -40,12 +40,21 @@ def create_app() -> Flask:
     app.config["ENABLE_RASTER_LAYER"] = _get_env("ENABLE_RASTER_LAYER", "false").lower() == "true"
     app.config["TARGET_Z_LAT"] = _get_env_float("TARGET_Z_LAT", 55.731369)
     app.config["TARGET_Z_LNG"] = _get_env_float("TARGET_Z_LNG", 37.614218)
+    # "background" warms find_point after boot, "lazy" waits for the first request, "eager" blocks startup.
+    app.config["MEETPOINT_PRELOAD"] = _get_env("MEETPOINT_PRELOAD", "background").lower()
     # TODO: Replace dev defaults with secure secrets and validated 2GIS_API_KEY.
 
     from .routes import api_bp  # pylint: disable=import-outside-toplevel
 
     app.register_blueprint(api_bp, url_prefix="/api")
 
+    from .meetpoint_service import load_meetpoint_module, warm_meetpoint_module  # pylint: disable=import-outside-toplevel
+
+    if app.config["MEETPOINT_PRELOAD"] == "eager":
+        load_meetpoint_module()
+    elif app.config["MEETPOINT_PRELOAD"] == "background":
+        warm_meetpoint_module()
+
     @app.get("/")
     def index() -> str:
         """Serve the main map UI."""
@@ -0,0 +1,186 @@
+"""In-process LRU caches with TTL and negative entries, plus in-flight call coalescing."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MISSING = object()
+
+
+def json_size(value: object) -> int:
+    """Compact JSON length, the ``sizeof`` used for byte-bounded caches of API payloads."""
+
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``set(..., negative=True)`` stores a "known to have no result" marker with
+    the shorter ``negative_ttl``; ``get`` returns it as ``None`` so callers can
+    skip the upstream call. Absent or expired keys return ``MISSING``.
+
+    With ``max_bytes`` set, ``sizeof(value)`` is recorded for every entry and
+    least recently used entries are evicted until the total fits.
+    ``on_evict(key, value)`` is called, outside the lock, for every positive
+    entry pushed out by those limits (not for expired or replaced ones).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        negative_ttl: Optional[float] = None,
+        *,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[object], int]] = None,
+        on_evict: Optional[Callable[[Hashable, object], None]] = None,
+    ) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.negative_ttl = float(ttl if negative_ttl is None else negative_ttl)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._sizeof = sizeof or (lambda value: 0)
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Tuple[object, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: Hashable) -> object:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return MISSING
+            value, expires, size = entry
+            if expires <= now:
+                del self._data[key]
+                self._bytes -= size
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._counters["negative_hits" if value is None else "hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: object, *, negative: bool = False, ttl: Optional[float] = None) -> None:
+        if negative:
+            value = None
+        elif value is None:
+            raise ValueError("None is reserved for negative entries; pass negative=True")
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+        size = 0 if value is None else int(self._sizeof(value))
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                evicted_key, (evicted_value, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+                if evicted_value is not None:
+                    evicted.append((evicted_key, evicted_value))
+        if self._on_evict is not None:
+            for evicted_key, evicted_value in evicted:
+                self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key: Hashable) -> object:
+        """Remove ``key`` and return its value, or ``MISSING``."""
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return MISSING
+            self._bytes -= entry[2]
+            return entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._data)
+            stats["maxsize"] = self.maxsize
+            if self.max_bytes is not None:
+                stats["bytes"] = self._bytes
+                stats["max_bytes"] = self.max_bytes
+            return stats
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs ``function``; callers arriving while it
+    runs wait and receive the same result (or exception). Nothing is kept
+    once the call finishes, so later calls run again.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is true for callers that waited on another's call."""
+
+        with self._lock:
+            self._counters["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._counters["shared"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True  # type: ignore[return-value]
+
+        try:
+            flight.result = function()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._flights)
+            return stats
@@ -0,0 +1,173 @@
+"""Process pool for CPU-bound stages, so they do not hold the web worker's GIL.
+
+Pool processes are started with ``forkserver`` (``spawn`` where unavailable),
+never by forking the threaded web process, and import the find_point stack
+on start. Arguments and results are pickled as usual. Calls run inline
+instead when ``COMPUTE_POOL_WORKERS=0``, inside pool processes (they never
+start pools of their own), and when ``__main__`` cannot be re-imported by a
+new process (``python -`` or ``-c`` scripts).
+
+A pooled call costs about 0.3-1 ms of pickling and IPC (measured on one
+core, 3-30 participants), so only work well above that belongs here. The
+offline meetpoint search qualifies: about 1-2.5 ms of NumPy and Python per
+warm call and 35 ms on a process's first, all of it holding the GIL that
+request threads need. The greedy route plan (microseconds of haversine)
+does not and runs inline on the task thread.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COMPUTE_POOL_WORKERS = int(os.getenv("COMPUTE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Seconds a caller waits for a pool result before giving up (the job keeps its process until done).
+COMPUTE_POOL_TIMEOUT = float(os.getenv("COMPUTE_POOL_TIMEOUT", "30"))
+# Pid of the process that owns the pool, inherited by the forkserver and pool processes. They
+# import ``app`` (and so may call ``warm_pool``) but must never start pools of their own.
+_OWNER_ENV = "COMPUTE_POOL_OWNER"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {"pooled": 0, "inline": 0, "broken": 0, "timeouts": 0, "seconds": 0.0}
+
+
+def _reset_after_fork() -> None:
+    global _pool, _pool_lock  # pylint: disable=global-statement
+    _pool = None
+    _pool_lock = threading.Lock()
+    # A plain fork (gunicorn worker) may own a pool; multiprocessing children are caught by parent_process().
+    os.environ.pop(_OWNER_ENV, None)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class ComputeTimeoutError(RuntimeError):
+    """A pool call outlived ``COMPUTE_POOL_TIMEOUT``.
+
+    Deliberately not a ``TimeoutError``: that is an ``OSError``, which callers
+    treat as a transient failure worth retrying, and a retry would only queue
+    the same slow computation again.
+    """
+
+
+def _initialize() -> None:
+    # Pay the GIS import once per process, not on the first request it serves.
+    from .meetpoint_service import load_meetpoint_module  # pylint: disable=import-outside-toplevel
+
+    load_meetpoint_module()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _in_child_process() -> bool:
+    owner = os.environ.get(_OWNER_ENV)
+    return multiprocessing.parent_process() is not None or (owner is not None and owner != str(os.getpid()))
+
+
+def _main_importable() -> bool:
+    # New pool processes re-run ``__main__`` from its file; ``python -`` and ``-c`` scripts have none.
+    path = getattr(sys.modules.get("__main__"), "__file__", None)
+    return path is None or os.path.isfile(path)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool  # pylint: disable=global-statement
+
+    if COMPUTE_POOL_WORKERS <= 0 or _in_child_process() or not _main_importable():
+        return None
+    with _pool_lock:
+        if _pool is None:
+            os.environ[_OWNER_ENV] = str(os.getpid())
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=COMPUTE_POOL_WORKERS, mp_context=context, initializer=_initialize)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool  # pylint: disable=global-statement
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_pool() -> None:
+    """Start the pool processes in the background (one no-op task per worker)."""
+
+    pool = _get_pool()
+    if pool is not None:
+        for _ in range(COMPUTE_POOL_WORKERS):
+            pool.submit(_ping)
+
+
+def _count(field: str, amount: float = 1) -> None:
+    with _stats_lock:
+        _stats[field] += amount
+
+
+def run(function: Callable[..., T], *args, **kwargs) -> T:
+    """Run a module-level ``function`` in the pool and return its result.
+
+    Exceptions raised by ``function`` propagate; a waiting time above
+    ``COMPUTE_POOL_TIMEOUT`` raises ``ComputeTimeoutError``. If the pool is
+    disabled or has lost a process, the call runs inline instead.
+    """
+
+    return _submit(COMPUTE_POOL_TIMEOUT, function, args, kwargs)
+
+
+def _submit(timeout: Optional[float], function: Callable[..., T], args: tuple, kwargs: dict) -> T:
+    pool = _get_pool()
+    if pool is None:
+        _count("inline")
+        return function(*args, **kwargs)
+
+    started = time.perf_counter()
+    try:
+        future = pool.submit(function, *args, **kwargs)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drops the call if it is still queued; a running one keeps its process until done.
+            future.cancel()
+            _count("timeouts")
+            raise ComputeTimeoutError(f"{getattr(function, '__name__', function)} took over {timeout:g}s") from None
+    except BrokenProcessPool as exc:
+        logger.warning("Compute pool broke, running %s inline: %s", getattr(function, "__name__", function), exc)
+        _discard_pool(pool)
+        _count("broken")
+        _count("inline")
+        return function(*args, **kwargs)
+    _count("pooled")
+    _count("seconds", time.perf_counter() - started)
+    return result
+
+
+def pool_stats() -> Dict[str, object]:
+    """Totals for /api/health: calls run in the pool or inline, timeouts and pool seconds."""
+
+    with _stats_lock:
+        stats: Dict[str, object] = dict(_stats)
+    stats["seconds"] = round(float(stats["seconds"]), 4)
+    stats["workers"] = 0 if _in_child_process() else max(0, COMPUTE_POOL_WORKERS)
+    stats["started"] = _pool is not None
+    return stats
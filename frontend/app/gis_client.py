@@ -1,60 +1,184 @@
 ﻿"""Thin wrapper around the 2GIS HTTP APIs with graceful fallbacks."""
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
+import re
+import tempfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from math import asin, cos, radians, sin, sqrt
+from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
-from collections import deque
-from datetime import datetime, timedelta
 
 import requests
 
+from .cache import MISSING, TTLCache, json_size
+from .http_client import PooledHttpClient
+from .rate_limit import BucketSpec, RateLimiter, build_backend
+from .route_json import read_route_json
+
 GEOCODE_URL = "https://catalog.api.2gis.com/3.0/items/geocode"
 ROUTING_URL = "https://routing.api.2gis.com/3.0/route"
 ROUTING_V7_URL = "https://routing.api.2gis.com/routing/7.0.0/global"
 PUBLIC_TRANSPORT_URL = "https://routing.api.2gis.com/public_transport/2.0"
 PLACES_URL = "https://catalog.api.2gis.com/3.0/items"
-REQUEST_TIMEOUT = 10
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive sessions (one pool per 2GIS host); see http_client.PooledHttpClient.
+http_client = PooledHttpClient.from_env()
+
+
 class RoutingRateLimitError(RuntimeError):
     """Raised when routing API rate limit is reached."""
 
 
 ROUTING_DAILY_LIMIT = int(os.getenv("ROUTING_DAILY_LIMIT", "50"))
 ROUTING_MINUTE_LIMIT = int(os.getenv("ROUTING_MINUTE_LIMIT", "5"))
-_ROUTING_DAY_WINDOW: deque[datetime] = deque()
-_ROUTING_MINUTE_WINDOW: deque[datetime] = deque()
+# "sqlite" shares the quota between gunicorn workers on one host, "redis" between hosts.
+ROUTING_RATE_BACKEND = os.getenv("ROUTING_RATE_BACKEND", "sqlite")
+ROUTING_RATE_PATH = os.getenv("ROUTING_RATE_PATH") or str(
+    Path(os.getenv("APP_STATE_DIR") or Path(tempfile.gettempdir()) / "meetpoint") / "routing_rate.sqlite3"
+)
+ROUTING_RATE_REDIS_URL = os.getenv("ROUTING_RATE_REDIS_URL", "")
+# Seconds a routing call may block waiting for a token before returning the error route.
+ROUTING_RATE_MAX_WAIT = float(os.getenv("ROUTING_RATE_MAX_WAIT", "0"))
+# Separate budget for the car routes fetched by /api/optimize, so their fan-out never competes
+# with interactive routing for tokens. Both budgets spend the same 2GIS key: keep their sum within
+# its quota. 0 leaves a bucket unlimited.
+ROUTE_DAILY_LIMIT = int(os.getenv("ROUTE_DAILY_LIMIT", "500"))
+ROUTE_MINUTE_LIMIT = int(os.getenv("ROUTE_MINUTE_LIMIT", "30"))
+
+_ROUTING_BUCKET_MESSAGES = {
+    "routing_day": "Достигнут дневной лимит запросов маршрутизации",
+    "routing_minute": "Превышен лимит запросов маршрутизации в минуту",
+    "route_day": "Достигнут дневной лимит маршрутов оптимизации",
+    "route_minute": "Превышен лимит маршрутов оптимизации в минуту",
+}
+
+_rate_backend = build_backend(ROUTING_RATE_BACKEND, path=Path(ROUTING_RATE_PATH), url=ROUTING_RATE_REDIS_URL)
+routing_limiter = RateLimiter(
+    [
+        BucketSpec("routing_day", ROUTING_DAILY_LIMIT, 86400.0, sliding=True),
+        BucketSpec("routing_minute", ROUTING_MINUTE_LIMIT, 60.0),
+    ],
+    _rate_backend,
+)
+route_limiter = RateLimiter(
+    [
+        BucketSpec("route_day", ROUTE_DAILY_LIMIT, 86400.0, sliding=True),
+        BucketSpec("route_minute", ROUTE_MINUTE_LIMIT, 60.0),
+    ],
+    _rate_backend,
+)
+
+
+def _check_routing_rate_limit(max_wait: Optional[float] = None, limiter: RateLimiter = routing_limiter) -> None:
+    wait, bucket = limiter.acquire(ROUTING_RATE_MAX_WAIT if max_wait is None else max_wait)
+    if bucket is not None:
+        message = _ROUTING_BUCKET_MESSAGES.get(bucket, "Превышен лимит запросов маршрутизации")
+        raise RoutingRateLimitError(f"{message} (повтор через {wait:.0f} с)")
+
+
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(7 * 86400)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))
+GEOCODE_BATCH_WORKERS = int(os.getenv("GEOCODE_BATCH_WORKERS", "8"))
+# Reverse geocode clicks closer than this (metres) share one cache entry and one API call.
+REVERSE_GEOCODE_SNAP_M = float(os.getenv("REVERSE_GEOCODE_SNAP_M", "25"))
+
+geocode_cache = TTLCache(GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL, GEOCODE_NEGATIVE_TTL)
+reverse_geocode_cache = TTLCache(GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL, GEOCODE_NEGATIVE_TTL)
+
+
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "2000"))
+ROUTE_CACHE_MAX_BYTES = int(os.getenv("ROUTE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", str(6 * 3600)))
+# Live-traffic routes go stale quickly.
+ROUTE_JAM_CACHE_TTL = float(os.getenv("ROUTE_JAM_CACHE_TTL", "300"))
+
+
+route_cache = TTLCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL, max_bytes=ROUTE_CACHE_MAX_BYTES, sizeof=json_size)
+
+# Parsed WKT paths, keyed by a digest of the WKT text so the (large) strings themselves are not kept.
+WKT_PARSE_CACHE_SIZE = int(os.getenv("WKT_PARSE_CACHE_SIZE", "4096"))
+WKT_PARSE_CACHE_MAX_BYTES = int(os.getenv("WKT_PARSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+WKT_PARSE_CACHE_TTL = float(os.getenv("WKT_PARSE_CACHE_TTL", "600"))
+
+wkt_parse_cache = TTLCache(
+    WKT_PARSE_CACHE_SIZE,
+    WKT_PARSE_CACHE_TTL,
+    max_bytes=WKT_PARSE_CACHE_MAX_BYTES,
+    sizeof=lambda buffer: buffer.itemsize * len(buffer),
+)
+
+
+class _NoGeocodeResults(ValueError):
+    """2GIS answered but found nothing; safe to cache as a negative result."""
 
 
-def _check_routing_rate_limit() -> None:
-    if ROUTING_DAILY_LIMIT <= 0 and ROUTING_MINUTE_LIMIT <= 0:
-        return
+def _get_api_key() -> str:
+    return os.getenv("2GIS_API_KEY", "")
 
-    now = datetime.utcnow()
 
-    if ROUTING_DAILY_LIMIT > 0:
-        threshold_day = now - timedelta(days=1)
-        while _ROUTING_DAY_WINDOW and _ROUTING_DAY_WINDOW[0] < threshold_day:
-            _ROUTING_DAY_WINDOW.popleft()
-    if ROUTING_MINUTE_LIMIT > 0:
-        threshold_minute = now - timedelta(minutes=1)
-        while _ROUTING_MINUTE_WINDOW and _ROUTING_MINUTE_WINDOW[0] < threshold_minute:
-            _ROUTING_MINUTE_WINDOW.popleft()
+def _geocode_key(address: str) -> str:
+    text = re.sub(r"\s*,\s*", ", ", address.casefold())
+    return re.sub(r"\s+", " ", text).strip(" ,.")
 
-    if ROUTING_DAILY_LIMIT > 0 and len(_ROUTING_DAY_WINDOW) >= ROUTING_DAILY_LIMIT:
-        raise RoutingRateLimitError("Достигнут дневной лимит запросов маршрутизации")
-    if ROUTING_MINUTE_LIMIT > 0 and len(_ROUTING_MINUTE_WINDOW) >= ROUTING_MINUTE_LIMIT:
-        raise RoutingRateLimitError("Превышен лимит запросов маршрутизации в минуту")
 
-    _ROUTING_DAY_WINDOW.append(now)
-    _ROUTING_MINUTE_WINDOW.append(now)
+def _snap_coordinates(lat: float, lng: float) -> Tuple[float, float]:
+    """Cache key of the ``REVERSE_GEOCODE_SNAP_M`` cell containing the point (not a coordinate)."""
 
+    if REVERSE_GEOCODE_SNAP_M <= 0:
+        return lat, lng
+    step = REVERSE_GEOCODE_SNAP_M / 111_320.0
+    row = round(lat / step)
+    # A degree of longitude shrinks with latitude; use the row's latitude so the whole row agrees.
+    lng_step = step / max(cos(radians(row * step)), 1e-6)
+    return row, round(lng / lng_step)
+
+
+def _normalize_payload(value: object) -> object:
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {str(key): _normalize_payload(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_payload(item) for item in value]
+    return value
 
-def _get_api_key() -> str:
-    return os.getenv("2GIS_API_KEY", "")
+
+def _route_cache_key(kind: str, payload: Dict[str, object]) -> str:
+    """Content hash of a routing request (without the API key)."""
+    canonical = json.dumps([kind, _normalize_payload(payload)], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _clone_route(value: Dict[str, object]) -> Dict[str, object]:
+    """Copy the dict skeleton of a cached route; geometry and graph lists are shared read-only."""
+    clone = dict(value)
+    if isinstance(clone.get("properties"), dict):
+        clone["properties"] = dict(clone["properties"])
+        if isinstance(clone["properties"].get("details"), dict):
+            clone["properties"]["details"] = dict(clone["properties"]["details"])
+    if isinstance(clone.get("features"), list):
+        clone["features"] = [_clone_route(feature) for feature in clone["features"]]
+    return clone
+
+
+def _cached_route(key: str) -> Optional[Dict[str, object]]:
+    cached = route_cache.get(key)
+    if cached is MISSING or cached is None:
+        return None
+    return _clone_route(cached)  # type: ignore[arg-type]
+
+
+def _store_route(key: str, value: Dict[str, object], ttl: Optional[float] = None) -> Dict[str, object]:
+    route_cache.set(key, value, ttl=ttl)
+    return _clone_route(value)
 
 
 def geocode(address: str) -> Dict[str, float]:
@@ -63,27 +187,71 @@ def geocode(address: str) -> Dict[str, float]:
         logger.info("2GIS_API_KEY missing, returning demo coordinates for geocode")
         return {"lat": 55.751244, "lng": 37.618423, "source": "stub"}
 
+    key = _geocode_key(address)
+    cached = geocode_cache.get(key)
+    if cached is None:
+        return {"lat": 55.751244, "lng": 37.618423, "source": "error-fallback"}
+    if cached is not MISSING:
+        return dict(cached)
+
     params = {"q": address, "key": api_key, "fields": "items.point"}
     try:
-        response = requests.get(GEOCODE_URL, params=params, timeout=REQUEST_TIMEOUT)
+        response = http_client.get(GEOCODE_URL, endpoint="geocode", params=params)
         response.raise_for_status()
         data = response.json()
         items = data.get("result", {}).get("items", [])
         if not items:
-            raise ValueError("no geocode results")
+            raise _NoGeocodeResults("no geocode results")
         point = items[0].get("point") or {}
-        return {"lat": point.get("lat"), "lng": point.get("lon"), "source": "2gis"}
+        result = {"lat": point.get("lat"), "lng": point.get("lon"), "source": "2gis"}
+        geocode_cache.set(key, result)
+        return dict(result)
     except (requests.RequestException, ValueError) as exc:
+        if isinstance(exc, _NoGeocodeResults):
+            geocode_cache.set(key, None, negative=True)
         logger.warning("Geocode failed for %s: %s", address, exc)
         return {"lat": 55.751244, "lng": 37.618423, "source": "error-fallback"}
 
 
+def geocode_many(addresses: Iterable[str], *, max_workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """Geocode several addresses at once.
+
+    Addresses that normalise to the same cache key are looked up once; the
+    remaining lookups run concurrently on a bounded pool. Returns a mapping
+    from every input address to its result.
+    """
+
+    addresses = list(addresses)
+    by_key: Dict[str, str] = {}
+    for address in addresses:
+        by_key.setdefault(_geocode_key(address), address)
+    if not by_key:
+        return {}
+
+    unique = list(by_key.values())
+    workers = max(1, min(max_workers or GEOCODE_BATCH_WORKERS, len(unique)))
+    if workers == 1:
+        results = [geocode(address) for address in unique]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="geocode") as pool:
+            results = list(pool.map(geocode, unique))
+    resolved = dict(zip(by_key, results))
+    return {address: dict(resolved[_geocode_key(address)]) for address in addresses}
+
+
 def reverse_geocode(lat: float, lng: float) -> Dict[str, object]:
     api_key = _get_api_key()
     if not api_key:
         logger.info("2GIS_API_KEY missing, returning demo reverse geocode result")
         return {"name": "Точка на карте", "address": "Москва", "point": {"lat": lat, "lng": lng}, "source": "stub"}
 
+    snapped = _snap_coordinates(lat, lng)
+    cached = reverse_geocode_cache.get(snapped)
+    if cached is None:
+        return {"name": "Точка на карте", "address": None, "point": {"lat": lat, "lng": lng}, "source": "error-fallback"}
+    if cached is not MISSING:
+        return {**cached, "point": dict(cached["point"])}
+
     params = {
         "q": f"{lat},{lng}",
         "key": api_key,
@@ -92,26 +260,32 @@ def reverse_geocode(lat: float, lng: float) -> Dict[str, object]:
         "fields": "items.point,items.address_name",
     }
     try:
-        response = requests.get(GEOCODE_URL, params=params, timeout=REQUEST_TIMEOUT)
+        response = http_client.get(GEOCODE_URL, endpoint="geocode", params=params)
         response.raise_for_status()
         data = response.json()
         items = data.get("result", {}).get("items", [])
         if not items:
-            raise ValueError("no reverse geocode results")
+            raise _NoGeocodeResults("no reverse geocode results")
         item = items[0]
         point = item.get("point") or {}
-        return {
+        result = {
             "name": item.get("name") or "Неизвестный объект",
             "address": item.get("address_name"),
             "point": {"lat": point.get("lat", lat), "lng": point.get("lon", lng)},
             "source": "2gis",
         }
+        reverse_geocode_cache.set(snapped, result)
+        return {**result, "point": dict(result["point"])}
     except (requests.RequestException, ValueError) as exc:
+        if isinstance(exc, _NoGeocodeResults):
+            reverse_geocode_cache.set(snapped, None, negative=True)
         logger.warning("Reverse geocode failed for (%s,%s): %s", lat, lng, exc)
         return {"name": "Точка на карте", "address": None, "point": {"lat": lat, "lng": lng}, "source": "error-fallback"}
 
 
-def route(waypoints: Iterable[Dict[str, float]]) -> Dict[str, object]:
+def route(waypoints: Iterable[Dict[str, float]], *, rate_wait: Optional[float] = None) -> Dict[str, object]:
+    """Car route through ``waypoints``; ``rate_wait`` caps the wait for a ``route_limiter`` token."""
+
     waypoints_list: List[Dict[str, float]] = list(waypoints)
     if len(waypoints_list) < 2:
         raise ValueError("route requires at least two waypoints")
@@ -131,8 +305,20 @@ def route(waypoints: Iterable[Dict[str, float]]) -> Dict[str, object]:
         "key": api_key,
         "type": "car",
     }
+    cache_key = _route_cache_key("route", {k: v for k, v in payload.items() if k != "key"})
+    cached = _cached_route(cache_key)
+    if cached is not None:
+        return cached
     try:
-        response = requests.post(ROUTING_URL, json=payload, timeout=REQUEST_TIMEOUT)
+        _check_routing_rate_limit(rate_wait, route_limiter)
+        response = http_client.post(
+            ROUTING_URL,
+            endpoint="routing",
+            idempotent=True,
+            # Every resend spends quota upstream, so it takes its own token.
+            before_retry=lambda: _check_routing_rate_limit(rate_wait, route_limiter),
+            json=payload,
+        )
         response.raise_for_status()
         data = response.json()
         result = data.get("result", {})
@@ -141,12 +327,15 @@ def route(waypoints: Iterable[Dict[str, float]]) -> Dict[str, object]:
             geometry = geometries[0]
         else:
             geometry = {"type": "LineString", "coordinates": [[wp["lng"], wp["lat"]] for wp in waypoints_list]}
-        return {
-            "type": "Feature",
-            "geometry": geometry,
-            "properties": {"provider": "2gis", "length_meters": result.get("total_distance")},
-        }
-    except requests.RequestException as exc:
+        return _store_route(
+            cache_key,
+            {
+                "type": "Feature",
+                "geometry": geometry,
+                "properties": {"provider": "2gis", "length_meters": result.get("total_distance")},
+            },
+        )
+    except (requests.RequestException, RoutingRateLimitError) as exc:
         logger.warning("Route request failed, returning fallback: %s", exc)
         coordinates = [[wp["lng"], wp["lat"]] for wp in waypoints_list]
         return {
@@ -203,12 +392,25 @@ def route_transport(
     if utc is not None:
         payload["utc"] = int(utc)
 
+    cache_key = _route_cache_key("route_transport", {"payload": payload, "alternative": alternative})
+    cached = _cached_route(cache_key)
+    if cached is not None:
+        return cached
+
     params_qs = {"key": api_key}
     try:
         _check_routing_rate_limit()
-        response = requests.post(ROUTING_V7_URL, params=params_qs, json=payload, timeout=REQUEST_TIMEOUT)
+        response = http_client.post(
+            ROUTING_V7_URL,
+            endpoint="routing",
+            idempotent=True,
+            before_retry=_check_routing_rate_limit,
+            params=params_qs,
+            json=payload,
+            stream=True,
+        )
         response.raise_for_status()
-        data = response.json() or {}
+        data = read_route_json(response) or {}
         routes_data, meta = _extract_routes(data)
         if not routes_data:
             raise ValueError("empty routing result")
@@ -265,7 +467,8 @@ def route_transport(
             collection["properties"]["details"]["utc"] = utc
         if meta and isinstance(meta, dict):
             collection["properties"]["details"]["meta"] = meta
-        return collection
+        ttl = ROUTE_JAM_CACHE_TTL if payload.get("traffic_mode") == "jam" else ROUTE_CACHE_TTL
+        return _store_route(cache_key, collection, ttl)
     except RoutingRateLimitError as exc:
         logger.warning("Routing rate limit reached, using fallback: %s", exc)
         return _build_error_route(start, destination, transport, route_mode, traffic_mode, filters or [], str(exc))
@@ -296,12 +499,25 @@ def route_public_transport(
         "transport": transport_modes,
     }
 
+    cache_key = _route_cache_key("route_public_transport", payload)
+    cached = _cached_route(cache_key)
+    if cached is not None:
+        return cached
+
     params_qs = {"key": api_key}
     try:
         _check_routing_rate_limit()
-        response = requests.post(PUBLIC_TRANSPORT_URL, params=params_qs, json=payload, timeout=REQUEST_TIMEOUT)
+        response = http_client.post(
+            PUBLIC_TRANSPORT_URL,
+            endpoint="public_transport",
+            idempotent=True,
+            before_retry=_check_routing_rate_limit,
+            params=params_qs,
+            json=payload,
+            stream=True,
+        )
         response.raise_for_status()
-        routes = response.json() or []
+        routes = read_route_json(response) or []
         if not isinstance(routes, list) or not routes:
             raise ValueError("empty PT routing result")
 
@@ -323,7 +539,7 @@ def route_public_transport(
         if len(routes) > 1:
             logger.debug("Dropping %s alternative PT routes", len(routes) - 1)
 
-        return {
+        collection = {
             "type": "FeatureCollection",
             "features": [feature],
             "properties": {
@@ -336,6 +552,7 @@ def route_public_transport(
                 },
             },
         }
+        return _store_route(cache_key, collection)
     except RoutingRateLimitError as exc:
         logger.warning("Routing rate limit reached for PT request, using fallback: %s", exc)
         return _build_error_route(start, destination, "public_transport", "fastest", "", transport_modes, str(exc))
@@ -358,7 +575,7 @@ def search_places(query: str, *, limit: int = 5) -> List[Dict[str, object]]:
         "fields": "items.point,items.address_name",
     }
     try:
-        response = requests.get(PLACES_URL, params=params, timeout=REQUEST_TIMEOUT)
+        response = http_client.get(PLACES_URL, endpoint="places", params=params)
         response.raise_for_status()
         data = response.json()
         items = data.get("result", {}).get("items", [])
@@ -420,9 +637,11 @@ def _extract_geometry(route_obj: Dict[str, object], start: Dict[str, float], des
     coordinates: List[List[float]] = []
 
     def _extend(new_coords: Sequence[Sequence[float]]) -> None:
+        last = coordinates[-1] if coordinates else None
         for lon, lat in new_coords:
-            if not coordinates or coordinates[-1] != [lon, lat]:
-                coordinates.append([lon, lat])
+            if last is None or last[0] != lon or last[1] != lat:
+                last = [lon, lat]
+                coordinates.append(last)
 
     _extend([[start["lng"], start["lat"]]])
     _extend(_collect_geometry_coords(route_obj.get("begin_pedestrian_path")))
@@ -458,9 +677,11 @@ def _extract_pt_geometry(route_obj: Dict[str, object], start: Dict[str, float],
     coordinates: List[List[float]] = []
 
     def _extend(new_coords: Sequence[Sequence[float]]) -> None:
+        last = coordinates[-1] if coordinates else None
         for lon, lat in new_coords:
-            if not coordinates or coordinates[-1] != [lon, lat]:
-                coordinates.append([lon, lat])
+            if last is None or last[0] != lon or last[1] != lat:
+                last = [lon, lat]
+                coordinates.append(last)
 
     _extend([[start["lng"], start["lat"]]])
 
@@ -549,16 +770,16 @@ def _build_pt_graph(route_obj: Dict[str, object], start: Dict[str, float], desti
     return {"nodes": nodes, "edges": edges}
 
 
-def _collect_geometry_coords(source: object) -> List[List[float]]:
-    coords: List[List[float]] = []
+def _iter_wkt_selections(source: object) -> Iterable[str]:
+    """Yield WKT strings of a 2GIS geometry object in path order."""
 
     if not source:
-        return coords
+        return
 
     if isinstance(source, dict) and isinstance(source.get("selection"), str):
-        coords.extend(_parse_wkt_linestring(source["selection"]))
+        yield source["selection"]
     elif isinstance(source, str):
-        coords.extend(_parse_wkt_linestring(source))
+        yield source
 
     geometry = None
     if isinstance(source, dict):
@@ -567,21 +788,38 @@ def _collect_geometry_coords(source: object) -> List[List[float]]:
         geometry = source
 
     if isinstance(geometry, str):
-        coords.extend(_parse_wkt_linestring(geometry))
+        yield geometry
     elif isinstance(geometry, dict):
         selection = geometry.get("selection")
         if selection:
-            coords.extend(_parse_wkt_linestring(selection))
+            yield selection
         for key in ("items", "geometries", "lines", "geometry"):
             if key in geometry and isinstance(geometry[key], list):
                 for item in geometry[key]:
-                    coords.extend(_collect_geometry_coords(item))
+                    yield from _iter_wkt_selections(item)
     elif isinstance(geometry, list):
         for item in geometry:
-            coords.extend(_collect_geometry_coords(item))
+            yield from _iter_wkt_selections(item)
 
+
+def _collect_geometry_coords(source: object) -> List[List[float]]:
+    coords: List[List[float]] = []
+    for selection in _iter_wkt_selections(source):
+        buffer = _parse_wkt_buffer(selection)
+        values = iter(buffer)
+        coords.extend([lon, lat] for lon, lat in zip(values, values))
     return coords
 
+
+def _last_geometry_coord(source: object) -> Optional[Tuple[float, float]]:
+    """Last ``(lon, lat)`` of a geometry object without parsing whole paths."""
+
+    for selection in reversed(list(_iter_wkt_selections(source))):
+        point = _wkt_last_point(selection)
+        if point is not None:
+            return point
+    return None
+
 def _iter_steps(route_obj: Dict[str, object]) -> Iterable[Dict[str, object]]:
     maneuvers = route_obj.get("maneuvers")
     if isinstance(maneuvers, list):
@@ -600,34 +838,89 @@ def _iter_steps(route_obj: Dict[str, object]) -> Iterable[Dict[str, object]]:
             yield step
 
 
-def _parse_wkt_linestring(selection: str) -> List[List[float]]:
+def _wkt_body(selection: str) -> Optional[str]:
     if not selection:
-        return []
+        return None
     selection = selection.strip()
-    if not selection.upper().startswith("LINESTRING"):
-        return []
+    if not selection[:10].upper().startswith("LINESTRING"):
+        return None
     try:
-        inside = selection[selection.index("(") + 1 : selection.rindex(")")]
+        return selection[selection.index("(") + 1 : selection.rindex(")")]
     except ValueError:
-        return []
-    coordinates: List[List[float]] = []
+        return None
+
+
+def _parse_wkt_pair(pair: str) -> Optional[Tuple[float, float]]:
+    parts = pair.split()
+    if len(parts) < 2:
+        return None
+    try:
+        return float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+
+
+# Every comma-separated item is exactly two tokens, so the flat token list pairs up like the items.
+_WKT_PLAIN_PAIRS = re.compile(r"\s*[^\s,]+\s+[^\s,]+\s*(?:,\s*[^\s,]+\s+[^\s,]+\s*)*")
+
+
+def _parse_wkt_buffer(selection: str) -> array:
+    """Parse a WKT LINESTRING once into a flat ``array('d')`` of lon, lat values.
+
+    The same selections are read by the geometry and the graph builders (and
+    again on retries), so results are memoised in ``wkt_parse_cache``. Treat
+    the buffer as read-only.
+    """
+
+    key = hashlib.blake2b(selection.encode(), digest_size=16).digest()
+    buffer = wkt_parse_cache.get(key)
+    if buffer is MISSING:
+        buffer = _parse_wkt_uncached(selection)
+        wkt_parse_cache.set(key, buffer)
+    return buffer
+
+
+def _parse_wkt_uncached(selection: str) -> array:
+    inside = _wkt_body(selection)
+    if not inside:
+        return array("d")
+    # Fast path for plain 2D pairs: one split and one conversion for the whole string.
+    if _WKT_PLAIN_PAIRS.fullmatch(inside):
+        try:
+            return array("d", map(float, inside.replace(",", " ").split()))
+        except ValueError:
+            pass
+    buffer = array("d")
     for pair in inside.split(","):
-        parts = pair.strip().split()
-        if len(parts) >= 2:
-            try:
-                lon = float(parts[0])
-                lat = float(parts[1])
-                coordinates.append([lon, lat])
-            except ValueError:
-                continue
-    return coordinates
+        point = _parse_wkt_pair(pair)
+        if point is not None:
+            buffer.extend(point)
+    return buffer
+
+
+def _wkt_last_point(selection: str) -> Optional[Tuple[float, float]]:
+    inside = _wkt_body(selection)
+    if not inside:
+        return None
+    rest = inside
+    while rest:
+        rest, _, pair = rest.rpartition(",")
+        point = _parse_wkt_pair(pair)
+        if point is not None:
+            return point
+    return None
+
+
+def _parse_wkt_linestring(selection: str) -> List[List[float]]:
+    values = iter(_parse_wkt_buffer(selection))
+    return [[lon, lat] for lon, lat in zip(values, values)]
 
 
 def _extract_step_coord(step: Dict[str, object]) -> Optional[List[float]]:
     path = step.get("outcoming_path") or {}
-    coords = _collect_geometry_coords(path)
-    if coords:
-        lon, lat = coords[-1]
+    last = _last_geometry_coord(path)
+    if last:
+        lon, lat = last
         return [lat, lon]
     if "point" in step:
         point = step["point"]
@@ -665,9 +958,9 @@ def _extract_step_duration(step: Dict[str, object]) -> Optional[float]:
 def _extract_pt_movement_coord(movement: Dict[str, object]) -> Optional[List[float]]:
     for alt in movement.get("alternatives", []) or []:
         geometry = alt.get("geometry")
-        coords = _collect_geometry_coords(geometry)
-        if coords:
-            lon, lat = coords[-1]
+        last = _last_geometry_coord(geometry)
+        if last:
+            lon, lat = last
             return [lat, lon]
     waypoint = movement.get("waypoint") or {}
     if isinstance(waypoint, dict):
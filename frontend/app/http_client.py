@@ -0,0 +1,194 @@
+"""Pooled HTTP sessions for the 2GIS APIs with per-endpoint timeouts and retries."""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+Timeout = Tuple[float, float]
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# (connect, read) seconds per logical endpoint; override with GIS_TIMEOUT_<NAME>="connect,read".
+DEFAULT_TIMEOUTS: Dict[str, Timeout] = {
+    "default": (3.05, 10.0),
+    "geocode": (3.05, 5.0),
+    "places": (3.05, 5.0),
+    "routing": (3.05, 10.0),
+    "public_transport": (3.05, 15.0),
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_timeout(name: str, default: Timeout) -> Timeout:
+    raw = os.getenv(f"GIS_TIMEOUT_{name.upper()}")
+    if not raw:
+        return default
+    try:
+        parts = [float(part) for part in raw.split(",")]
+    except ValueError:
+        logger.warning("Ignoring malformed GIS_TIMEOUT_%s=%r", name.upper(), raw)
+        return default
+    if len(parts) == 1:
+        return default[0], parts[0]
+    return parts[0], parts[1]
+
+
+class PooledHttpClient:
+    """Keeps one keep-alive ``requests.Session`` per host.
+
+    Catalog and routing hosts get separate connection pools, so bursts on one
+    do not starve the other. Idempotent requests (GET, or any call marked
+    ``idempotent=True``) are retried on connection errors, timeouts and
+    ``RETRY_STATUSES`` with full-jitter exponential backoff. Quota-limited
+    callers pass ``before_retry`` to take a limiter token for every resend.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff: float = 0.3,
+        timeouts: Optional[Dict[str, Timeout]] = None,
+    ) -> None:
+        self.pool_size = max(1, int(pool_size))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = max(0.0, float(backoff))
+        self.timeouts: Dict[str, Timeout] = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "PooledHttpClient":
+        return cls(
+            pool_size=_env_int("GIS_HTTP_POOL_SIZE", 10),
+            max_retries=_env_int("GIS_HTTP_RETRIES", 2),
+            backoff=_env_float("GIS_HTTP_BACKOFF", 0.3),
+            timeouts={name: _env_timeout(name, value) for name, value in DEFAULT_TIMEOUTS.items()},
+        )
+
+    def timeout_for(self, endpoint: str) -> Timeout:
+        return self.timeouts.get(endpoint) or self.timeouts["default"]
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._stats[host] = {"requests": 0, "retries": 0, "failures": 0}
+            return session
+
+    def _count(self, host: str, field: str) -> None:
+        with self._lock:
+            self._stats[host][field] += 1
+
+    def _sleep(self, attempt: int) -> None:
+        if self.backoff:
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        endpoint: str = "default",
+        idempotent: Optional[bool] = None,
+        before_retry: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request through the pooled session of ``url``'s host.
+
+        Retryable statuses return the last response once retries are exhausted,
+        so callers keep using ``raise_for_status()``; network errors propagate
+        as ``requests.RequestException``. ``before_retry`` runs ahead of every
+        resend; an exception from it ends the retries and propagates. Error
+        responses come back already read and closed, also with ``stream=True``.
+        """
+
+        method = method.upper()
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        kwargs.setdefault("timeout", self.timeout_for(endpoint))
+        retries = self.max_retries if (method in IDEMPOTENT_METHODS if idempotent is None else idempotent) else 0
+
+        attempt = 0
+        while True:
+            self._count(host, "requests")
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    self._count(host, "failures")
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    if response.status_code >= 400:
+                        self._count(host, "failures")
+                        # Callers raise_for_status() without reading a streamed body, which would hold the
+                        # pooled connection until GC. Error bodies are small; read them so .text still works.
+                        _ = response.content
+                        response.close()
+                    return response
+                response.close()
+            self._sleep(attempt)
+            if before_retry is not None:
+                before_retry()
+            self._count(host, "retries")
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-host request counters and urllib3 pool usage."""
+
+        with self._lock:
+            snapshot: Dict[str, Dict[str, int]] = {}
+            for host, session in self._sessions.items():
+                adapter = session.get_adapter(f"https://{host}")
+                pools = list(adapter.poolmanager.pools._container.values())  # pylint: disable=protected-access
+                entry = dict(self._stats[host])
+                entry["connections_opened"] = sum(pool.num_connections for pool in pools)
+                entry["pool_maxsize"] = self.pool_size
+                snapshot[host] = entry
+            return snapshot
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,587 @@
+"""Job queue and result backends shared by the web app and worker processes."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+
+# Per result kind: (max entries, max bytes or None); 0 / None means unbounded.
+Limits = Dict[str, Tuple[int, Optional[int]]]
+
+from .cache import MISSING, TTLCache
+
+try:  # Optional dependency for the Redis backend.
+    import redis
+except ImportError:  # pragma: no cover - environment without redis.
+    redis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Expired results are deleted at most this often (seconds).
+_SWEEP_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class Job:
+    """A claimed job: ``attempts`` counts this delivery, so it starts at 1."""
+
+    job_id: str
+    payload: Dict[str, object]
+    attempts: int
+
+
+def _encode(value: object) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 3)
+
+
+def _decode(blob: bytes) -> object:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class MemoryQueue:
+    """Per-process queue; results live in the given stores, one per kind.
+
+    Stores need ``get``/``set``/``stats`` (``TTLCache`` or ``ResultStore``)
+    and ``pop`` for ``delete``; their own limits and TTLs apply, the ``ttl``
+    passed to ``put`` is ignored. Only consumers in the same process see the jobs.
+    """
+
+    def __init__(self, stores: Optional[Dict[str, object]] = None) -> None:
+        self._stores: Dict[str, object] = dict(stores or {})
+        self._queue: Deque[Tuple[float, str]] = deque()
+        self._jobs: Dict[str, Tuple[Dict[str, object], int]] = {}
+        self._leases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, kind: str):
+        with self._lock:
+            store = self._stores.get(kind)
+            if store is None:
+                store = self._stores[kind] = TTLCache(maxsize=10000, ttl=86400.0)
+            return store
+
+    def put(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> None:
+        self._store(kind).set(key, value)
+
+    def get(self, kind: str, key: str) -> Optional[object]:
+        value = self._store(kind).get(key)
+        return None if value is MISSING else value
+
+    def add(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> object:
+        store = self._store(kind)
+        with self._lock:
+            current = store.get(key)
+            if current is MISSING or current is None:
+                store.set(key, value)
+                return value
+            return current
+
+    def replace_if(self, kind: str, key: str, expected: object, value: object, ttl: Optional[float] = None) -> bool:
+        store = self._store(kind)
+        with self._lock:
+            current = store.get(key)
+            if current is MISSING or current != expected:
+                return False
+            store.set(key, value)
+            return True
+
+    def delete(self, kind: str, key: str) -> None:
+        self._store(kind).pop(key)
+
+    def enqueue(self, job_id: str, payload: Dict[str, object]) -> None:
+        with self._lock:
+            self._jobs[job_id] = (payload, 0)
+            self._queue.append((0.0, job_id))
+
+    def claim(self, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            for job_id, lease in list(self._leases.items()):
+                if lease <= now:
+                    del self._leases[job_id]
+                    self._queue.append((0.0, job_id))
+            for _ in range(len(self._queue)):
+                available, job_id = self._queue.popleft()
+                if job_id not in self._jobs:
+                    continue
+                if available > now:
+                    self._queue.append((available, job_id))
+                    continue
+                payload, attempts = self._jobs[job_id]
+                self._jobs[job_id] = (payload, attempts + 1)
+                self._leases[job_id] = now + visibility_timeout
+                return Job(job_id, payload, attempts + 1)
+        return None
+
+    def extend(self, job_id: str, visibility_timeout: float) -> None:
+        with self._lock:
+            if job_id in self._leases:
+                self._leases[job_id] = time.time() + visibility_timeout
+
+    def ack(self, job_id: str) -> None:
+        with self._lock:
+            self._leases.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+
+    def retry(self, job_id: str, delay: float) -> None:
+        with self._lock:
+            if self._leases.pop(job_id, None) is not None:
+                self._queue.append((time.time() + delay, job_id))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats: Dict[str, object] = {
+                "backend": "memory",
+                "queued": len(self._jobs) - len(self._leases),
+                "running": len(self._leases),
+            }
+            stores = dict(self._stores)
+        for kind, store in stores.items():
+            stats[kind] = store.stats()  # type: ignore[attr-defined]
+        return stats
+
+
+class SQLiteQueue:
+    """Queue and results in one SQLite (WAL) file, shared by all processes on a host.
+
+    Claiming is a single ``BEGIN IMMEDIATE`` transaction, so each job goes to
+    one consumer. A claimed job is leased for the visibility timeout; if the
+    consumer dies without ``ack`` or ``retry``, it becomes claimable again
+    once the lease runs out.
+
+    ``limits`` bound the results of a kind by entries and stored (compressed)
+    bytes; the least recently written ones are deleted on ``put`` and a value
+    larger than the byte limit is not stored.
+    """
+
+    def __init__(self, path: Path, *, limits: Optional[Limits] = None) -> None:
+        self.path = Path(path)
+        self.limits: Limits = dict(limits or {})
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork into worker processes.
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, payload TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "available_at REAL NOT NULL, lease_until REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_available ON jobs (available_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires REAL, "
+                "size INTEGER NOT NULL DEFAULT 0, written REAL NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (kind, key))"
+            )
+            self._migrate(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS results_written ON results (kind, written)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Add the size columns to files written before result limits, sizing existing rows once."""
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Checked inside the transaction: another process may have just migrated the file.
+            if "size" not in {row[1] for row in conn.execute("PRAGMA table_info(results)")}:
+                conn.execute("ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE results ADD COLUMN written REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE results SET size = length(value)")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, sql: str, args: tuple) -> int:
+        with self._lock:
+            return self._connect().execute(sql, args).rowcount
+
+    @staticmethod
+    def _store(conn: sqlite3.Connection, kind: str, key: str, blob: bytes, ttl: Optional[float], now: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (kind, key, value, expires, size, written) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, key, blob, now + ttl if ttl else None, len(blob), now),
+        )
+
+    def _trim(self, conn: sqlite3.Connection, kind: str, now: float) -> None:
+        """Delete expired and least recently written results of ``kind`` beyond its limits."""
+
+        max_entries, max_bytes = self.limits[kind]
+        conn.execute("DELETE FROM results WHERE kind = ? AND expires < ?", (kind, now))
+        if max_entries:
+            conn.execute(
+                "DELETE FROM results WHERE kind = ? AND key IN ("
+                "SELECT key FROM results WHERE kind = ? ORDER BY written DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (kind, kind, max_entries),
+            )
+        if max_bytes:
+            (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results WHERE kind = ?", (kind,)).fetchone()
+            doomed = []
+            if total > max_bytes:
+                for key, size in conn.execute(
+                    "SELECT key, size FROM results WHERE kind = ? ORDER BY written, rowid", (kind,)
+                ):
+                    if total <= max_bytes:
+                        break
+                    doomed.append((kind, key))
+                    total -= size
+            conn.executemany("DELETE FROM results WHERE kind = ? AND key = ?", doomed)
+
+    def put(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        blob = _encode(value)
+        if kind not in self.limits:
+            with self._lock:
+                self._store(self._connect(), kind, key, blob, ttl, now)
+        else:
+            max_bytes = self.limits[kind][1]
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if max_bytes and len(blob) > max_bytes:
+                        # Like TTLCache: an oversized value is dropped instead of flushing the kind.
+                        conn.execute("DELETE FROM results WHERE kind = ? AND key = ?", (kind, key))
+                    else:
+                        self._store(conn, kind, key, blob, ttl, now)
+                        self._trim(conn, kind, now)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        if now - self._last_sweep > _SWEEP_INTERVAL:
+            self._last_sweep = now
+            removed = self._write("DELETE FROM results WHERE expires < ?", (now,))
+            if removed:
+                logger.debug("Swept %d expired task results", removed)
+
+    def get(self, kind: str, key: str) -> Optional[object]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM results WHERE kind = ? AND key = ? AND (expires IS NULL OR expires >= ?)",
+                (kind, key, time.time()),
+            ).fetchone()
+        return None if row is None else _decode(row[0])
+
+    def add(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> object:
+        """Store ``value`` unless a live entry exists; return whichever is stored."""
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM results WHERE kind = ? AND key = ? AND (expires IS NULL OR expires >= ?)",
+                    (kind, key, now),
+                ).fetchone()
+                if row is None:
+                    self._store(conn, kind, key, _encode(value), ttl, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return value if row is None else _decode(row[0])
+
+    def replace_if(self, kind: str, key: str, expected: object, value: object, ttl: Optional[float] = None) -> bool:
+        """Store ``value`` only while the live entry equals ``expected``; return whether it did."""
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM results WHERE kind = ? AND key = ? AND (expires IS NULL OR expires >= ?)",
+                    (kind, key, now),
+                ).fetchone()
+                replaced = row is not None and _decode(row[0]) == expected
+                if replaced:
+                    self._store(conn, kind, key, _encode(value), ttl, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return replaced
+
+    def delete(self, kind: str, key: str) -> None:
+        self._write("DELETE FROM results WHERE kind = ? AND key = ?", (kind, key))
+
+    def enqueue(self, job_id: str, payload: Dict[str, object]) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO jobs (id, payload, attempts, available_at) VALUES (?, ?, 0, ?)",
+            (job_id, json.dumps(payload), time.time()),
+        )
+
+    def claim(self, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM jobs "
+                    "WHERE available_at <= ? AND (lease_until IS NULL OR lease_until <= ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET attempts = attempts + 1, lease_until = ? WHERE id = ?",
+                        (now + visibility_timeout, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(row[0], json.loads(row[1]), row[2] + 1)
+
+    def extend(self, job_id: str, visibility_timeout: float) -> None:
+        self._write(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_until IS NOT NULL",
+            (time.time() + visibility_timeout, job_id),
+        )
+
+    def ack(self, job_id: str) -> None:
+        self._write("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: str, delay: float) -> None:
+        self._write("UPDATE jobs SET lease_until = NULL, available_at = ? WHERE id = ?", (time.time() + delay, job_id))
+
+    def stats(self) -> Dict[str, object]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            running, queued = conn.execute(
+                "SELECT COALESCE(SUM(lease_until > ?), 0), COALESCE(SUM(lease_until IS NULL OR lease_until <= ?), 0) FROM jobs",
+                (now, now),
+            ).fetchone()
+            rows = conn.execute("SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM results GROUP BY kind").fetchall()
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "queued": queued,
+            "running": running,
+            "results": {kind: count for kind, count, _ in rows},
+            "result_bytes": {kind: size for kind, _, size in rows},
+        }
+
+
+_REDIS_CLAIM = """
+local now = tonumber(ARGV[1])
+for _, zset in ipairs({KEYS[2], KEYS[3]}) do
+  for _, id in ipairs(redis.call('ZRANGEBYSCORE', zset, '-inf', now)) do
+    redis.call('ZREM', zset, id)
+    redis.call('RPUSH', KEYS[1], id)
+  end
+end
+while true do
+  local id = redis.call('LPOP', KEYS[1])
+  if not id then return false end
+  local key = ARGV[3] .. id
+  local payload = redis.call('HGET', key, 'payload')
+  if payload then
+    local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), id)
+    return {id, payload, attempts}
+  end
+end
+"""
+
+# Compare-and-set on the encoded value; ARGV: expected, new value, TTL seconds (0 keeps no expiry).
+_REDIS_REPLACE_IF = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+if tonumber(ARGV[3]) > 0 then
+  redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+else
+  redis.call('SET', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+
+# Bounded put. KEYS: value, written-order sorted set, size hash, byte total of the kind.
+# ARGV: value, TTL seconds (0 keeps no expiry), now, key, max entries, max bytes (0 = unbounded), value key prefix.
+_REDIS_PUT_BOUNDED = """
+local ttl, now, member = tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+local max_entries, max_bytes = tonumber(ARGV[5]), tonumber(ARGV[6])
+local function forget(name)
+  local size = tonumber(redis.call('HGET', KEYS[3], name) or '0')
+  redis.call('HDEL', KEYS[3], name)
+  redis.call('ZREM', KEYS[2], name)
+  redis.call('DEL', ARGV[7] .. name)
+  return redis.call('INCRBY', KEYS[4], -size)
+end
+forget(member)
+if max_bytes > 0 and string.len(ARGV[1]) > max_bytes then return 0 end
+if ttl > 0 then
+  redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+  -- Values written a TTL ago have expired on their own; drop them from the accounting.
+  for _, name in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - ttl)) do forget(name) end
+else
+  redis.call('SET', KEYS[1], ARGV[1])
+end
+redis.call('HSET', KEYS[3], member, string.len(ARGV[1]))
+redis.call('ZADD', KEYS[2], now, member)
+local total = redis.call('INCRBY', KEYS[4], string.len(ARGV[1]))
+while (max_entries > 0 and redis.call('ZCARD', KEYS[2]) > max_entries) or (max_bytes > 0 and total > max_bytes) do
+  local oldest = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+  if not oldest then
+    -- Nothing left to drop: the byte total had drifted (values removed behind our back).
+    redis.call('SET', KEYS[4], 0)
+    break
+  end
+  total = forget(oldest)
+end
+return 1
+"""
+
+# Delete one value of a bounded kind. KEYS as in _REDIS_PUT_BOUNDED; ARGV: key.
+_REDIS_DELETE_BOUNDED = """
+local size = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('INCRBY', KEYS[4], -size)
+return redis.call('DEL', KEYS[1])
+"""
+
+
+class RedisQueue:
+    """Queue and results in Redis (or any server speaking its protocol and Lua).
+
+    Jobs are a list of ids plus a hash per job; leases and delayed retries
+    are sorted sets scored by time, moved back onto the list by the claim
+    script once due. Kinds with ``limits`` also keep their keys in a sorted
+    set by write time plus a size hash, so ``put`` can drop the least recently
+    written values beyond the entry and (compressed) byte limits.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "tasks:", limits: Optional[Limits] = None) -> None:
+        if redis is None:
+            raise RuntimeError("redis package is required for the redis task backend")
+        self.prefix = prefix
+        self.limits: Limits = dict(limits or {})
+        self._client = redis.Redis.from_url(url)
+        self._claim = self._client.register_script(_REDIS_CLAIM)
+        self._replace_if = self._client.register_script(_REDIS_REPLACE_IF)
+        self._put_bounded = self._client.register_script(_REDIS_PUT_BOUNDED)
+        self._delete_bounded = self._client.register_script(_REDIS_DELETE_BOUNDED)
+        self._keys = [prefix + "queue", prefix + "leases", prefix + "delayed"]
+
+    def _bounded_keys(self, kind: str, key: str) -> list:
+        return [f"{self.prefix}{kind}:{key}", *(f"{self.prefix}{name}:{kind}" for name in ("index", "sizes", "bytes"))]
+
+    def put(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> None:
+        if kind in self.limits:
+            max_entries, max_bytes = self.limits[kind]
+            args = [_encode(value), int(ttl) if ttl else 0, time.time(), key, max_entries or 0, max_bytes or 0, f"{self.prefix}{kind}:"]
+            self._put_bounded(keys=self._bounded_keys(kind, key), args=args)
+            return
+        self._client.set(f"{self.prefix}{kind}:{key}", _encode(value), ex=int(ttl) if ttl else None)
+
+    def get(self, kind: str, key: str) -> Optional[object]:
+        blob = self._client.get(f"{self.prefix}{kind}:{key}")
+        return None if blob is None else _decode(blob)
+
+    def add(self, kind: str, key: str, value: object, ttl: Optional[float] = None) -> object:
+        name = f"{self.prefix}{kind}:{key}"
+        if self._client.set(name, _encode(value), ex=int(ttl) if ttl else None, nx=True):
+            return value
+        blob = self._client.get(name)
+        # Expired between the two calls: report ours, the caller may retry.
+        return value if blob is None else _decode(blob)
+
+    def replace_if(self, kind: str, key: str, expected: object, value: object, ttl: Optional[float] = None) -> bool:
+        args = [_encode(expected), _encode(value), int(ttl) if ttl else 0]
+        return bool(self._replace_if(keys=[f"{self.prefix}{kind}:{key}"], args=args))
+
+    def delete(self, kind: str, key: str) -> None:
+        if kind in self.limits:
+            self._delete_bounded(keys=self._bounded_keys(kind, key), args=[key])
+            return
+        self._client.delete(f"{self.prefix}{kind}:{key}")
+
+    def enqueue(self, job_id: str, payload: Dict[str, object]) -> None:
+        pipe = self._client.pipeline()
+        pipe.hset(f"{self.prefix}job:{job_id}", mapping={"payload": json.dumps(payload), "attempts": 0})
+        pipe.rpush(self._keys[0], job_id)
+        pipe.execute()
+
+    def claim(self, visibility_timeout: float) -> Optional[Job]:
+        result = self._claim(keys=self._keys, args=[time.time(), visibility_timeout, self.prefix + "job:"])
+        if not result:
+            return None
+        job_id, payload, attempts = result
+        job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+        return Job(job_id, json.loads(payload), int(attempts))
+
+    def extend(self, job_id: str, visibility_timeout: float) -> None:
+        self._client.zadd(self._keys[1], {job_id: time.time() + visibility_timeout}, xx=True)
+
+    def ack(self, job_id: str) -> None:
+        pipe = self._client.pipeline()
+        pipe.zrem(self._keys[1], job_id)
+        pipe.delete(f"{self.prefix}job:{job_id}")
+        pipe.execute()
+
+    def retry(self, job_id: str, delay: float) -> None:
+        pipe = self._client.pipeline()
+        pipe.zrem(self._keys[1], job_id)
+        pipe.zadd(self._keys[2], {job_id: time.time() + delay})
+        pipe.execute()
+
+    def stats(self) -> Dict[str, object]:
+        queued, running, delayed = (
+            self._client.llen(self._keys[0]),
+            self._client.zcard(self._keys[1]),
+            self._client.zcard(self._keys[2]),
+        )
+        return {"backend": "redis", "queued": queued + delayed, "running": running}
+
+
+def build_queue(
+    kind: str,
+    *,
+    path: Optional[Path] = None,
+    url: Optional[str] = None,
+    stores: Optional[Dict[str, object]] = None,
+    limits: Optional[Limits] = None,
+):
+    """Queue factory for ``memory``, ``sqlite`` or ``redis``.
+
+    ``stores`` only apply to ``memory`` (they carry their own limits),
+    ``limits`` to ``sqlite`` and ``redis``.
+    """
+
+    kind = (kind or "memory").lower()
+    if kind == "sqlite":
+        if path is None:
+            raise ValueError("sqlite task backend requires a path")
+        return SQLiteQueue(path, limits=limits)
+    if kind == "redis":
+        if not url:
+            raise ValueError("redis task backend requires a URL")
+        return RedisQueue(url, limits=limits)
+    if kind != "memory":
+        logger.warning("Unknown task backend %r, using the in-process queue", kind)
+    return MemoryQueue(stores)
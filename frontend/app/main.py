@@ -8,10 +8,16 @@ if __package__ in {None, ""}:
     project_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(project_root))
     from app import create_app  # type: ignore  # noqa: E402
+    from app.compute_pool import warm_pool  # type: ignore  # noqa: E402
 else:
     from . import create_app
+    from .compute_pool import warm_pool
 
 app = create_app()
+# Only the server starts compute pool processes up front; anything else importing ``app`` gets the
+# pool lazily on its first compute_pool.run().
+if app.config["MEETPOINT_PRELOAD"] != "lazy":
+    warm_pool()
 
 
 if __name__ == "__main__":
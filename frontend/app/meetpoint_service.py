@@ -2,22 +2,133 @@
 
 from __future__ import annotations
 
+import hashlib
 import importlib
+import json
 import logging
 import math
+import os
+import threading
+import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Sequence, Tuple
 
+from .cache import MISSING, SingleFlight, TTLCache
+
 
 logger = logging.getLogger(__name__)
 
 
-try:
-    meetpoint_module = importlib.import_module("find_point.find_meetpoint")
-    MEETPOINT_IMPORT_ERROR = None
-except ImportError as exc:  # pragma: no cover - optional dependency path.
-    meetpoint_module = None
-    MEETPOINT_IMPORT_ERROR = str(exc)
+MEETPOINT_MODULE = "find_point.find_meetpoint"
+# Imported one by one before the script so the startup report shows what each costs.
+MEETPOINT_DEPENDENCIES = (
+    "numpy",
+    "shapely",
+    "routingpy",
+    "find_point.projection",
+    "find_point.matrix_cache",
+)
+
+meetpoint_module = None
+MEETPOINT_IMPORT_ERROR: Optional[str] = None
+IMPORT_REPORT: List[Dict[str, object]] = []
+
+_load_lock = threading.Lock()
+_load_attempted = False
+_warm_thread: Optional[threading.Thread] = None
+
+
+def _reset_after_fork() -> None:
+    global _load_lock, _warm_thread  # pylint: disable=global-statement
+    _load_lock = threading.Lock()
+    _warm_thread = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _timed_import(name: str) -> Tuple[object, Dict[str, object]]:
+    started = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+        error = None
+    except ImportError as exc:
+        module = None
+        error = str(exc)
+    entry: Dict[str, object] = {"module": name, "seconds": round(time.perf_counter() - started, 4)}
+    if error:
+        entry["error"] = error
+    return module, entry
+
+
+def load_meetpoint_module():
+    """Import ``find_point.find_meetpoint`` once and return it (``None`` if unavailable).
+
+    Concurrent callers wait for the import already in progress instead of
+    starting another one. Per-module import times are kept in ``IMPORT_REPORT``.
+    """
+
+    global meetpoint_module, MEETPOINT_IMPORT_ERROR, _load_attempted  # pylint: disable=global-statement
+
+    if _load_attempted:
+        return meetpoint_module
+
+    with _load_lock:
+        if _load_attempted:
+            return meetpoint_module
+
+        report: List[Dict[str, object]] = []
+        for name in MEETPOINT_DEPENDENCIES:
+            report.append(_timed_import(name)[1])
+        module, entry = _timed_import(MEETPOINT_MODULE)
+        report.append(entry)
+
+        IMPORT_REPORT[:] = report
+        meetpoint_module = module
+        MEETPOINT_IMPORT_ERROR = entry.get("error")  # type: ignore[assignment]
+        _load_attempted = True
+
+    total = sum(float(item["seconds"]) for item in report)
+    logger.info(
+        "find_point import took %.3fs (%s)",
+        total,
+        ", ".join(f"{item['module']}={item['seconds']:.3f}s" for item in report),
+    )
+    if MEETPOINT_IMPORT_ERROR:
+        logger.warning("find_meetpoint unavailable, geometric median will be used: %s", MEETPOINT_IMPORT_ERROR)
+    return meetpoint_module
+
+
+def warm_meetpoint_module() -> threading.Thread:
+    """Start importing the meetpoint script in a daemon thread and return it."""
+
+    global _warm_thread  # pylint: disable=global-statement
+
+    with _load_lock:
+        if _warm_thread is None or not _warm_thread.is_alive():
+            _warm_thread = threading.Thread(
+                target=load_meetpoint_module, name="meetpoint-warmup", daemon=True
+            )
+            _warm_thread.start()
+        return _warm_thread
+
+
+def meetpoint_status() -> Dict[str, object]:
+    """Non-blocking snapshot of the meetpoint module state for health checks."""
+
+    loading = _warm_thread is not None and _warm_thread.is_alive()
+    return {
+        "loaded": meetpoint_module is not None,
+        "loading": loading,
+        "error": MEETPOINT_IMPORT_ERROR,
+        "import_seconds": round(sum(float(item["seconds"]) for item in IMPORT_REPORT), 4)
+        if IMPORT_REPORT
+        else None,
+        "modules": list(IMPORT_REPORT),
+        "coalescing": _meetpoint_flights.stats(),
+        "result_cache": _meetpoint_results.stats(),
+    }
 
 
 DEFAULT_MEETPOINT_TYPE = "minisum"
@@ -27,7 +138,8 @@ _TRANSPORT_TO_PROFILE = {
     "car": "driving-car",
     "driving": "driving-car",
     "taxi": "driving-car",
-    "public_transport": "driving-car",
+    # Resolved to its own SpeedCurve offline; ORS requests substitute "driving-car".
+    "public_transport": "public-transport",
     "walking": "foot-walking",
     "pedestrian": "foot-walking",
     "foot": "foot-walking",
@@ -43,6 +155,28 @@ _TRANSPORT_TO_PROFILE = {
 
 DEFAULT_PROFILE = "driving-car"
 
+# Typical door-to-door speeds (m/s); the fallback weights each participant by
+# 1 / speed so the geometric median minimises total travel time, not distance.
+_PROFILE_SPEEDS = {
+    "driving-car": 30 / 3.6,
+    "driving-hgv": 25 / 3.6,
+    "public-transport": 20 / 3.6,
+    "cycling-regular": 15 / 3.6,
+    "foot-walking": 5 / 3.6,
+}
+
+# Identical requests in flight at the same time share one computation.
+_meetpoint_flights = SingleFlight()
+
+# Finished searches are reused for groups whose members all stay within the same
+# MEETPOINT_RESULT_TOLERANCE_M cell (same profiles, destination and objective).
+MEETPOINT_RESULT_TOLERANCE_M = float(os.getenv("MEETPOINT_RESULT_TOLERANCE_M", "25"))
+MEETPOINT_RESULT_CACHE_TTL = float(os.getenv("MEETPOINT_RESULT_CACHE_TTL", "600"))
+MEETPOINT_RESULT_CACHE_SIZE = int(os.getenv("MEETPOINT_RESULT_CACHE_SIZE", "1024"))
+_METRES_PER_DEGREE = 111_320.0
+
+_meetpoint_results = TTLCache(MEETPOINT_RESULT_CACHE_SIZE, MEETPOINT_RESULT_CACHE_TTL)
+
 
 @dataclass
 class MeetpointResult:
@@ -65,49 +199,51 @@ def _normalize_coordinates(entry: Dict[str, object]) -> Tuple[float, float]:
     return lat, lng
 
 
-def _geometric_median(points: Sequence[Tuple[float, float]], *, max_iterations: int = 80, tolerance: float = 1e-6) -> Dict[str, float]:
-    if not points:
-        raise ValueError("geometric median requires at least one point")
-    if len(points) == 1:
-        lat, lng = points[0]
-        return {"lat": lat, "lng": lng}
-
-    current_lat = sum(lat for lat, _ in points) / len(points)
-    current_lng = sum(lng for _, lng in points) / len(points)
-    epsilon = 1e-12
-
-    for _ in range(max_iterations):
-        num_lat = 0.0
-        num_lng = 0.0
-        denom = 0.0
-        coincident = 0
-
-        for lat, lng in points:
-            diff_lat = current_lat - lat
-            diff_lng = current_lng - lng
-            distance = math.hypot(diff_lat, diff_lng)
-            if distance < epsilon:
-                coincident += 1
-                num_lat += lat
-                num_lng += lng
-                denom += 1.0
-            else:
-                weight = 1.0 / distance
-                num_lat += lat * weight
-                num_lng += lng * weight
-                denom += weight
-
-        if denom == 0:
-            break
-
-        next_lat = num_lat / denom
-        next_lng = num_lng / denom
-        if math.hypot(next_lat - current_lat, next_lng - current_lng) < tolerance:
-            current_lat, current_lng = next_lat, next_lng
-            break
-        current_lat, current_lng = next_lat, next_lng
-
-    return {"lat": current_lat, "lng": current_lng}
+def _geometric_median(
+    points: Sequence[Tuple[float, float]],
+    weights: Optional[Sequence[float]] = None,
+) -> Dict[str, float]:
+    # Imported on first use so NumPy stays out of the app start-up path.
+    from .geomedian import geometric_median  # pylint: disable=import-outside-toplevel
+
+    lat, lng = geometric_median(points, weights)
+    return {"lat": lat, "lng": lng}
+
+
+def _offline_meetpoint(
+    request: Dict[str, object],
+    coordinates: Sequence[Tuple[float, float]],
+    weights: Sequence[float],
+) -> Tuple[Dict[str, float], Dict[str, object], str]:
+    """Run the meetpoint search on the speed-model client, or fall back to the geometric median.
+
+    Pure CPU, so callers send it to the compute pool.
+    """
+
+    meetpoint_module = load_meetpoint_module()
+    if hasattr(meetpoint_module, "offline_client"):
+        try:
+            coords, module_meta = meetpoint_module.compute_best_meetpoint(
+                **request, client_instance=meetpoint_module.offline_client(), prune=False
+            )
+            return {"lat": float(coords["lat"]), "lng": float(coords["lng"])}, module_meta, "speed_model"
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Offline meetpoint estimate failed, using geometric median: %s", exc)
+    return _geometric_median(coordinates, weights), {}, "geometric_median"
+
+
+def _run_offline(
+    request: Dict[str, object],
+    coordinates: Sequence[Tuple[float, float]],
+    weights: Sequence[float],
+) -> Tuple[Dict[str, float], Dict[str, object], str]:
+    from . import compute_pool  # pylint: disable=import-outside-toplevel
+
+    try:
+        return compute_pool.run(_offline_meetpoint, request, list(coordinates), list(weights))
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("Offline meetpoint estimate unavailable, using geometric median: %s", exc)
+        return _geometric_median(coordinates, weights), {}, "geometric_median"
 
 
 def calculate_meetpoint(
@@ -118,8 +254,12 @@ def calculate_meetpoint(
 ) -> MeetpointResult:
     """Compute the optimal meet point for participants using the Find_meetpoint script.
 
-    Falls back to the geometric median if the heavy dependencies are unavailable or the
-    external service returns an error.
+    If routing is unavailable or fails, the same search runs offline on the
+    find_point speed model; the geometric median is the last resort when the
+    script itself cannot be imported.
+
+    Successful searches are cached per group signature (see
+    ``_group_signature``); hits are returned with ``meta["cache_hit"]``.
     """
 
     if not participants:
@@ -127,11 +267,13 @@ def calculate_meetpoint(
 
     coordinates: List[Tuple[float, float]] = []
     profiles: List[str] = []
+    weights: List[float] = []
 
     for entry in participants:
         lat, lng = _normalize_coordinates(entry)
         coordinates.append((lat, lng))
         profiles.append(_map_transport_to_profile(entry.get("transport")))
+        weights.append(1.0 / _PROFILE_SPEEDS.get(profiles[-1], _PROFILE_SPEEDS[DEFAULT_PROFILE]))
 
     dest_payload: Optional[Dict[str, float]] = None
     dest_profile: Optional[str] = None
@@ -144,36 +286,109 @@ def calculate_meetpoint(
     if normalized_type not in {"minisum", "minimax"}:
         raise ValueError("type_of_meetpoint must be 'minisum' or 'minimax'")
 
+    signature = _group_signature(coordinates, profiles, dest_payload, dest_profile, normalized_type)
+    cached = _meetpoint_results.get(signature) if signature is not None else MISSING
+    if cached is not MISSING and cached is not None:
+        return MeetpointResult(point=dict(cached.point), meta={**cached.meta, "cache_hit": True})
+
+    def compute() -> MeetpointResult:
+        result = _compute_meetpoint(coordinates, profiles, weights, dest_payload, dest_profile, normalized_type)
+        # Fallback answers are not kept, so the real search runs again once routing recovers.
+        if signature is not None and not result.meta.get("fallback_used"):
+            _meetpoint_results.set(signature, result)
+        return result
+
+    # Friends opening the UI together send the same request; compute it once and share the result.
+    key = _request_key(coordinates, profiles, dest_payload, dest_profile, normalized_type)
+    result, shared = _meetpoint_flights.do(key, compute)
+    if shared:
+        return MeetpointResult(point=dict(result.point), meta={**result.meta, "coalesced": True})
+    return result
+
+
+def _quantize(lat: float, lng: float) -> Tuple[int, int]:
+    step = MEETPOINT_RESULT_TOLERANCE_M / _METRES_PER_DEGREE
+    row = round(lat / step)
+    # Longitude cells shrink with latitude; use the row's latitude so every point in it agrees.
+    lng_step = step / max(math.cos(math.radians(row * step)), 1e-6)
+    return row, round(lng / lng_step)
+
+
+def _group_signature(
+    coordinates: Sequence[Tuple[float, float]],
+    profiles: Sequence[str],
+    destination: Optional[Dict[str, float]],
+    destination_profile: Optional[str],
+    type_of_meetpoint: str,
+) -> Optional[Tuple[object, ...]]:
+    """Order-independent cache key: members quantized to the tolerance grid, sorted with their profiles.
+
+    ``None`` (no caching) when ``MEETPOINT_RESULT_TOLERANCE_M`` is not positive.
+    """
+
+    if MEETPOINT_RESULT_TOLERANCE_M <= 0:
+        return None
+    members = tuple(sorted((*_quantize(lat, lng), profile) for (lat, lng), profile in zip(coordinates, profiles)))
+    target = None if destination is None else (*_quantize(destination["lat"], destination["lng"]), destination_profile)
+    return members, target, type_of_meetpoint
+
+
+def _request_key(
+    coordinates: Sequence[Tuple[float, float]],
+    profiles: Sequence[str],
+    destination: Optional[Dict[str, float]],
+    destination_profile: Optional[str],
+    type_of_meetpoint: str,
+) -> str:
+    """Canonical hash of a normalised meetpoint request (coordinates rounded to ~0.1 m)."""
+
+    canonical = {
+        "people": [[round(lat, 6), round(lng, 6), profile] for (lat, lng), profile in zip(coordinates, profiles)],
+        "destination": None if destination is None else [round(destination["lat"], 6), round(destination["lng"], 6)],
+        "destination_profile": destination_profile,
+        "type": type_of_meetpoint,
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _compute_meetpoint(
+    coordinates: Sequence[Tuple[float, float]],
+    profiles: List[str],
+    weights: Sequence[float],
+    dest_payload: Optional[Dict[str, float]],
+    dest_profile: Optional[str],
+    normalized_type: str,
+) -> MeetpointResult:
     fallback_used = False
     fallback_reason: Optional[str] = None
     module_meta: Dict[str, object] = {}
 
+    meetpoint_module = load_meetpoint_module()
     if meetpoint_module and hasattr(meetpoint_module, "compute_best_meetpoint"):
+        request = {
+            "people_coordinates": [{"lat": lat, "lng": lng} for lat, lng in coordinates],
+            "people_profiles": profiles,
+            "destination": dest_payload,
+            "destination_profile": dest_profile,
+            "type_of_meetpoint": normalized_type,
+        }
         try:
-            coords, module_meta = meetpoint_module.compute_best_meetpoint(
-                people_coordinates=[{"lat": lat, "lng": lng} for lat, lng in coordinates],
-                people_profiles=profiles,
-                destination=dest_payload,
-                destination_profile=dest_profile,
-                type_of_meetpoint=normalized_type,
-            )
+            coords, module_meta = meetpoint_module.compute_best_meetpoint(**request)
             point = {"lat": float(coords["lat"]), "lng": float(coords["lng"])}
             source = "find_meetpoint"
         except getattr(meetpoint_module, "MeetpointDependencyError", RuntimeError) as exc:
             fallback_used = True
             fallback_reason = str(exc)
-            point = _geometric_median(coordinates)
-            source = "geometric_median"
+            point, module_meta, source = _run_offline(request, coordinates, weights)
         except Exception as exc:  # pylint: disable=broad-except
             fallback_used = True
             fallback_reason = str(exc)
-            logger.exception("Meetpoint calculation failed, falling back to geometric median", exc_info=exc)
-            point = _geometric_median(coordinates)
-            source = "geometric_median"
+            logger.exception("Meetpoint calculation failed, falling back to the offline estimate", exc_info=exc)
+            point, module_meta, source = _run_offline(request, coordinates, weights)
     else:
         fallback_used = True
         fallback_reason = MEETPOINT_IMPORT_ERROR or "find_meetpoint module unavailable"
-        point = _geometric_median(coordinates)
+        point = _geometric_median(coordinates, weights)
         source = "geometric_median"
 
     meta: Dict[str, object] = {
@@ -82,6 +82,8 @@ class TaskStatus(BaseModel):
     script_id: Optional[str] = None
     error: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
+    # Wall-clock seconds per pipeline stage (geocode, optimize, routes).
+    timings: Dict[str, float] = Field(default_factory=dict)
 
 
 # TODO: Extend models with richer validations (e.g., bounding boxes, vehicle constraints).
@@ -0,0 +1,235 @@
+"""Encoded-polyline output for route FeatureCollections."""
+from __future__ import annotations
+
+import math
+import os
+from typing import Dict, List, Optional, Sequence
+
+from .cache import MISSING, TTLCache, json_size
+
+try:  # Optional: vectorised Douglas–Peucker scan.
+    import numpy as np
+except ImportError:  # pragma: no cover - environment without numpy.
+    np = None  # type: ignore
+
+# Web Mercator ground resolution at zoom 0 on the equator, metres per pixel (256 px tiles).
+_METRES_PER_PIXEL_Z0 = 156543.03392
+_METRES_PER_DEGREE = 111_320.0
+# Below this many vertices a plain loop beats NumPy's per-call overhead.
+_NUMPY_MIN_SPAN = 64
+
+# Cached routes share their coordinate lists between hits, so encodings are memoised
+# per list object; the entry holds a reference, which keeps the id from being reused.
+# That reference can outlive the route cache entry, so both count towards the byte limit.
+POLYLINE_CACHE_MAX_BYTES = int(os.getenv("POLYLINE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+_encoded_geometries = TTLCache(
+    maxsize=512,
+    ttl=3600.0,
+    max_bytes=POLYLINE_CACHE_MAX_BYTES,
+    sizeof=lambda entry: json_size(entry[0]) + len(entry[1]["polyline"]),
+)
+
+
+def _encode_delta(delta: int) -> str:
+    value = ~(delta << 1) if delta < 0 else delta << 1
+    chars = []
+    while value >= 0x20:
+        chars.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def encode(coordinates: Sequence[Sequence[float]], precision: int = 5) -> str:
+    """Encode ``[lon, lat]`` pairs with the Google polyline algorithm (lat first)."""
+
+    factor = 10 ** precision
+    chunks: List[str] = []
+    # Consecutive route vertices repeat the same small deltas, so memoise their encoding.
+    memo: Dict[int, str] = {}
+    prev_lat = prev_lng = 0
+    for lon, lat in coordinates:
+        lat_i = round(lat * factor)
+        lng_i = round(lon * factor)
+        for delta in (lat_i - prev_lat, lng_i - prev_lng):
+            chunk = memo.get(delta)
+            if chunk is None:
+                chunk = memo[delta] = _encode_delta(delta)
+            chunks.append(chunk)
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(chunks)
+
+
+def decode(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Inverse of :func:`encode`, returns ``[lon, lat]`` pairs."""
+
+    factor = 10 ** precision
+    coordinates: List[List[float]] = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append([lng / factor, lat / factor])
+    return coordinates
+
+
+def tolerance_for_zoom(zoom: float, latitude: float = 55.75, pixels: float = 0.5) -> float:
+    """Simplification tolerance in degrees that stays below ``pixels`` on screen at ``zoom``."""
+
+    metres = _METRES_PER_PIXEL_Z0 * math.cos(math.radians(latitude)) / (2 ** zoom) * pixels
+    return metres / _METRES_PER_DEGREE
+
+
+def simplify(coordinates: Sequence[Sequence[float]], tolerance: float) -> List[Sequence[float]]:
+    """Radial-distance plus Douglas–Peucker simplification, keeps both end points."""
+
+    if len(coordinates) < 3 or tolerance <= 0:
+        return list(coordinates)
+
+    # Longitude degrees shrink with latitude; scale them so the tolerance is isotropic.
+    scale = math.cos(math.radians(coordinates[0][1]))
+    tolerance_sq = tolerance * tolerance
+
+    # Radial pre-pass: drop vertices closer than the tolerance to the last kept one,
+    # which shrinks dense 2GIS geometries cheaply before the quadratic-worst-case pass.
+    reduced = [coordinates[0]]
+    last_x, last_y = coordinates[0][0] * scale, coordinates[0][1]
+    for point in coordinates[1:-1]:
+        px, py = point[0] * scale, point[1]
+        if (px - last_x) ** 2 + (py - last_y) ** 2 > tolerance_sq:
+            reduced.append(point)
+            last_x, last_y = px, py
+    reduced.append(coordinates[-1])
+
+    xs = [point[0] * scale for point in reduced]
+    ys = [point[1] for point in reduced]
+    arrays = (np.asarray(xs), np.asarray(ys)) if np is not None else None
+    keep = [False] * len(reduced)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(reduced) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if arrays is not None and last - first > _NUMPY_MIN_SPAN:
+            index, dist_sq = _farthest_numpy(arrays[0], arrays[1], first, last)
+        else:
+            index, dist_sq = _farthest(xs, ys, first, last)
+        if dist_sq > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, flag in zip(reduced, keep) if flag]
+
+
+def _farthest(xs: List[float], ys: List[float], first: int, last: int):
+    ax, ay = xs[first], ys[first]
+    dx, dy = xs[last] - ax, ys[last] - ay
+    seg_sq = dx * dx + dy * dy
+    worst, worst_index = -1.0, first
+    for index in range(first + 1, last):
+        px, py = xs[index] - ax, ys[index] - ay
+        if seg_sq == 0:
+            dist_sq = px * px + py * py
+        else:
+            t = max(0.0, min(1.0, (px * dx + py * dy) / seg_sq))
+            ex, ey = px - t * dx, py - t * dy
+            dist_sq = ex * ex + ey * ey
+        if dist_sq > worst:
+            worst, worst_index = dist_sq, index
+    return worst_index, worst
+
+
+def _farthest_numpy(xs, ys, first: int, last: int):
+    ax, ay = xs[first], ys[first]
+    dx, dy = xs[last] - ax, ys[last] - ay
+    px = xs[first + 1 : last] - ax
+    py = ys[first + 1 : last] - ay
+    seg_sq = dx * dx + dy * dy
+    if seg_sq == 0:
+        dist_sq = px * px + py * py
+    else:
+        t = np.clip((px * dx + py * dy) / seg_sq, 0.0, 1.0)
+        dist_sq = (px - t * dx) ** 2 + (py - t * dy) ** 2
+    worst = int(np.argmax(dist_sq))
+    return first + 1 + worst, float(dist_sq[worst])
+
+
+def _compact_geometry(geometry: Dict[str, object], precision: int, zoom: Optional[float]) -> Dict[str, object]:
+    if not isinstance(geometry, dict) or geometry.get("type") not in {"LineString", "MultiPoint"}:
+        return geometry
+    coordinates = geometry.get("coordinates") or []
+    memo_key = (id(coordinates), precision, zoom)
+    cached = _encoded_geometries.get(memo_key)
+    if cached is not MISSING and cached is not None and cached[0] is coordinates:
+        return dict(cached[1])
+
+    source = coordinates
+    if zoom is not None and geometry["type"] == "LineString" and coordinates:
+        coordinates = simplify(coordinates, tolerance_for_zoom(zoom, coordinates[0][1]))
+    compact = {
+        "type": geometry["type"],
+        "encoding": "polyline",
+        "precision": precision,
+        "polyline": encode(coordinates, precision),
+    }
+    _encoded_geometries.set(memo_key, (source, compact))
+    return dict(compact)
+
+
+def _compact_graph(graph: Dict[str, object], precision: int) -> Dict[str, object]:
+    nodes = graph.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        return graph
+    compact_nodes = [{key: value for key, value in node.items() if key not in {"lat", "lng"}} for node in nodes]
+    return {
+        **graph,
+        "nodes": compact_nodes,
+        "nodes_encoding": "polyline",
+        "nodes_precision": precision,
+        "nodes_polyline": encode([[node["lng"], node["lat"]] for node in nodes], precision),
+    }
+
+
+def compact_collection(
+    collection: Dict[str, object],
+    *,
+    precision: int = 5,
+    zoom: Optional[float] = None,
+) -> Dict[str, object]:
+    """Return a copy of a route FeatureCollection with encoded-polyline geometries.
+
+    ``zoom`` enables Douglas–Peucker simplification below half a pixel at that
+    map zoom. The input collection is not modified (it may be a cache entry).
+    """
+
+    precision = max(1, min(int(precision), 7))
+    zoom = None if zoom is None else float(zoom)
+
+    compact = dict(collection)
+    features = collection.get("features")
+    if isinstance(features, list):
+        compact["features"] = [
+            {**feature, "geometry": _compact_geometry(feature.get("geometry"), precision, zoom)}
+            if isinstance(feature, dict)
+            else feature
+            for feature in features
+        ]
+    properties = collection.get("properties")
+    if isinstance(properties, dict) and isinstance(properties.get("graph"), dict):
+        compact["properties"] = {**properties, "graph": _compact_graph(properties["graph"], precision)}
+    compact["encoding"] = "polyline"
+    return compact
@@ -0,0 +1,280 @@
+"""Token-bucket and rolling-window rate limiting shared between threads and gunicorn workers."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+try:  # Optional dependency for the Redis backend.
+    import redis
+except ImportError:  # pragma: no cover - environment without redis.
+    redis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    """``capacity`` tokens refilled continuously at ``capacity / period`` per second.
+
+    A full bucket plus its refill lets through up to twice ``capacity`` in
+    one ``period``. ``sliding=True`` enforces at most ``capacity`` takes in
+    any ``period`` seconds instead, keeping one timestamp per take, so use it
+    for small quotas such as the daily API allowance.
+    """
+
+    name: str
+    capacity: float
+    period: float
+    sliding: bool = False
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+# Result of an acquisition attempt: (seconds to wait, name of the empty bucket).
+Acquire = Tuple[float, Optional[str]]
+
+
+def _refill(spec: BucketSpec, tokens: float, updated: float, now: float) -> float:
+    return min(spec.capacity, tokens + max(0.0, now - updated) * spec.rate)
+
+
+def _take(
+    specs: Sequence[BucketSpec],
+    state: Dict[str, Tuple[float, float]],
+    hits: Dict[str, List[float]],
+    now: float,
+) -> Tuple[Acquire, Dict[str, float]]:
+    """Take one token from every bucket or none; shared by the local backends.
+
+    ``hits`` holds the sorted take times of sliding specs within their period;
+    on success the caller records ``now`` for each of them.
+    """
+
+    levels = {
+        spec.name: _refill(spec, *state.get(spec.name, (spec.capacity, now)), now) for spec in specs if not spec.sliding
+    }
+    wait, blocking = 0.0, None
+    for spec in specs:
+        if spec.sliding:
+            times = hits.get(spec.name, [])
+            excess = len(times) - int(spec.capacity)
+            # The oldest ``excess + 1`` takes must leave the window first.
+            needed = times[excess] + spec.period - now if excess >= 0 else 0.0
+        else:
+            needed = (1.0 - levels[spec.name]) / spec.rate if levels[spec.name] < 1.0 else 0.0
+        if needed > wait:
+            wait, blocking = needed, spec.name
+    if blocking is None:
+        levels = {name: level - 1.0 for name, level in levels.items()}
+    return (wait, blocking), levels
+
+
+class MemoryBackend:
+    """Per-process buckets guarded by a lock."""
+
+    def __init__(self) -> None:
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self._hits: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, specs: Sequence[BucketSpec], now: float) -> Acquire:
+        with self._lock:
+            for spec in specs:
+                if spec.sliding:
+                    times = self._hits.setdefault(spec.name, deque())
+                    while times and times[0] <= now - spec.period:
+                        times.popleft()
+            result, levels = _take(specs, self._state, {name: list(times) for name, times in self._hits.items()}, now)
+            for name, level in levels.items():
+                self._state[name] = (level, now)
+            if result[1] is None:
+                for spec in specs:
+                    if spec.sliding:
+                        self._hits[spec.name].append(now)
+            return result
+
+
+class SQLiteBackend:
+    """Buckets stored in a SQLite file so all workers on a host share one quota."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS hits (name TEXT NOT NULL, at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS hits_name_at ON hits (name, at)")
+            self._conn = conn
+        return self._conn
+
+    def try_acquire(self, specs: Sequence[BucketSpec], now: float) -> Acquire:
+        names = [spec.name for spec in specs]
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                marks = ",".join("?" * len(names))
+                rows = conn.execute(
+                    f"SELECT name, tokens, updated FROM buckets WHERE name IN ({marks})", names
+                ).fetchall()
+                hits: Dict[str, List[float]] = {}
+                for spec in specs:
+                    if spec.sliding:
+                        conn.execute("DELETE FROM hits WHERE name = ? AND at <= ?", (spec.name, now - spec.period))
+                        hits[spec.name] = [
+                            at for (at,) in conn.execute("SELECT at FROM hits WHERE name = ? ORDER BY at", (spec.name,))
+                        ]
+                result, levels = _take(specs, {name: (tokens, updated) for name, tokens, updated in rows}, hits, now)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    [(name, level, now) for name, level in levels.items()],
+                )
+                if result[1] is None:
+                    conn.executemany("INSERT INTO hits VALUES (?, ?)", [(name, now) for name in hits])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+# ARGV: now, a unique member for sliding-window sets, then (capacity, rate, sliding) per key.
+_REDIS_TAKE = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait, blocking = 0, ''
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[3 * i])
+  local rate = tonumber(ARGV[3 * i + 1])
+  local needed = 0
+  if ARGV[3 * i + 2] == '1' then
+    local period = capacity / rate
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - period)
+    local excess = redis.call('ZCARD', key) - math.floor(capacity)
+    if excess >= 0 then
+      local oldest = redis.call('ZRANGE', key, excess, excess, 'WITHSCORES')
+      needed = tonumber(oldest[2]) + period - now
+    end
+  else
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < 1 then needed = (1 - tokens) / rate end
+  end
+  if needed > wait then
+    wait, blocking = needed, key
+  end
+end
+for i, key in ipairs(KEYS) do
+  local ttl = math.ceil(tonumber(ARGV[3 * i]) / tonumber(ARGV[3 * i + 1])) + 60
+  if ARGV[3 * i + 2] == '1' then
+    if blocking == '' then redis.call('ZADD', key, now, ARGV[2]) end
+  else
+    local level = levels[i]
+    if blocking == '' then level = level - 1 end
+    redis.call('HSET', key, 'tokens', tostring(level), 'updated', tostring(now))
+  end
+  redis.call('EXPIRE', key, ttl)
+end
+return {tostring(wait), blocking}
+"""
+
+
+class RedisBackend:
+    """Buckets in Redis (or any server speaking its protocol and Lua)."""
+
+    def __init__(self, url: str, *, prefix: str = "ratelimit:") -> None:
+        if redis is None:
+            raise RuntimeError("redis package is required for the redis rate-limit backend")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TAKE)
+
+    def _key(self, spec: BucketSpec) -> str:
+        # Sliding windows are sorted sets, kept apart from the token-bucket hashes.
+        return self.prefix + spec.name + (":hits" if spec.sliding else "")
+
+    def try_acquire(self, specs: Sequence[BucketSpec], now: float) -> Acquire:
+        args: list = [now, uuid.uuid4().hex]
+        for spec in specs:
+            args.extend([spec.capacity, spec.rate, 1 if spec.sliding else 0])
+        keys = [self._key(spec) for spec in specs]
+        wait, blocking = self._script(keys=keys, args=args)
+        blocking = blocking.decode() if isinstance(blocking, bytes) else blocking
+        if not blocking:
+            return 0.0, None
+        return float(wait), specs[keys.index(blocking)].name
+
+
+class RateLimiter:
+    """Takes a token from every bucket atomically, optionally waiting for one.
+
+    Backend errors are logged and the limiter falls back to an in-process
+    bucket so a broken store never blocks routing entirely.
+    """
+
+    def __init__(self, specs: Sequence[BucketSpec], backend=None) -> None:
+        self.specs = [spec for spec in specs if spec.capacity > 0]
+        self.backend = backend or MemoryBackend()
+        self._fallback = MemoryBackend()
+
+    def try_acquire(self) -> Acquire:
+        if not self.specs:
+            return 0.0, None
+        now = time.time()
+        try:
+            return self.backend.try_acquire(self.specs, now)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Rate limit backend failed, using in-process buckets: %s", exc)
+            return self._fallback.try_acquire(self.specs, now)
+
+    def acquire(self, max_wait: float = 0.0) -> Acquire:
+        """Return ``(0, None)`` once a token is taken, else the wait that exceeded ``max_wait``."""
+
+        deadline = time.monotonic() + max(0.0, max_wait)
+        while True:
+            wait, blocking = self.try_acquire()
+            if blocking is None:
+                return 0.0, None
+            if time.monotonic() + wait > deadline:
+                return wait, blocking
+            time.sleep(wait)
+
+
+def build_backend(kind: str, *, path: Optional[Path] = None, url: Optional[str] = None):
+    """Backend factory for ``memory``, ``sqlite`` or ``redis``."""
+
+    kind = (kind or "memory").lower()
+    if kind == "sqlite":
+        if path is None:
+            raise ValueError("sqlite rate-limit backend requires a path")
+        return SQLiteBackend(path)
+    if kind == "redis":
+        if not url:
+            raise ValueError("redis rate-limit backend requires a URL")
+        return RedisBackend(url)
+    if kind != "memory":
+        logger.warning("Unknown rate-limit backend %r, using in-process buckets", kind)
+    return MemoryBackend()
@@ -0,0 +1,205 @@
+"""Bounded store for optimisation results with optional gzip spill to disk."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from .cache import MISSING, TTLCache, json_size
+
+logger = logging.getLogger(__name__)
+
+# Spilled files are swept at most this often (seconds).
+_SWEEP_INTERVAL = 60.0
+
+
+def _is_complete(collection: Dict[str, object]) -> bool:
+    properties = collection.get("properties")
+    return not (isinstance(properties, dict) and properties.get("complete") is False)
+
+
+class ResultStore:
+    """Size-aware LRU of FeatureCollections with TTL and optional disk spill.
+
+    Entries live in memory up to ``max_entries`` / ``max_bytes`` (JSON size)
+    for ``ttl`` seconds. With ``spill_dir`` set, finished collections pushed
+    out by those limits are written there as gzip JSON and loaded back on
+    ``get``; spilled files are removed once older than ``ttl``. Collections
+    still being built (``properties.complete is False``) are never spilled.
+
+    Eviction happens inside ``set`` on the request or task thread, so the
+    gzip write runs on a background thread; until it lands, ``get`` serves
+    the collection from the pending writes. ``set`` removes the key's
+    spilled file and cancels its pending write, so a stale copy is never
+    reloaded.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 500,
+        max_bytes: Optional[int] = None,
+        ttl: float = 86400.0,
+        spill_dir: Optional[Path] = None,
+    ) -> None:
+        self.ttl = float(ttl)
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._memory = TTLCache(max_entries, ttl, max_bytes=max_bytes, sizeof=json_size, on_evict=self._spill)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._counters = {"spilled": 0, "reloaded": 0, "spill_errors": 0, "swept": 0}
+        # Evicted collections whose spill file is not written yet, by key.
+        self._pending: Dict[str, Dict[str, object]] = {}
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    def _path(self, key: str) -> Path:
+        assert self.spill_dir is not None
+        return self.spill_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json.gz"
+
+    def set(self, key: str, collection: Dict[str, object]) -> None:
+        self._forget_spill(key)
+        self._memory.set(key, collection)
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        collection = self._memory.get(key)
+        if collection is not MISSING:
+            return collection  # type: ignore[return-value]
+        if self.spill_dir is None:
+            return None
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is not None:
+            # Back in memory before its file was written; the writer sees it is no longer pending.
+            self._count("reloaded")
+            self._memory.set(key, pending)
+            return pending
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                collection = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Dropping unreadable spilled result %s: %s", path.name, exc)
+            path.unlink(missing_ok=True)
+            return None
+        self._count("reloaded")
+        self._memory.set(key, collection)
+        return collection  # type: ignore[return-value]
+
+    def _forget_spill(self, key: str) -> None:
+        """Drop the spilled copy of ``key`` (written or pending): a newer value replaces it."""
+
+        if self.spill_dir is None:
+            return
+        with self._lock:
+            self._pending.pop(key, None)
+            # Under the lock so a write finishing right now cannot put the file back.
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning("Could not remove stale spilled result %s: %s", key, exc)
+
+    def _spill(self, key: object, collection: object) -> None:
+        if self.spill_dir is None:
+            return
+        key = str(key)
+        if not isinstance(collection, dict) or not _is_complete(collection):
+            # Not spilled, so an older spilled value of the key must not come back either.
+            self._forget_spill(key)
+            return
+        with self._lock:
+            self._pending[key] = collection
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-spill")
+            writer = self._writer
+        writer.submit(self._write_spill, key, collection)
+
+    def _write_spill(self, key: str, collection: Dict[str, object]) -> None:
+        tmp_name = None
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=5) as handle:
+                handle.write(json.dumps(collection, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            with self._lock:
+                # Superseded by set() or reloaded by get() meanwhile: the file would be stale.
+                current = self._pending.get(key) is collection
+                if current:
+                    os.replace(tmp_name, self._path(key))
+                    del self._pending[key]
+            if not current:
+                os.unlink(tmp_name)
+                return
+        except OSError as exc:
+            logger.warning("Could not spill result %s to disk: %s", key, exc)
+            with self._lock:
+                if self._pending.get(key) is collection:
+                    del self._pending[key]
+            if tmp_name is not None:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+            self._count("spill_errors")
+            return
+        self._count("spilled")
+        self._sweep()
+
+    def flush(self) -> None:
+        """Wait for pending spill writes (tests and shutdown)."""
+
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+    def _sweep(self) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < _SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        removed = 0
+        for path in self.spill_dir.glob("*.gz") if self.spill_dir else ():
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            with self._lock:
+                self._counters["swept"] += removed
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._counters[field] += 1
+
+    def stats(self) -> Dict[str, object]:
+        stats: Dict[str, object] = dict(self._memory.stats())
+        with self._lock:
+            stats.update(self._counters)
+            stats["spill_pending"] = len(self._pending)
+        if self.spill_dir is not None:
+            files = spill_bytes = 0
+            for path in self.spill_dir.glob("*.gz"):
+                try:
+                    spill_bytes += path.stat().st_size
+                except OSError:
+                    continue
+                files += 1
+            stats["spill_files"] = files
+            stats["spill_bytes"] = spill_bytes
+        return stats
@@ -0,0 +1,211 @@
+"""Pruning JSON reader for large 2GIS routing responses."""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional
+
+import requests
+
+try:  # Optional: incremental parsing straight from the socket.
+    import ijson
+except ImportError:  # pragma: no cover - environment without ijson.
+    ijson = None  # type: ignore
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-Unix platforms.
+    resource = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Every key read by the route extractors in gis_client; anything else is dropped while parsing.
+ROUTE_KEYS: FrozenSet[str] = frozenset(
+    {
+        "result", "routes", "items", "legs", "steps", "segments", "instructions", "maneuvers",
+        "summary", "info", "type", "id", "status", "message", "error",
+        "distance", "distance_meters", "length", "meters", "total_distance",
+        "duration", "time", "seconds", "duration_seconds", "total_duration",
+        "altitude_gain", "altitude_up", "altitude_loss", "altitude_down",
+        "begin_pedestrian_path", "end_pedestrian_path", "outcoming_path", "outcoming_path_comment",
+        "geometry", "geometries", "lines", "selection",
+        "comment", "instruction", "point", "position", "lat", "lon", "lng",
+        "movements", "alternatives", "waypoint", "name", "subtype", "names", "moving_duration",
+        "transfer_count", "crossing_count", "total_walkway_distance",
+    }
+)
+# Subtrees copied verbatim into the route summary or details, so kept as-is.
+KEEP_WHOLE: FrozenSet[str] = frozenset({"query", "transport", "ui_total_distance", "ui_total_duration"})
+
+_CONTAINER_START = {"start_map", "start_array"}
+_CONTAINER_END = {"end_map", "end_array"}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {"responses": 0, "bytes": 0, "max_bytes": 0, "dropped_values": 0, "seconds": 0.0}
+
+
+class _CountingReader:
+    """File-like view of ``response.raw`` that counts bytes and maps transport errors."""
+
+    def __init__(self, raw) -> None:
+        self._raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        try:
+            chunk = self._raw.read(size)
+        except Exception as exc:  # urllib3 errors are not RequestException subclasses.
+            raise requests.ConnectionError(str(exc)) from exc
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _build_pruned(events, keep: FrozenSet[str], keep_whole: FrozenSet[str]):
+    """Assemble a document from ijson events, skipping subtrees under unknown keys."""
+
+    root: object = None
+    containers: List[object] = []
+    whole: List[bool] = []
+    keys: List[Optional[str]] = []
+    skip_depth = 0
+    drop_next = False
+    pending_whole = False
+    dropped = 0
+
+    def attach(value: object) -> None:
+        nonlocal root
+        if not containers:
+            root = value
+        elif isinstance(containers[-1], dict):
+            containers[-1][keys[-1]] = value  # type: ignore[index]
+        else:
+            containers[-1].append(value)  # type: ignore[union-attr]
+
+    for event, value in events:
+        if skip_depth:
+            if event in _CONTAINER_START:
+                skip_depth += 1
+            elif event in _CONTAINER_END:
+                skip_depth -= 1
+            continue
+        if event == "map_key":
+            inside_whole = bool(whole) and whole[-1]
+            keys[-1] = value
+            drop_next = not inside_whole and value not in keep and value not in keep_whole
+            pending_whole = not inside_whole and value in keep_whole
+            continue
+        if drop_next:
+            drop_next = False
+            dropped += 1
+            if event in _CONTAINER_START:
+                skip_depth = 1
+            continue
+        if event in _CONTAINER_START:
+            container: object = {} if event == "start_map" else []
+            attach(container)
+            whole.append(pending_whole or (bool(whole) and whole[-1]))
+            pending_whole = False
+            containers.append(container)
+            keys.append(None)
+        elif event in _CONTAINER_END:
+            containers.pop()
+            whole.pop()
+            keys.pop()
+        else:
+            pending_whole = False
+            attach(value)
+    return root, dropped
+
+
+def _prune(value: object, keep: FrozenSet[str], keep_whole: FrozenSet[str]):
+    """Same pruning applied to an already decoded document."""
+
+    dropped = 0
+
+    def walk(node: object) -> object:
+        nonlocal dropped
+        if isinstance(node, dict):
+            pruned = {}
+            for key, item in node.items():
+                if key in keep_whole:
+                    pruned[key] = item
+                elif key in keep:
+                    pruned[key] = walk(item)
+                else:
+                    dropped += 1
+            return pruned
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        return node
+
+    return walk(value), dropped
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def read_route_json(
+    response: requests.Response,
+    *,
+    keep: FrozenSet[str] = ROUTE_KEYS,
+    keep_whole: FrozenSet[str] = KEEP_WHOLE,
+) -> object:
+    """Decode a routing response, keeping only ``keep`` keys at every level.
+
+    With ijson installed and ``response`` opened with ``stream=True`` the body
+    is parsed incrementally from the socket, so the full document is never
+    held in memory. Otherwise the body is decoded with ``json`` and pruned
+    afterwards. Malformed JSON raises ``ValueError`` like ``response.json()``.
+    """
+
+    started = time.perf_counter()
+    rss_before = _peak_rss_kb()
+    try:
+        if ijson is not None and not response._content_consumed:  # pylint: disable=protected-access
+            response.raw.decode_content = True
+            reader = _CountingReader(response.raw)
+            try:
+                data, dropped = _build_pruned(ijson.basic_parse(reader, use_float=True), keep, keep_whole)
+            except ijson.JSONError as exc:
+                raise ValueError(f"invalid routing JSON: {exc}") from exc
+            size = reader.bytes_read
+        else:
+            body = response.content
+            size = len(body)
+            data, dropped = _prune(json.loads(body) if body else None, keep, keep_whole)
+    finally:
+        response.close()
+
+    elapsed = time.perf_counter() - started
+    rss_after = _peak_rss_kb()
+    with _stats_lock:
+        _stats["responses"] += 1
+        _stats["bytes"] += size
+        _stats["max_bytes"] = max(_stats["max_bytes"], size)
+        _stats["dropped_values"] += dropped
+        _stats["seconds"] += elapsed
+    logger.debug(
+        "Routing response: %d bytes, %d values dropped, %.1f ms, peak RSS %s -> %s KiB",
+        size,
+        dropped,
+        elapsed * 1000,
+        rss_before,
+        rss_after,
+    )
+    return data
+
+
+def parse_stats() -> Dict[str, object]:
+    """Totals for /api/health: bytes read, values dropped and the worker's peak RSS."""
+
+    with _stats_lock:
+        stats: Dict[str, object] = dict(_stats)
+    stats["seconds"] = round(float(stats["seconds"]), 4)
+    stats["backend"] = "ijson" if ijson is not None else "json"
+    stats["peak_rss_kb"] = _peak_rss_kb()
+    return stats
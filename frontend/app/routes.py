@@ -11,8 +11,21 @@ import json
 from flask import Blueprint, jsonify, request, current_app
 from pydantic import ValidationError
 
-from .gis_client import reverse_geocode, route_public_transport, route_transport, search_places
-from .meetpoint_service import calculate_meetpoint
+from .compute_pool import pool_stats
+from .gis_client import (
+    geocode_cache,
+    http_client,
+    reverse_geocode,
+    reverse_geocode_cache,
+    route_cache,
+    route_public_transport,
+    route_transport,
+    search_places,
+    wkt_parse_cache,
+)
+from .meetpoint_service import calculate_meetpoint, meetpoint_status
+from .polyline import compact_collection
+from .route_json import parse_stats
 from .models import OptimizeRequest, Script
 from .worker import script_store, task_manager
 
@@ -181,6 +194,27 @@ def route(script_id: str):
     return jsonify(geojson)
 
 
+@api_bp.get("/health")
+def health():
+    # Never blocks on the GIS stack: reports whether find_point is loaded yet.
+    return jsonify(
+        {
+            "status": "ok",
+            "meetpoint": meetpoint_status(),
+            "http": http_client.stats(),
+            "routing_json": parse_stats(),
+            "tasks": task_manager.stats(),
+            "compute_pool": pool_stats(),
+            "caches": {
+                "geocode": geocode_cache.stats(),
+                "reverse_geocode": reverse_geocode_cache.stats(),
+                "route": route_cache.stats(),
+                "wkt_parse": wkt_parse_cache.stats(),
+            },
+        }
+    )
+
+
 @api_bp.get("/sample_input")
 def sample_input():
     return jsonify(deepcopy(SAMPLE_SCRIPT))
@@ -324,6 +358,18 @@ def quick_route():
         return jsonify({"error": "start and destination must include lat/lng"}), HTTPStatus.BAD_REQUEST
 
     transport = (payload.get("transport") or "driving").strip().lower()
+    response_format = (payload.get("format") or "geojson").strip().lower()
+    try:
+        precision = int(payload.get("precision", 5))
+        zoom = float(payload["zoom"]) if payload.get("zoom") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "precision and zoom must be numeric"}), HTTPStatus.BAD_REQUEST
+
+    def respond(collection: Dict[str, Any]):
+        # Opt-in compact output: geometries as encoded polylines, decoded in main.js.
+        if response_format == "polyline":
+            collection = compact_collection(collection, precision=precision, zoom=zoom)
+        return jsonify(collection)
 
     if transport == "public_transport":
         modes = payload.get("public_transport_modes")
@@ -336,7 +382,7 @@ def quick_route():
             destination_name=payload.get("destination_name", "Финиш"),
             modes=[str(mode).lower() for mode in modes],
         )
-        return jsonify(feature_collection)
+        return respond(feature_collection)
 
     route_mode = (payload.get("route_mode") or "fastest").strip().lower()
     traffic_mode = (payload.get("traffic_mode") or "jam").strip().lower()
@@ -370,7 +416,7 @@ def quick_route():
         params=params_block,
         utc=utc_value,
     )
-    return jsonify(feature_collection)
+    return respond(feature_collection)
 
 
 # TODO: Plug authentication/quotas before exposing API publicly.
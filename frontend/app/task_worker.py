@@ -0,0 +1,79 @@
+"""Standalone consumers for the optimization job queue.
+
+Run ``python -m app.task_worker --processes 4`` next to the web app (with
+``TASK_INLINE_WORKERS=0`` there) so optimization throughput scales with
+processes instead of threads sharing one interpreter. Needs a shared task
+backend (``TASK_BACKEND=sqlite`` or ``redis``).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from typing import List, Optional
+
+from .job_queue import MemoryQueue
+from .worker import task_manager
+
+logger = logging.getLogger(__name__)
+
+TASK_WORKER_PROCESSES = int(os.getenv("TASK_WORKER_PROCESSES", str(os.cpu_count() or 1)))
+TASK_WORKER_THREADS = int(os.getenv("TASK_WORKER_THREADS", "4"))
+
+
+def serve(threads: int) -> None:
+    """Consume jobs on ``threads`` threads until SIGTERM or Ctrl-C, then finish running jobs."""
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    consumers = task_manager.start_consumers(threads, stop)
+    logger.info("Task worker %d consuming with %d threads", os.getpid(), len(consumers))
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    for consumer in consumers:
+        consumer.join()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=TASK_WORKER_PROCESSES)
+    parser.add_argument("--threads", type=int, default=TASK_WORKER_THREADS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if isinstance(task_manager.backend, MemoryQueue):
+        parser.error("TASK_BACKEND=memory cannot be shared with worker processes; use sqlite or redis")
+    if args.processes <= 1:
+        serve(args.threads)
+        return
+
+    children = [
+        multiprocessing.Process(target=serve, args=(args.threads,), name=f"task-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for child in children:
+        child.start()
+
+    def terminate(*_) -> None:
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        terminate()
+        for child in children:
+            child.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,125 +1,453 @@
-﻿"""In-memory background worker stub for running optimizations safely."""
+﻿"""Background worker for optimizations, fed by a shared job queue.
+
+Jobs, statuses, routes and scripts go through a task backend (``app/job_queue.py``):
+SQLite by default, so every gunicorn worker and every ``python -m app.task_worker``
+process sees the same tasks. Consumers run as threads in the web process
+(``TASK_INLINE_WORKERS``) and/or in separate worker processes.
+"""
 from __future__ import annotations
 
+import logging
+import os
+import tempfile
 import threading
+import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 # NOTE: This stub intentionally avoids executing arbitrary user code. See comments below
 # for hardening recommendations when untrusted scripts must be run.
 
-from .gis_client import geocode, route
+from .cache import TTLCache, json_size
+from .gis_client import geocode_many, route
+from .job_queue import Job, MemoryQueue, build_queue
 from .models import OptimizeRequest, Script, Stop, TaskStatus, UserStop
 from .optimization import optimize_multi_user
+from .result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+# Queue database and spilled routes live outside the source tree; point APP_STATE_DIR at a
+# persistent volume to keep queued jobs across container restarts.
+_STATE_DIR = Path(os.getenv("APP_STATE_DIR") or Path(tempfile.gettempdir()) / "meetpoint")
+
+# Shared by all tasks so the number of in-flight routing calls stays bounded.
+ROUTE_CONCURRENCY = int(os.getenv("WORKER_ROUTE_CONCURRENCY", "8"))
+# Seconds one route may spend waiting for a rate-limit token and for 2GIS.
+ROUTE_DEADLINE = float(os.getenv("WORKER_ROUTE_DEADLINE", "20"))
+# "sqlite" shares tasks between processes on one host, "redis" between hosts,
+# "memory" keeps them in this process only.
+TASK_BACKEND = os.getenv("TASK_BACKEND", "sqlite")
+TASK_QUEUE_PATH = os.getenv("TASK_QUEUE_PATH") or str(_STATE_DIR / "tasks.sqlite3")
+TASK_QUEUE_REDIS_URL = os.getenv("TASK_QUEUE_REDIS_URL", "")
+# Consumer threads started in the web process on first enqueue; 0 leaves jobs to task_worker processes.
+TASK_INLINE_WORKERS = int(os.getenv("TASK_INLINE_WORKERS", "4"))
+# A job not acknowledged within this many seconds (worker died) is handed out again.
+TASK_VISIBILITY_TIMEOUT = float(os.getenv("TASK_VISIBILITY_TIMEOUT", "300"))
+# A running task renews its lease every third of the timeout for up to this many seconds; past that
+# it is treated as stuck and its job is handed out again.
+TASK_MAX_RUNTIME = float(os.getenv("TASK_MAX_RUNTIME", "1800"))
+# Deliveries per job; transient failures (network, disk) are retried with exponential backoff.
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_RETRY_BACKOFF = float(os.getenv("TASK_RETRY_BACKOFF", "5"))
+# Idle consumers look for new jobs this often (seconds).
+TASK_POLL_INTERVAL = float(os.getenv("TASK_POLL_INTERVAL", "0.5"))
+# Seconds an in-flight marker may exist without its task's status (enqueue still writing it)
+# before a new enqueue treats the marker as orphaned and takes it over.
+TASK_ENQUEUE_GRACE = float(os.getenv("TASK_ENQUEUE_GRACE", "30"))
+# Task statuses and finished routes are dropped after this many seconds, uploaded scripts after SCRIPT_TTL.
+TASK_RESULT_TTL = float(os.getenv("TASK_RESULT_TTL", str(24 * 3600)))
+SCRIPT_TTL = float(os.getenv("SCRIPT_TTL", str(7 * 24 * 3600)))
+# Limits per result kind on every backend (JSON bytes in memory, compressed bytes in SQLite and Redis).
+# On the "memory" backend least recently used routes beyond them go to the spill directory.
+TASK_STATUS_MAX_ENTRIES = int(os.getenv("TASK_STATUS_MAX_ENTRIES", "10000"))
+TASK_ROUTE_MAX_ENTRIES = int(os.getenv("TASK_ROUTE_MAX_ENTRIES", "500"))
+TASK_ROUTE_MAX_BYTES = int(os.getenv("TASK_ROUTE_MAX_BYTES", str(128 * 1024 * 1024)))
+# Features of routes still being built, counted apart from finished routes (never spilled).
+TASK_ROUTE_PART_MAX_BYTES = int(os.getenv("TASK_ROUTE_PART_MAX_BYTES", str(32 * 1024 * 1024)))
+# Empty disables spilling: evicted routes are then gone.
+TASK_ROUTE_SPILL_DIR = os.getenv("TASK_ROUTE_SPILL_DIR", str(_STATE_DIR / "task_routes"))
+
+_route_executor = ThreadPoolExecutor(max_workers=max(1, ROUTE_CONCURRENCY), thread_name_prefix="route")
+
+
+# (max entries, max bytes) per result kind for the SQLite and Redis backends.
+_RESULT_LIMITS = {
+    "script": (TASK_STATUS_MAX_ENTRIES, None),
+    "status": (TASK_STATUS_MAX_ENTRIES, None),
+    "route": (TASK_ROUTE_MAX_ENTRIES, TASK_ROUTE_MAX_BYTES or None),
+    "route_part": (TASK_STATUS_MAX_ENTRIES, TASK_ROUTE_PART_MAX_BYTES or None),
+}
+
+
+def _build_backend():
+    stores = None
+    if TASK_BACKEND.lower() == "memory":
+        stores = {
+            "script": TTLCache(TASK_STATUS_MAX_ENTRIES, SCRIPT_TTL),
+            "status": TTLCache(TASK_STATUS_MAX_ENTRIES, TASK_RESULT_TTL),
+            "route": ResultStore(
+                max_entries=TASK_ROUTE_MAX_ENTRIES,
+                max_bytes=TASK_ROUTE_MAX_BYTES or None,
+                ttl=TASK_RESULT_TTL,
+                spill_dir=Path(TASK_ROUTE_SPILL_DIR) if TASK_ROUTE_SPILL_DIR else None,
+            ),
+            "route_part": TTLCache(
+                TASK_STATUS_MAX_ENTRIES,
+                TASK_RESULT_TTL,
+                max_bytes=TASK_ROUTE_PART_MAX_BYTES or None,
+                sizeof=json_size,
+            ),
+        }
+    return build_queue(
+        TASK_BACKEND, path=Path(TASK_QUEUE_PATH), url=TASK_QUEUE_REDIS_URL, stores=stores, limits=_RESULT_LIMITS
+    )
 
 
 class ScriptRepository:
-    """Thread-safe storage for uploaded scripts."""
+    """Uploaded scripts, stored in the task backend so any worker can load them."""
 
-    def __init__(self) -> None:
-        self._scripts: Dict[str, Script] = {}
-        self._lock = threading.Lock()
+    def __init__(self, backend) -> None:
+        self.backend = backend
 
     def save(self, script: Script) -> str:
         script_id = script.script_id or str(uuid.uuid4())
         script.script_id = script_id
-        with self._lock:
-            self._scripts[script_id] = script
+        self.backend.put("script", script_id, script.dict(), SCRIPT_TTL)
         return script_id
 
     def get(self, script_id: str) -> Optional[Script]:
-        with self._lock:
-            return self._scripts.get(script_id)
+        data = self.backend.get("script", script_id)
+        return None if data is None else Script.parse_obj(data)
 
 
 class TaskManager:
-    """Minimal background worker that simulates asynchronous optimization."""
+    """Queues optimizations and runs them on consumer threads.
+
+    ``enqueue`` only writes the job; whichever consumer claims it, in this or
+    another process, runs it and publishes status and route to the backend.
+    Jobs are leased for ``TASK_VISIBILITY_TIMEOUT`` (renewed on a timer while
+    the task runs, up to ``TASK_MAX_RUNTIME``), so a job whose worker dies is
+    picked up again.
+    """
 
-    def __init__(self) -> None:
-        self._statuses: Dict[str, TaskStatus] = {}
-        self._routes: Dict[str, Dict[str, object]] = {}
+    def __init__(self, backend=None) -> None:
+        self.backend = backend if backend is not None else _build_backend()
+        # Guards read-modify-write of statuses and the numbering of partial-route features.
         self._lock = threading.Lock()
-        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._consumers: List[threading.Thread] = []
+        self._coalesced = 0
 
     def enqueue(self, request: OptimizeRequest) -> str:
+        """Queue an optimization, or return the task already pending or running for the same script and algorithm."""
+
         task_id = str(uuid.uuid4())
+        key = _inflight_key(request)
+        marker = {"task_id": task_id, "created": time.time()}
+        while True:
+            current = self.backend.add("inflight", key, marker, TASK_RESULT_TTL)
+            if current == marker:
+                break
+            status = self.get_status(current["task_id"])
+            # No status yet means the other enqueue is still writing it, unless that has taken longer
+            # than the grace period (enqueue died in between, or the status was evicted).
+            if status is None:
+                live = time.time() - current["created"] < TASK_ENQUEUE_GRACE
+            else:
+                live = status.status in {"pending", "running"}
+            if live:
+                with self._lock:
+                    self._coalesced += 1
+                return current["task_id"]
+            # The marker outlived its task (worker lost after finishing): take it over, unless a
+            # concurrent enqueue already did or the marker was cleared, then look again.
+            if self.backend.replace_if("inflight", key, current, marker, TASK_RESULT_TTL):
+                break
         status = TaskStatus(task_id=task_id, status="pending", script_id=request.script_id)
-        with self._lock:
-            self._statuses[task_id] = status
-        self._executor.submit(self._run_task, task_id, request)
+        self.backend.put("status", task_id, status.dict(), TASK_RESULT_TTL)
+        self.backend.enqueue(task_id, request.dict())
+        self._ensure_consumers()
+        self._wakeup.set()
         return task_id
 
+    def _ensure_consumers(self) -> None:
+        # The in-process queue is invisible to other processes, so it always needs a local consumer.
+        count = max(TASK_INLINE_WORKERS, 1 if isinstance(self.backend, MemoryQueue) else 0)
+        with self._lock:
+            if self._consumers or count <= 0:
+                return
+            self._consumers = self.start_consumers(count, self._stop)
+
+    def start_consumers(self, count: int, stop: threading.Event) -> List[threading.Thread]:
+        """Start ``count`` daemon threads consuming jobs until ``stop`` is set."""
+
+        threads = [
+            threading.Thread(target=self.consume, args=(stop,), name=f"task-consumer-{index}", daemon=True)
+            for index in range(max(1, count))
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def consume(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                job = self.backend.claim(TASK_VISIBILITY_TIMEOUT)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Task backend claim failed: %s", exc)
+                stop.wait(TASK_POLL_INTERVAL)
+                continue
+            if job is None:
+                self._wakeup.wait(TASK_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._process(job)
+
+    def _process(self, job: Job) -> None:
+        task_id = job.job_id
+        request = OptimizeRequest.parse_obj(job.payload)
+        if job.attempts > TASK_MAX_ATTEMPTS:
+            self._set_status(task_id, "error", error=f"gave up after {TASK_MAX_ATTEMPTS} attempts")
+            self._finish(task_id, request)
+            return
+        # The route fan-out can outlast the lease and reports no progress while routes are slow.
+        running = threading.Event()
+        threading.Thread(
+            target=self._renew_lease, args=(task_id, running), name=f"lease-{task_id[:8]}", daemon=True
+        ).start()
+        try:
+            self._run_task(task_id, request)
+        except OSError as exc:
+            # Network, quota store or disk trouble (requests errors included): retry on any worker.
+            if job.attempts < TASK_MAX_ATTEMPTS:
+                logger.warning("Task %s attempt %d failed, retrying: %s", task_id, job.attempts, exc)
+                self._set_status(task_id, "pending", error=f"attempt {job.attempts} failed: {exc}")
+                self.backend.retry(task_id, TASK_RETRY_BACKOFF * 2 ** (job.attempts - 1))
+                return
+            self._set_status(task_id, "error", error=str(exc))
+        except Exception as exc:  # pylint: disable=broad-except
+            # In production this should be narrowed down and logged.
+            self._set_status(task_id, "error", error=str(exc))
+        finally:
+            running.set()
+        self._finish(task_id, request)
+
+    def _renew_lease(self, task_id: str, done: threading.Event) -> None:
+        deadline = time.monotonic() + TASK_MAX_RUNTIME
+        while not done.wait(TASK_VISIBILITY_TIMEOUT / 3) and time.monotonic() < deadline:
+            try:
+                self.backend.extend(task_id, TASK_VISIBILITY_TIMEOUT)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Could not renew the lease of task %s: %s", task_id, exc)
+
+    def _finish(self, task_id: str, request: OptimizeRequest) -> None:
+        key = _inflight_key(request)
+        # Only clear our own marker: a newer task may have taken it over.
+        marker = self.backend.get("inflight", key)
+        if marker is not None and marker["task_id"] == task_id:
+            self.backend.delete("inflight", key)
+        self.backend.ack(task_id)
+
     def _run_task(self, task_id: str, request: OptimizeRequest) -> None:
         self._set_status(task_id, "running")
         script = script_store.get(request.script_id)
         if not script:
             self._set_status(task_id, "error", error="script not found")
             return
-        try:
-            normalized_script = _ensure_coordinates(script)
-            plan = optimize_multi_user(normalized_script.users, normalized_script.destination, request.algorithm)
-            feature_collection = _build_feature_collection(plan)
+        started = time.perf_counter()
+        normalized_script = _ensure_coordinates(script)
+        self._record_timing(task_id, "geocode", started)
+
+        started = time.perf_counter()
+        # Inline: the greedy plan takes microseconds, less than a compute pool round trip
+        # (see app/compute_pool.py).
+        plan = optimize_multi_user(normalized_script.users, normalized_script.destination, request.algorithm)
+        self._record_timing(task_id, "optimize", started)
+
+        started = time.perf_counter()
+        script_id = normalized_script.script_id
+        # Until the collection is complete, each finished route is its own "route_part" row,
+        # numbered from 0 under a prefix unique to this run (retries reuse the task id), and
+        # get_route assembles them.
+        parts = uuid.uuid4().hex
+        header = {"type": "FeatureCollection", "features": [], "properties": {"complete": False}, "parts": parts}
+        self.backend.put("route", script_id, header, TASK_RESULT_TTL)
+        published = 0
+
+        def publish(feature: Dict[str, object]) -> None:
+            nonlocal published
             with self._lock:
-                self._routes[normalized_script.script_id] = feature_collection
-            self._set_status(task_id, "done", result={"visit_order": plan.get("visit_order")})
-        except Exception as exc:  # pylint: disable=broad-except
-            # In production this should be narrowed down and logged.
-            self._set_status(task_id, "error", error=str(exc))
+                # Numbered and written in order, so readers can stop at the first gap.
+                self.backend.put("route_part", _part_key(parts, published), feature, TASK_RESULT_TTL)
+                published += 1
+            self.backend.extend(task_id, TASK_VISIBILITY_TIMEOUT)
+
+        feature_collection = _build_feature_collection(plan, on_feature=publish)
+        self._record_timing(task_id, "routes", started)
+        self.backend.put("route", script_id, feature_collection, TASK_RESULT_TTL)
+        for index in range(published):
+            self.backend.delete("route_part", _part_key(parts, index))
+        self._set_status(task_id, "done", result={"visit_order": plan.get("visit_order")})
 
     def get_status(self, task_id: str) -> Optional[TaskStatus]:
-        with self._lock:
-            return self._statuses.get(task_id)
+        data = self.backend.get("status", task_id)
+        return None if data is None else TaskStatus.parse_obj(data)
 
     def get_route(self, script_id: str) -> Optional[Dict[str, object]]:
+        collection = self.backend.get("route", script_id)
+        if collection is None or "parts" not in collection:
+            return collection
+        features: List[Dict[str, object]] = []
+        while True:
+            feature = self.backend.get("route_part", _part_key(collection["parts"], len(features)))
+            if feature is None:
+                break
+            features.append(feature)
+        partial = {key: value for key, value in collection.items() if key != "parts"}
+        partial["features"] = features
+        return partial
+
+    def _update_status(self, task_id: str, update: Callable[[TaskStatus], None]) -> None:
         with self._lock:
-            return self._routes.get(script_id)
+            data = self.backend.get("status", task_id)
+            status = TaskStatus(task_id=task_id, status="pending") if data is None else TaskStatus.parse_obj(data)
+            update(status)
+            self.backend.put("status", task_id, status.dict(), TASK_RESULT_TTL)
+
+    def _record_timing(self, task_id: str, stage: str, started: float) -> None:
+        elapsed = round(time.perf_counter() - started, 4)
+        self._update_status(task_id, lambda status: status.timings.__setitem__(stage, elapsed))
+        self.backend.extend(task_id, TASK_VISIBILITY_TIMEOUT)
 
     def _set_status(self, task_id: str, status_value: str, *, error: Optional[str] = None, result: Optional[Dict[str, object]] = None) -> None:
-        with self._lock:
-            status = self._statuses.get(task_id)
-            if not status:
-                status = TaskStatus(task_id=task_id, status=status_value)
+        def update(status: TaskStatus) -> None:
             status.status = status_value
             status.error = error
             status.result = result
-            self._statuses[task_id] = status
+
+        self._update_status(task_id, update)
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth and result counts of the task backend, plus local consumer threads."""
+
+        stats = dict(self.backend.stats())
+        stats["consumers"] = sum(thread.is_alive() for thread in self._consumers)
+        stats["coalesced"] = self._coalesced
+        return stats
+
+
+def _inflight_key(request: OptimizeRequest) -> str:
+    return f"{request.script_id}:{request.algorithm}"
 
 
-script_store = ScriptRepository()
-task_manager = TaskManager()
+def _part_key(parts: str, index: int) -> str:
+    return f"{parts}:{index}"
+
+
+_backend = _build_backend()
+script_store = ScriptRepository(_backend)
+task_manager = TaskManager(_backend)
 
 
 def _ensure_coordinates(script: Script) -> Script:
-    """Populate missing coordinates using geocode fallbacks."""
-    for user in script.users:
-        _materialize_stop(user.start)
-    _materialize_stop(script.destination)
+    """Populate missing coordinates using one batched geocode pass."""
+    stops = [user.start for user in script.users]
+    stops.append(script.destination)
+    pending = [stop for stop in stops if _needs_geocode(stop)]
+    if pending:
+        resolved = geocode_many(stop.address for stop in pending)
+        for stop in pending:
+            coords = resolved[stop.address]
+            stop.lat = coords.get("lat")
+            stop.lng = coords.get("lng")
     return script
 
 
-def _materialize_stop(stop: Stop) -> None:
+def _needs_geocode(stop: Stop) -> bool:
     if stop.lat is not None and stop.lng is not None:
-        return
+        return False
     if not stop.address:
         raise ValueError("cannot determine coordinates without address")
-    coords = geocode(stop.address)
-    stop.lat = coords.get("lat")
-    stop.lng = coords.get("lng")
-
-
-def _build_feature_collection(plan: Dict[str, object]) -> Dict[str, object]:
-    features = []
-    for route_plan in plan.get("routes", []):
-        sequence = route_plan.get("sequence", [])
-        feature = route(sequence)
-        feature.setdefault("properties", {}).update(
-            {
-                "user_id": route_plan.get("user_id"),
-                "estimated_distance_km": route_plan.get("estimated_distance_km"),
-            }
-        )
-        features.append(feature)
+    return True
+
+
+def _fetch_route(route_plan: Dict[str, object], deadline: float) -> Dict[str, object]:
+    remaining = max(0.0, deadline - time.monotonic())
+    feature = route(route_plan.get("sequence", []), rate_wait=remaining)
+    feature.setdefault("properties", {}).update(
+        {
+            "user_id": route_plan.get("user_id"),
+            "estimated_distance_km": route_plan.get("estimated_distance_km"),
+        }
+    )
+    return feature
+
+
+def _fallback_feature(route_plan: Dict[str, object], error: str) -> Dict[str, object]:
+    coordinates = [[point["lng"], point["lat"]] for point in route_plan.get("sequence", [])]
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "properties": {
+            "provider": "error-fallback",
+            "error": error,
+            "user_id": route_plan.get("user_id"),
+            "estimated_distance_km": route_plan.get("estimated_distance_km"),
+        },
+    }
+
+
+def _build_feature_collection(
+    plan: Dict[str, object],
+    *,
+    on_feature: Optional[Callable[[Dict[str, object]], None]] = None,
+) -> Dict[str, object]:
+    """Fetch all user routes concurrently and keep the plan order in the result.
+
+    Routes run on the shared ``_route_executor``; each one gets
+    ``ROUTE_DEADLINE`` seconds from the moment it starts, after which a
+    straight-line fallback is used. ``on_feature`` is called as routes finish.
+    """
+
+    route_plans: List[Dict[str, object]] = list(plan.get("routes", []))
+    features: List[Optional[Dict[str, object]]] = [None] * len(route_plans)
+    deadlines: Dict[int, float] = {}
+
+    def run(index: int) -> Dict[str, object]:
+        deadlines[index] = time.monotonic() + ROUTE_DEADLINE
+        return _fetch_route(route_plans[index], deadlines[index])
+
+    def finish(index: int, feature: Dict[str, object]) -> None:
+        features[index] = feature
+        if on_feature:
+            on_feature(feature)
+
+    futures = {_route_executor.submit(run, index): index for index in range(len(route_plans))}
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        for future in [f for f in pending if deadlines.get(futures[f], float("inf")) <= now]:
+            # The thread keeps running until its HTTP timeout; only the result is dropped.
+            pending.discard(future)
+            finish(futures[future], _fallback_feature(route_plans[futures[future]], "route deadline exceeded"))
+        if not pending:
+            break
+        started = [deadlines[futures[f]] for f in pending if futures[f] in deadlines]
+        timeout = (min(started) if started else now + ROUTE_DEADLINE) - now
+        done, pending = wait(pending, timeout=max(0.01, timeout), return_when=FIRST_COMPLETED)
+        for future in done:
+            index = futures[future]
+            try:
+                feature = future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                feature = _fallback_feature(route_plans[index], f"route request failed: {exc}")
+            finish(index, feature)
+
+    features = [feature for feature in features if feature is not None]
 
     if plan.get("visit_order"):
         order_feature = {
@@ -132,7 +460,7 @@ def _build_feature_collection(plan: Dict[str, object]) -> Dict[str, object]:
         }
         features.append(order_feature)
 
-    return {"type": "FeatureCollection", "features": features}
+    return {"type": "FeatureCollection", "features": features, "properties": {"complete": True}}
 
 
 # Security guidance for executing untrusted scripts:
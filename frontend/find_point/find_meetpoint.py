@@ -3,15 +3,16 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
 from collections import defaultdict
+from functools import lru_cache
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-try:  # Optional heavy dependencies.
-    import geopandas as gpd
-except ImportError:  # pragma: no cover - environment without geopandas.
-    gpd = None  # type: ignore
+# geopandas загружается лениво и только для движка "geopandas" (см. _load_geopandas).
+gpd = None
 
 try:  # routingpy provides the OpenRouteService client used by the script.
     from routingpy import ORS
@@ -19,22 +20,84 @@ except ImportError:  # pragma: no cover - environment without routingpy.
     ORS = None  # type: ignore
 
 try:
+    import shapely
     from shapely.geometry import Point, Polygon
 except ImportError:  # pragma: no cover - environment without shapely.
+    shapely = None  # type: ignore
     Point = None  # type: ignore
     Polygon = None  # type: ignore
-
+
+if __package__ in {None, ""}:
+    from matrix_cache import MatrixCellCache  # type: ignore  # noqa: E402
+    from speed_model import SpeedModel, SpeedModelClient  # type: ignore  # noqa: E402
+    from projection import EARTH_RADIUS_M, SearchArea, base_search_area, haversine_m, local_search_area  # type: ignore  # noqa: E402
+else:
+    from .matrix_cache import MatrixCellCache
+    from .speed_model import SpeedModel, SpeedModelClient
+    from .projection import EARTH_RADIUS_M, SearchArea, base_search_area, haversine_m, local_search_area
+
 ORS_API_KEY = os.getenv("ORS_API_KEY")
 SERVICE_MATRIX_LIMIT = 3500
+MATRIX_CACHE_PATH = os.getenv("MATRIX_CACHE_PATH")
+MATRIX_CACHE_TTL = float(os.getenv("MATRIX_CACHE_TTL", "86400"))
+MATRIX_CACHE_MAX_ENTRIES = int(os.getenv("MATRIX_CACHE_MAX_ENTRIES", "500000"))
+MATRIX_CACHE_PRECISION = int(os.getenv("MATRIX_CACHE_PRECISION", "5"))
+MATRIX_CACHE_ENABLED = os.getenv("MATRIX_CACHE_ENABLED", "true").strip().lower() == "true"
+# Общий бюджет ячеек матрицы на поиск и его распределение по стадиям.
+MEETPOINT_CELL_BUDGET = int(os.getenv("MEETPOINT_CELL_BUDGET", str(SERVICE_MATRIX_LIMIT // 2)))
+COARSE_BUDGET_SHARE = 0.4
+REFINE_LEVELS = 3
+REFINE_TOP_K = 2
+MIN_STAGE_CANDIDATES = 9
+# "numpy" — собственная UTM-проекция без geopandas, "geopandas" — прежний путь.
+SPATIAL_ENGINE = os.getenv("MEETPOINT_SPATIAL_ENGINE", "numpy").strip().lower()
+SPATIAL_ENGINES = {"numpy", "geopandas"}
+# Отсечение кандидатов по нижним оценкам времени в пути до запроса матрицы.
+MEETPOINT_PRUNING = os.getenv("MEETPOINT_PRUNING", "true").strip().lower() == "true"
+# Верхние оценки скорости по профилям, м/с (переопределяются "профиль=м/с,..." в MEETPOINT_MAX_SPEEDS).
+DEFAULT_MAX_SPEEDS = {
+    "driving-car": 150 / 3.6,
+    "driving-hgv": 100 / 3.6,
+    "cycling-regular": 50 / 3.6,
+    "cycling-road": 50 / 3.6,
+    "cycling-mountain": 50 / 3.6,
+    "cycling-electric": 50 / 3.6,
+    "foot-walking": 9 / 3.6,
+    "foot-hiking": 9 / 3.6,
+    "wheelchair": 7 / 3.6,
+    # В ORS считается как driving-car (см. ORS_PROFILE_SUBSTITUTES).
+    "public-transport": 150 / 3.6,
+}
+# Профили модели скоростей без аналога в ORS: запросы и кэш матриц используют замену.
+ORS_PROFILE_SUBSTITUTES = {"public-transport": "driving-car"}
+# ORS привязывает точки к графу дорог, поэтому из расстояния вычитаются два радиуса привязки.
+MEETPOINT_SNAP_SLACK_M = float(os.getenv("MEETPOINT_SNAP_SLACK_M", "350"))
+# Дополнительные ячейки матрицы на непрерывное уточнение точки после сетки (0 — выключено).
+MEETPOINT_POLISH_CELLS = int(os.getenv("MEETPOINT_POLISH_CELLS", "200"))
+# Сколько последних ячеек кэша матриц берётся для калибровки модели скоростей (0 — без калибровки).
+SPEED_MODEL_CALIBRATION_CELLS = int(os.getenv("MEETPOINT_SPEED_CALIBRATION_CELLS", "20000"))
+SPEED_MODEL_CALIBRATION_TTL = float(os.getenv("MEETPOINT_SPEED_CALIBRATION_TTL", "3600"))
+POLISH_MIN_STEP_M = 25.0
 
 __all__ = [
     "MeetpointDependencyError",
     "MeetpointComputationError",
+    "MatrixCellCache",
+    "SpeedModel",
+    "SpeedModelClient",
+    "get_speed_model",
+    "offline_client",
+    "SearchArea",
+    "matrix_cache",
     "create_base_search_area",
     "create_local_search_area",
+    "generate_candidate_grid",
     "generate_candidates",
     "build_matrix",
     "build_main_vector",
+    "objective_values",
+    "lower_bound_durations",
+    "lower_bound_objective",
     "find_optimal_meetpoint",
     "compute_best_meetpoint",
 ]
@@ -71,21 +134,114 @@ try:
     client = _build_client()
 except MeetpointDependencyError:  # pragma: no cover - best effort fallback at import time.
     client = None
+
+
+def _build_matrix_cache() -> Optional[MatrixCellCache]:
+    """Return the shared on-disk matrix cache unless it is disabled."""
+
+    if not MATRIX_CACHE_ENABLED:
+        return None
+    return MatrixCellCache(
+        MATRIX_CACHE_PATH or None,
+        ttl=MATRIX_CACHE_TTL,
+        max_entries=MATRIX_CACHE_MAX_ENTRIES,
+        precision=MATRIX_CACHE_PRECISION,
+    )
+
+
+matrix_cache = _build_matrix_cache()
+
+_speed_model = SpeedModel()
+_speed_model_calibrated: Optional[float] = None
+_speed_model_refresh: Optional[threading.Thread] = None
+_speed_model_lock = threading.Lock()
+
+
+def _calibrate_speed_model(cache) -> None:
+    global _speed_model
+    model = SpeedModel.from_cache(cache, limit=SPEED_MODEL_CALIBRATION_CELLS)
+    with _speed_model_lock:
+        _speed_model = model
+
+
+def get_speed_model() -> SpeedModel:
+    """Модель скоростей, откалиброванная по кэшу матриц.
+
+    Калибровка повторяется не чаще раза в ``SPEED_MODEL_CALIBRATION_TTL``
+    секунд, чтобы модель подтягивалась к накопленным реальным ячейкам. Она
+    читает до ``SPEED_MODEL_CALIBRATION_CELLS`` ячеек и решает NNLS, поэтому
+    идёт в фоновом потоке: запрос сразу получает текущую модель (до первой
+    калибровки — кривые по умолчанию).
+    """
+
+    global _speed_model_calibrated, _speed_model_refresh
+    cache = matrix_cache if SPEED_MODEL_CALIBRATION_CELLS > 0 else None
+    with _speed_model_lock:
+        now = time.monotonic()
+        stale = _speed_model_calibrated is None or now - _speed_model_calibrated > SPEED_MODEL_CALIBRATION_TTL
+        running = _speed_model_refresh is not None and _speed_model_refresh.is_alive()
+        if cache is not None and stale and not running:
+            _speed_model_calibrated = now
+            _speed_model_refresh = threading.Thread(
+                target=_calibrate_speed_model, args=(cache,), name="speed-model-calibration", daemon=True
+            )
+            _speed_model_refresh.start()
+        return _speed_model
+
+
+def offline_client() -> SpeedModelClient:
+    """Клиент с интерфейсом ORS ``matrix``, считающий времена без обращения к API."""
+
+    return SpeedModelClient(get_speed_model())
 
 
+def _load_geopandas():
+    """Import geopandas on first use of the geopandas engine."""
+
+    global gpd
+    if gpd is None:
+        try:
+            import geopandas  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:  # pragma: no cover - environment without geopandas.
+            raise MeetpointDependencyError("geopandas is required for the geopandas spatial engine") from exc
+        gpd = geopandas
+    return gpd
+
+
 def _ensure_spatial_dependencies() -> None:
-    if gpd is None or Point is None or Polygon is None:
+    if Point is None or Polygon is None:
         raise MeetpointDependencyError("geopandas and shapely are required for meetpoint calculation")
+    _load_geopandas()
 
 
-def create_base_search_area(points: Sequence[Point]):
-    """Создаёт расширенный прямоугольный полигон вокруг заданных точек."""
+def _resolve_engine(engine: Optional[str]) -> str:
+    name = (engine or SPATIAL_ENGINE).lower()
+    if name not in SPATIAL_ENGINES:
+        raise ValueError(f"spatial engine must be one of {sorted(SPATIAL_ENGINES)}")
+    return name
 
-    _ensure_spatial_dependencies()
-    if not points:
+
+def _xy(point) -> Tuple[float, float]:
+    """Координаты ``(lon, lat)`` из shapely Point или пары чисел."""
+    if hasattr(point, "x"):
+        return float(point.x), float(point.y)
+    return float(point[0]), float(point[1])
+
+
+def create_base_search_area(points: Sequence[Point], *, engine: Optional[str] = None):
+    """Создаёт расширенный прямоугольный полигон вокруг заданных точек.
+
+    Движок ``numpy`` (по умолчанию) возвращает ``SearchArea`` в метрах UTM,
+    ``engine="geopandas"`` — GeoDataFrame, как раньше.
+    """
+
+    if len(points) == 0:
         raise ValueError("points collection cannot be empty")
+    if _resolve_engine(engine) == "numpy":
+        return base_search_area(np.array([_xy(p) for p in points]))
 
-    hull = gpd.GeoSeries(list(points), crs="EPSG:4326").unary_union
+    _ensure_spatial_dependencies()
+    hull = gpd.GeoSeries([Point(_xy(p)) for p in points], crs="EPSG:4326").unary_union
     if hull.geom_type == "Point":
         hull = hull.buffer(0.01)
     elif hull.geom_type == "LineString":
@@ -98,57 +254,235 @@ def create_base_search_area(points: Sequence[Point]):
     return gpd.GeoDataFrame(geometry=gdf.envelope, crs=crs_utm)
 
 
-def create_local_search_area(point: Point, x_step: float, y_step: float):
+def create_local_search_area(point: Point, x_step: float, y_step: float, *, engine: Optional[str] = None):
     """Создаёт прямоугольный полигон вокруг заданной точки."""
+    buffer_radius = np.ceil(max(x_step, y_step) * 2)
+    if _resolve_engine(engine) == "numpy":
+        return local_search_area(_xy(point), float(buffer_radius))
+
     _ensure_spatial_dependencies()
-    gdf = gpd.GeoDataFrame(geometry=[Point(point)], crs="EPSG:4326")
+    gdf = gpd.GeoDataFrame(geometry=[Point(_xy(point))], crs="EPSG:4326")
     crs_utm = gdf.estimate_utm_crs()
     gdf = gdf.to_crs(crs_utm)
-    buffer_radius = np.ceil(max(x_step, y_step) * 2)
     gdf_buffer = gpd.GeoDataFrame(geometry=gdf.buffer(buffer_radius), crs=crs_utm)
     return gpd.GeoDataFrame(geometry=gdf_buffer.envelope, crs=crs_utm)
 
 
-def generate_candidates(search_area, people_points: Sequence[Point]):
+def _grid_step(width: float, height: float, max_cells: Optional[float], rows: int) -> Tuple[float, float]:
+    max_points = (max_cells or SERVICE_MATRIX_LIMIT) / rows
+    approx_step = np.sqrt(1 / max_points)
+    approx_step = np.clip(approx_step, 0.01, 0.2)
+    return float(width * approx_step), float(height * approx_step)
+
+
+@lru_cache(maxsize=32)
+def _to_wgs84_transformer(crs):
+    from pyproj import Transformer  # pylint: disable=import-outside-toplevel
+
+    return Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+
+
+def generate_candidate_grid(
+    search_area,
+    people_points: Sequence[Point],
+    *,
+    max_cells: Optional[float] = None,
+    rows: Optional[int] = None,
+) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """Векторная генерация сетки кандидатов в пределах полигона.
+
+    Возвращает массив ``(n, 2)`` координат ``lon, lat`` и шаг сетки в метрах.
+    Сетка строится через ``np.meshgrid``, принадлежность области проверяется
+    одним векторным вызовом, а перевод в EPSG:4326 — одним преобразованием
+    (``SearchArea`` считает всё на NumPy, для GeoDataFrame используются
+    ``shapely.contains_xy`` и pyproj). ``max_cells`` — бюджет ячеек матрицы
+    (по умолчанию ``SERVICE_MATRIX_LIMIT``), ``rows`` — число строк матрицы
+    на кандидата (по умолчанию число людей).
+    """
+    if len(people_points) == 0:
+        raise ValueError("people_points cannot be empty")
+
+    if isinstance(search_area, SearchArea):
+        minx, miny, maxx, maxy = search_area.bounds
+        contains_xy = search_area.contains_xy
+        to_wgs84 = search_area.to_wgs84
+    else:
+        _ensure_spatial_dependencies()
+        geometry = search_area.iloc[0].geometry
+        minx, miny, maxx, maxy = geometry.bounds
+        contains_xy = lambda x, y: shapely.contains_xy(geometry, x, y)  # noqa: E731
+        to_wgs84 = _to_wgs84_transformer(search_area.crs).transform
+
+    x_step, y_step = _grid_step(maxx - minx, maxy - miny, max_cells, rows or len(people_points))
+
+    # indexing="ij" сохраняет прежний порядок обхода: сначала x, затем y.
+    xx, yy = np.meshgrid(
+        np.arange(minx, maxx, x_step), np.arange(miny, maxy, y_step), indexing="ij"
+    )
+    xx = xx.ravel()
+    yy = yy.ravel()
+    inside = contains_xy(xx, yy)
+
+    lon, lat = to_wgs84(xx[inside], yy[inside])
+    coords = np.column_stack([np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)])
+    return coords, (x_step, y_step)
+
+
+def generate_candidates(
+    search_area,
+    people_points: Sequence[Point],
+    *,
+    max_cells: Optional[float] = None,
+    rows: Optional[int] = None,
+):
     """Генерация сетки точек-кандидатов в пределах полигона
     с учётом ограничений на максимальное количество элементов
-    в возвращаемой матрице."""
-    _ensure_spatial_dependencies()
-    minx, miny, maxx, maxy = search_area.iloc[0].geometry.bounds
-    width = maxx - minx
-    height = maxy - miny
+    в возвращаемой матрице.
 
-    if not people_points:
-        raise ValueError("people_points cannot be empty")
+    Обёртка над ``generate_candidate_grid`` для вызывающего кода,
+    которому нужны объекты ``Point``.
+    """
+    coords, step = generate_candidate_grid(
+        search_area, people_points, max_cells=max_cells, rows=rows
+    )
+    return [Point(float(x), float(y)) for x, y in coords], step
 
-    max_points = SERVICE_MATRIX_LIMIT / len(people_points)
-    approx_step = np.sqrt(1 / max_points)
-    approx_step = np.clip(approx_step, 0.01, 0.2)
-    x_step = width * approx_step
-    y_step = height * approx_step
-
-    x_coords = np.arange(minx, maxx, x_step)
-    y_coords = np.arange(miny, maxy, y_step)
-
-    candidates = [
-        Point(float(x), float(y))
-        for x in x_coords
-        for y in y_coords
-        if search_area.iloc[0].geometry.contains(Point(float(x), float(y)))
-    ]
-
-    gdf_candidates = gpd.GeoDataFrame(geometry=candidates, crs=search_area.crs).to_crs(
-        "EPSG:4326"
-    )
-    return list(gdf_candidates.geometry.values), (x_step, y_step)
+
+def _parse_speeds(raw: Optional[str]) -> Dict[str, float]:
+    speeds = dict(DEFAULT_MAX_SPEEDS)
+    for item in (raw or "").split(","):
+        profile, _, value = item.partition("=")
+        try:
+            speeds[profile.strip()] = float(value)
+        except ValueError:
+            continue
+    return speeds
+
+
+MAX_SPEEDS = _parse_speeds(os.getenv("MEETPOINT_MAX_SPEEDS"))
+
+
+def lower_bound_durations(
+    origins: np.ndarray,
+    targets: np.ndarray,
+    profiles: Sequence[str],
+    *,
+    speeds: Optional[Dict[str, float]] = None,
+    slack_m: Optional[float] = None,
+) -> np.ndarray:
+    """Нижние оценки времени в пути (с) из ``origins`` в ``targets``.
+
+    Расстояние по прямой за вычетом запаса на привязку к дорогам делится на
+    максимальную скорость профиля строки; для профиля без оценки граница равна 0.
+    """
+    speeds = MAX_SPEEDS if speeds is None else speeds
+    slack = MEETPOINT_SNAP_SLACK_M if slack_m is None else slack_m
+    distance = np.maximum(haversine_m(origins, targets) - 2 * slack, 0.0)
+    max_speed = np.array([speeds.get(profile) or np.inf for profile in profiles], dtype=float)
+    return distance / max_speed[:, None]
+
+
+def lower_bound_objective(
+    points: np.ndarray,
+    candidates: np.ndarray,
+    people_profiles: Sequence[str],
+    dest_point: Optional[np.ndarray],
+    dest_profile: str,
+    type_of_meetpoint: str,
+) -> np.ndarray:
+    """Нижняя граница критерия для каждого кандидата без запросов к ORS."""
+    matrix_people = lower_bound_durations(points, candidates, people_profiles)
+    vector_dest = None
+    if dest_point is not None:
+        vector_dest = lower_bound_durations(candidates, dest_point.reshape(1, 2), [dest_profile])[:, 0]
+    return objective_values(matrix_people, vector_dest, type_of_meetpoint)
+
+
+def _lonlat_list(points) -> List[List[float]]:
+    """Координаты ``[lon, lat]`` из массива ``(n, 2)`` или последовательности Point."""
+    if isinstance(points, np.ndarray):
+        return points.reshape(-1, 2).tolist()
+    return [list(_xy(p)) for p in points]
 
 
-def build_matrix(client, sources: Sequence[Point], targets: Sequence[Point], profiles: Sequence[str]):
-    """Группированный вызов ORS Matrix API по профилямпередвижения."""
+def _request_durations(client, start_points: List[List[float]], target_points: List[List[float]], profile: str) -> np.ndarray:
+    """Один запрос к ORS Matrix API: матрица len(start_points) × len(target_points)."""
+    result = client.matrix(
+        locations=start_points + target_points,
+        profile=profile,
+        sources=list(range(len(start_points))),
+        destinations=list(
+            range(len(start_points), len(start_points) + len(target_points))
+        ),
+        metrics=["duration"],
+    )
+    return np.array(result.durations, dtype=float).reshape(len(start_points), len(target_points))
+
+
+def _cached_durations(
+    client,
+    start_points: List[List[float]],
+    target_points: List[List[float]],
+    profile: str,
+    cache: Optional[MatrixCellCache],
+    stats: Optional[Dict[str, int]] = None,
+) -> np.ndarray:
+    """Матрица времён с запросом в ORS только недостающих ячеек кэша."""
+    if not getattr(client, "any_profile", False):
+        profile = ORS_PROFILE_SUBSTITUTES.get(profile, profile)
+    if cache is None:
+        durations = _request_durations(client, start_points, target_points, profile)
+        # Кэш не спрашивали: ячейки запрошены, но ни попаданием, ни промахом не считаются.
+        if stats is not None:
+            stats["requested"] = stats.get("requested", 0) + durations.size
+        return durations
+
+    durations, missing = cache.lookup(start_points, target_points, profile)
+    missing_count = int(missing.sum())
+    if stats is not None:
+        stats["hits"] = stats.get("hits", 0) + durations.size - missing_count
+        stats["misses"] = stats.get("misses", 0) + missing_count
+    if not missing_count:
+        return durations
+
+    # Запрашиваем только строки и столбцы, в которых есть пропуски.
+    rows = np.flatnonzero(missing.any(axis=1))
+    cols = np.flatnonzero(missing.any(axis=0))
+    row_points = [start_points[i] for i in rows]
+    col_points = [target_points[j] for j in cols]
+    fetched = _request_durations(client, row_points, col_points, profile)
+    if stats is not None:
+        stats["requested"] = stats.get("requested", 0) + fetched.size
+
+    block = np.ix_(rows, cols)
+    durations[block] = np.where(missing[block], fetched, durations[block])
+    cache.store(row_points, col_points, profile, fetched)
+    return durations
+
+
+def build_matrix(
+    client,
+    sources: Sequence[Point],
+    targets: Sequence[Point],
+    profiles: Sequence[str],
+    *,
+    cache: Optional[MatrixCellCache] = None,
+    use_cache: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+):
+    """Группированный вызов ORS Matrix API по профилям передвижения.
+
+    Ячейки, уже посчитанные ранее, берутся из ``cache`` (по умолчанию —
+    общий дисковый ``matrix_cache``); в ``stats`` накапливаются счётчики
+    попаданий и промахов.
+    """
     # Группируем индексы людей по профилям
     if client is None:
         raise MeetpointDependencyError("ORS client is not configured")
 
+    # Оценки офлайн-клиента (SpeedModelClient) не должны попадать в кэш реальных матриц.
+    cache_to_use = (cache or matrix_cache) if use_cache and getattr(client, "cacheable", True) else None
+
     profile_groups = defaultdict(list)
     for i, p in enumerate(profiles):
         profile_groups[p].append(i)
@@ -156,32 +490,32 @@ def build_matrix(client, sources: Sequence[Point], targets: Sequence[Point], pro
     num_people = len(sources)
     num_targets = len(targets)
     durations = np.full((num_people, num_targets), np.inf, dtype=float)
+    source_points = _lonlat_list(sources)
+    target_points = _lonlat_list(targets)
 
     # Для каждой группы (один тип транспорта — один запрос)
     for profile, idxs in profile_groups.items():
-        group_sources = [sources[i] for i in idxs]
-        start_points = [[p.x, p.y] for p in group_sources]
-        target_points = [[p.x, p.y] for p in targets]
-
-        # Один API-запрос для этой группы
-        result = client.matrix(
-            locations=start_points + target_points,
-            profile=profile,
-            sources=list(range(len(start_points))),
-            destinations=list(
-                range(len(start_points), len(start_points) + len(target_points))
-            ),
-            metrics=["duration"],
+        start_points = [source_points[i] for i in idxs]
+        group_durations = _cached_durations(
+            client, start_points, target_points, profile, cache_to_use, stats
         )
 
         # Добавляем данные в общую матрицу
-        for row_i, person_i in enumerate(idxs):
-            durations[person_i, :] = result.durations[row_i]
+        durations[idxs, :] = group_durations
 
     return durations
 
 
-def build_main_vector(client, candidates: Sequence[Point], dest: Point, profile: str):
+def build_main_vector(
+    client,
+    candidates: Sequence[Point],
+    dest: Point,
+    profile: str,
+    *,
+    cache: Optional[MatrixCellCache] = None,
+    use_cache: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+):
     """
     Матрица времени от кандидатов до пункта назначения.
     Отличие от основного вызова лишь в формате ответа:
@@ -192,18 +526,36 @@ def build_main_vector(client, candidates: Sequence[Point], dest: Point, profile:
     if client is None:
         raise MeetpointDependencyError("ORS client is not configured")
 
-    start_points = [[p.x, p.y] for p in candidates]
-    target_points = [[dest.x, dest.y]]
-    result = client.matrix(
-        locations=start_points + target_points,
-        profile=profile,
-        sources=list(range(len(start_points))),
-        destinations=[len(start_points)],
-        metrics=["duration"],
+    # Оценки офлайн-клиента (SpeedModelClient) не должны попадать в кэш реальных матриц.
+    cache_to_use = (cache or matrix_cache) if use_cache and getattr(client, "cacheable", True) else None
+    start_points = _lonlat_list(candidates)
+    target_points = [list(_xy(dest))]
+    durations = _cached_durations(
+        client, start_points, target_points, profile, cache_to_use, stats
     )
-    return np.array([r[0] for r in result.durations], dtype=float)
+    return durations[:, 0]
 
 
+def objective_values(
+    matrix_people_to_meetpoint,
+    vector_meetpoint_to_dest,
+    type_of_meetpoint: str,
+) -> np.ndarray:
+    """Значение критерия для каждого кандидата (недоступные кандидаты — np.inf)."""
+    people_count = matrix_people_to_meetpoint.shape[0]
+    if type_of_meetpoint == "minisum":
+        obj = np.sum(matrix_people_to_meetpoint, axis=0)
+        if vector_meetpoint_to_dest is not None:
+            obj = obj + people_count * vector_meetpoint_to_dest
+    elif type_of_meetpoint == "minimax":
+        obj = np.max(matrix_people_to_meetpoint, axis=0)
+        if vector_meetpoint_to_dest is not None:
+            obj = obj + vector_meetpoint_to_dest
+    else:
+        raise ValueError("type_of_meetpoint должен быть 'minisum' или 'minimax'")
+    return np.where(np.isnan(obj), np.inf, obj)
+
+
 def find_optimal_meetpoint(
     matrix_people_to_meetpoint,
     vector_meetpoint_to_dest,
@@ -211,35 +563,146 @@ def find_optimal_meetpoint(
     type_of_meetpoint: str,
 ):
     """Находит оптимальную точку встречи в зависимости от критерия и наличия конечной точки."""
-    people_count = matrix_people_to_meetpoint.shape[0]
-    if vector_meetpoint_to_dest is None:
-        if type_of_meetpoint == "minisum":
-            sum_obj = np.sum(matrix_people_to_meetpoint, axis=0)
-            sum_obj = np.where(np.isnan(sum_obj), np.inf, sum_obj)
-            j_sum = np.argmin(sum_obj)
-            return candidates[j_sum]
-        elif type_of_meetpoint == "minimax":
-            max_obj = np.max(matrix_people_to_meetpoint, axis=0)
-            max_obj = np.where(np.isnan(max_obj), np.inf, max_obj)
-            j_max = np.argmin(max_obj)
-            return candidates[j_max]
-        else:
-            raise ValueError("type_of_meetpoint должен быть 'minisum' или 'minimax'")
+    obj = objective_values(
+        matrix_people_to_meetpoint, vector_meetpoint_to_dest, type_of_meetpoint
+    )
+    return candidates[int(np.argmin(obj))]
 
-    if type_of_meetpoint == "minisum":
-        sum_persons = np.sum(matrix_people_to_meetpoint, axis=0)
-        sum_obj = sum_persons + people_count * vector_meetpoint_to_dest
-        sum_obj = np.where(np.isnan(sum_obj), np.inf, sum_obj)
-        j_sum = np.argmin(sum_obj)
-        return candidates[j_sum]
-    elif type_of_meetpoint == "minimax":
-        max_arr = np.max(matrix_people_to_meetpoint, axis=0)
-        max_obj = max_arr + vector_meetpoint_to_dest
-        max_obj = np.where(np.isnan(max_obj), np.inf, max_obj)
-        j_max = np.argmin(max_obj)
-        return candidates[j_max]
-    else:
-        raise ValueError("type_of_meetpoint должен быть 'minisum' или 'minimax'")
+
+def _evaluate_candidates(
+    client,
+    points: Sequence[Point],
+    candidates: Sequence[Point],
+    people_profiles: Sequence[str],
+    dest_point,
+    dest_profile: str,
+    type_of_meetpoint: str,
+    cache_stats: Dict[str, int],
+) -> np.ndarray:
+    """Запрашивает матрицы для кандидатов и возвращает значения критерия."""
+    matrix_people = build_matrix(
+        client, points, candidates, people_profiles, stats=cache_stats
+    )
+    vector_dest = None
+    if dest_point is not None:
+        vector_dest = build_main_vector(
+            client, candidates, dest_point, dest_profile, stats=cache_stats
+        )
+    return objective_values(matrix_people, vector_dest, type_of_meetpoint)
+
+
+def _evaluate_with_pruning(
+    evaluate,
+    lower: np.ndarray,
+    known: np.ndarray,
+    keep_top: int,
+    rank: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, int]:
+    """Считает критерий только у кандидатов, которые могут войти в лучшие.
+
+    Если прошлые стадии (``known``) ещё не дали порога, сначала запрашиваются
+    кандидаты, лучшие по оценке ``rank`` (по умолчанию — по нижней границе
+    ``lower``). Затем запрашиваются только те, чья граница не больше
+    ``keep_top``-го лучшего значения среди посчитанных: остальные не войдут в
+    ``keep_top`` лучших, поэтому результат совпадает с полным перебором сетки.
+    Отброшенным кандидатам достаётся ``np.inf``; вторым значением
+    возвращается их число. Более мелкие партии почти не добавляют отсечений,
+    но умножают число запросов к ORS.
+    """
+    objective = np.full(len(lower), np.inf)
+    pending = np.ones(len(lower), dtype=bool)
+    best = np.sort(known[np.isfinite(known)])[:keep_top]
+    if len(best) < keep_top:
+        seed = np.argsort(lower if rank is None else rank, kind="stable")[: max(MIN_STAGE_CANDIDATES, keep_top)]
+        values = evaluate(seed)
+        objective[seed] = values
+        pending[seed] = False
+        best = np.sort(np.concatenate([best, values[np.isfinite(values)]]))[:keep_top]
+    evaluated = int((~pending).sum())
+    if len(best) >= keep_top:
+        pending &= lower <= best[keep_top - 1]
+    rest = np.flatnonzero(pending)
+    if rest.size:
+        objective[rest] = evaluate(rest)
+    return objective, len(lower) - evaluated - rest.size
+
+
+def _pattern_search(
+    evaluate,
+    start: np.ndarray,
+    start_value: float,
+    step: Tuple[float, float],
+    *,
+    max_cells: int,
+    rows: int,
+    lower_bound=None,
+    min_step_m: float = POLISH_MIN_STEP_M,
+) -> Tuple[np.ndarray, float, Dict[str, object]]:
+    """Компасный поиск минимума критерия вокруг лучшей точки сетки.
+
+    На каждой итерации одним запросом считаются до четырёх соседей на
+    расстоянии текущего шага (в метрах, начиная с половины шага сетки ``step``)
+    по осям; при улучшении точка сдвигается, иначе шаг делится пополам.
+    Поиск заканчивается, когда шаг меньше ``min_step_m`` или исчерпан бюджет
+    ``max_cells`` (``rows`` ячеек на точку). Соседи, чья нижняя граница
+    ``lower_bound`` не меньше текущего значения, не запрашиваются.
+    """
+    best = np.asarray(start, dtype=float)
+    best_value = float(start_value)
+    step_x, step_y = step[0] / 2, step[1] / 2
+    known: Dict[Tuple[float, float], float] = {}
+    cells = iterations = pruned = 0
+    while max(step_x, step_y) >= min_step_m:
+        affordable = (max_cells - cells) // rows
+        if affordable <= 0:
+            break
+        offsets = np.array([[step_x, 0.0], [-step_x, 0.0], [0.0, step_y], [0.0, -step_y]])
+        scale = np.array([EARTH_RADIUS_M * np.cos(np.radians(best[1])), EARTH_RADIUS_M])
+        poll = best + np.degrees(offsets / scale)
+        keys = list(map(tuple, np.round(poll, 7).tolist()))
+        values = np.array([known.get(key, np.nan) for key in keys])
+        need = np.flatnonzero(np.isnan(values))
+        if lower_bound is not None and need.size:
+            hopeless = lower_bound(poll[need]) >= best_value
+            values[need[hopeless]] = np.inf
+            pruned += int(hopeless.sum())
+            need = need[~hopeless]
+        need = need[:affordable]
+        if need.size:
+            values[need] = evaluate(poll[need])
+            cells += need.size * rows
+        for i, key in enumerate(keys):
+            if not np.isnan(values[i]):
+                known[key] = float(values[i])
+        iterations += 1
+        values = np.where(np.isnan(values), np.inf, values)
+        winner = int(np.argmin(values))
+        if values[winner] < best_value:
+            best, best_value = poll[winner], float(values[winner])
+        else:
+            step_x, step_y = step_x / 2, step_y / 2
+    info = {
+        "iterations": iterations,
+        "cells": cells,
+        "candidates_pruned": pruned,
+        "final_step": {"x": float(step_x), "y": float(step_y)},
+    }
+    return best, best_value, info
+
+
+def _stage_summary(
+    name: str, candidates: int, rows: int, step, objective: np.ndarray, started: float, pruned: int = 0
+) -> Dict[str, object]:
+    best = float(np.min(objective)) if objective.size else float("inf")
+    return {
+        "stage": name,
+        "candidates": candidates,
+        "cells": candidates * rows,
+        "cells_pruned": pruned * rows,
+        "step": {"x": float(step[0]), "y": float(step[1])},
+        "best_objective": best if np.isfinite(best) else None,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
 
 def compute_best_meetpoint(
@@ -251,9 +714,32 @@ def compute_best_meetpoint(
     type_of_meetpoint: str = "minisum",
     api_key: Optional[str] = None,
     client_instance=None,
+    cell_budget: Optional[int] = None,
+    refine_levels: int = REFINE_LEVELS,
+    refine_top_k: int = REFINE_TOP_K,
+    engine: Optional[str] = None,
+    prune: Optional[bool] = None,
+    polish_cells: Optional[int] = None,
 ) -> Tuple[Dict[str, float], Dict[str, object]]:
     """High-level helper that orchestrates the meetpoint search pipeline.
 
+    The search runs a coarse grid over the whole area and then ``refine_levels``
+    successively finer local grids around the ``refine_top_k`` best candidates
+    found so far. All stages share ``cell_budget`` matrix cells (rows are
+    people plus the destination vector). ``engine`` selects the spatial backend
+    (``"numpy"`` by default, ``"geopandas"`` on request).
+
+    With ``prune`` (``MEETPOINT_PRUNING`` by default) candidates are evaluated
+    in order of a haversine / max-speed lower bound and skipped once the bound
+    exceeds the best objectives found so far; stage grids, the refinement
+    seeds and the result are the same as without pruning.
+
+    The grid optimum is then polished by a compass pattern search that spends
+    at most ``polish_cells`` matrix cells (``MEETPOINT_POLISH_CELLS`` by
+    default, ``0`` disables it) out of the same ``cell_budget``: up to a quarter
+    of the budget is held back from the grids for it, and it may also use what
+    the grids left. ``meta["polish"]`` reports the improvement.
+
     Returns a tuple ``(coordinates, meta)`` where ``coordinates`` is a mapping with
     ``lat`` and ``lng`` keys and ``meta`` contains diagnostic information.
     """
@@ -267,17 +753,21 @@ def compute_best_meetpoint(
     if normalized_type not in {"minisum", "minimax"}:
         raise ValueError("type_of_meetpoint должен быть 'minisum' или 'minimax'")
 
-    _ensure_spatial_dependencies()
+    engine_name = _resolve_engine(engine)
+    if engine_name == "geopandas":
+        _ensure_spatial_dependencies()
 
     try:
-        points = [Point(float(item["lng"]), float(item["lat"])) for item in people_coordinates]
+        points = np.array(
+            [[float(item["lng"]), float(item["lat"])] for item in people_coordinates]
+        )
     except (KeyError, TypeError, ValueError) as exc:
         raise ValueError("invalid people_coordinates entry") from exc
 
-    dest_point: Optional[Point] = None
+    dest_point: Optional[np.ndarray] = None
     if destination is not None:
         try:
-            dest_point = Point(float(destination["lng"]), float(destination["lat"]))
+            dest_point = np.array([float(destination["lng"]), float(destination["lat"])])
         except (KeyError, TypeError, ValueError) as exc:
             raise ValueError("invalid destination coordinates") from exc
 
@@ -288,28 +778,169 @@ def compute_best_meetpoint(
         else:
             client_to_use = _build_client(api_key)
 
-    search_area = create_base_search_area(points)
-    candidates, (x_step, y_step) = generate_candidates(search_area, points)
-    matrix_people = build_matrix(client_to_use, points, candidates, people_profiles)
-
-    vector_dest = None
-    if dest_point is not None:
-        dest_profile = destination_profile or "driving-car"
-        vector_dest = build_main_vector(client_to_use, candidates, dest_point, dest_profile)
-
-    best_point = find_optimal_meetpoint(
-        matrix_people,
-        vector_dest,
-        candidates,
-        normalized_type,
+    budget = int(cell_budget or MEETPOINT_CELL_BUDGET)
+    rows = len(points) + (1 if dest_point is not None else 0)
+    dest_profile = destination_profile or "driving-car"
+    cache_stats: Dict[str, int] = {"hits": 0, "misses": 0, "requested": 0}
+    use_pruning = MEETPOINT_PRUNING if prune is None else bool(prune)
+    pruning = {"enabled": use_pruning, "candidates_pruned": 0, "cells_pruned": 0}
+
+    def request(subset) -> np.ndarray:
+        return _evaluate_candidates(
+            client_to_use,
+            points,
+            subset,
+            people_profiles,
+            dest_point,
+            dest_profile,
+            normalized_type,
+            cache_stats,
+        )
+
+    def lower_bound(subset) -> np.ndarray:
+        return lower_bound_objective(
+            points, subset, people_profiles, dest_point, dest_profile, normalized_type
+        )
+
+    def evaluate(stage_candidates, known: np.ndarray, keep_top: int) -> Tuple[np.ndarray, int]:
+        if not use_pruning:
+            return request(stage_candidates), 0
+        lower = lower_bound(stage_candidates)
+        rank = None
+        if len(known) < keep_top and getattr(client_to_use, "cacheable", True):
+            model = get_speed_model()
+            rank = objective_values(
+                model.matrix(points, stage_candidates, people_profiles),
+                None
+                if dest_point is None
+                else model.durations(stage_candidates, dest_point.reshape(1, 2), dest_profile)[:, 0],
+                normalized_type,
+            )
+        stage_objective, pruned = _evaluate_with_pruning(
+            lambda idx: request(stage_candidates[idx]), lower, known, keep_top, rank
+        )
+        pruning["candidates_pruned"] += pruned
+        pruning["cells_pruned"] += pruned * rows
+        return stage_objective, pruned
+
+    # Уточнение входит в общий бюджет: сеткам достаётся бюджет за вычетом резерва на него.
+    polish_budget = max(0, MEETPOINT_POLISH_CELLS if polish_cells is None else int(polish_cells))
+    grid_budget = budget - min(polish_budget, budget // 4)
+
+    # Стадия 1: грубая сетка по всей области.
+    started = time.perf_counter()
+    coarse_cells = grid_budget * COARSE_BUDGET_SHARE if refine_levels > 0 else grid_budget
+    search_area = create_base_search_area(points, engine=engine_name)
+    candidates, step = generate_candidate_grid(
+        search_area, points, max_cells=coarse_cells, rows=rows
     )
-
-    coordinates = {"lat": float(best_point.y), "lng": float(best_point.x)}
+    # Шаг сетки не больше пятой части области (см. _grid_step), поэтому при малом
+    # бюджете точек больше, чем он позволяет: равномерно прореживаем сетку.
+    coarse_limit = max(1, int(grid_budget // rows))
+    if len(candidates) > coarse_limit:
+        candidates = candidates[np.linspace(0, len(candidates) - 1, coarse_limit).round().astype(int)]
+    # Стадии, за которыми следует уточнение, должны сохранить refine_top_k лучших кандидатов.
+    objective, pruned = evaluate(candidates, np.empty(0), max(1, refine_top_k) if refine_levels > 0 else 1)
+    stages = [_stage_summary("coarse", len(candidates), rows, step, objective, started, pruned)]
+    evaluated = candidates
+    seen = set(map(tuple, np.round(candidates, 7).tolist()))
+    cells_used = len(candidates) * rows
+
+    # Стадии 2..N: всё более мелкие локальные сетки вокруг лучших кандидатов.
+    for level in range(refine_levels):
+        remaining = grid_budget - cells_used
+        level_cells = remaining / (refine_levels - level)
+        finite = np.flatnonzero(np.isfinite(objective))
+        if not finite.size or level_cells < rows * MIN_STAGE_CANDIDATES:
+            break
+
+        started = time.perf_counter()
+        top = finite[np.argsort(objective[finite], kind="stable")[:refine_top_k]]
+        area_cells = level_cells / len(top)
+        local_grids = []
+        next_step = step
+        for idx in top:
+            local_area = create_local_search_area(evaluated[idx], *step, engine=engine_name)
+            local_candidates, next_step = generate_candidate_grid(
+                local_area, points, max_cells=area_cells, rows=rows
+            )
+            local_grids.append(local_candidates)
+
+        stage_candidates = np.concatenate(local_grids)
+        fresh = []
+        for i, key in enumerate(map(tuple, np.round(stage_candidates, 7).tolist())):
+            if key not in seen:
+                seen.add(key)
+                fresh.append(i)
+        stage_candidates = stage_candidates[fresh][: int(remaining // rows)]
+        if not len(stage_candidates):
+            break
+        keep_top = max(1, refine_top_k) if level < refine_levels - 1 else 1
+        stage_objective, pruned = evaluate(stage_candidates, objective, keep_top)
+        stages.append(
+            _stage_summary(
+                f"refine_{level + 1}", len(stage_candidates), rows, next_step, stage_objective, started, pruned
+            )
+        )
+        evaluated = np.concatenate([evaluated, stage_candidates])
+        objective = np.concatenate([objective, stage_objective])
+        cells_used += len(stage_candidates) * rows
+        step = next_step
+
+    best_index = int(np.argmin(objective))
+    best_point, best_value = evaluated[best_index], float(objective[best_index])
+    polish_budget = min(polish_budget, budget - cells_used)
+    polish: Dict[str, object] = {"enabled": polish_budget >= rows and bool(np.isfinite(best_value))}
+    if polish["enabled"]:
+        started = time.perf_counter()
+        polished_point, polished_value, info = _pattern_search(
+            request,
+            best_point,
+            best_value,
+            step,
+            max_cells=polish_budget,
+            rows=rows,
+            lower_bound=lower_bound if use_pruning else None,
+        )
+        stages.append(
+            _stage_summary(
+                "polish",
+                info["cells"] // rows,
+                rows,
+                (info["final_step"]["x"], info["final_step"]["y"]),
+                np.array([polished_value]),
+                started,
+                info["candidates_pruned"],
+            )
+        )
+        cells_used += info["cells"]
+        improvement = best_value - polished_value
+        polish.update(info)
+        polish.update(
+            {
+                "grid_objective": best_value,
+                "objective": polished_value,
+                "improvement": improvement,
+                "improvement_pct": round(improvement / best_value * 100, 3) if best_value else 0.0,
+            }
+        )
+        best_point = polished_point
+
+    best_lng, best_lat = best_point
+
+    coordinates = {"lat": float(best_lat), "lng": float(best_lng)}
     meta = {
-        "candidates": len(candidates),
-        "step": {"x": float(x_step), "y": float(y_step)},
+        "candidates": len(evaluated),
+        "step": {"x": float(step[0]), "y": float(step[1])},
         "type_of_meetpoint": normalized_type,
         "destination_included": dest_point is not None,
+        "matrix_cache": cache_stats,
+        "cell_budget": budget,
+        "cells_used": cells_used,
+        "pruning": pruning,
+        "polish": polish,
+        "stages": stages,
+        "engine": engine_name,
     }
 
     return coordinates, meta
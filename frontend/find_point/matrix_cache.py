@@ -0,0 +1,211 @@
+"""Persistent cell-level cache for travel-time matrices."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Outside the source tree: APP_STATE_DIR, or meetpoint/ under the system temp directory.
+DEFAULT_CACHE_PATH = Path(os.getenv("APP_STATE_DIR") or Path(tempfile.gettempdir()) / "meetpoint") / "matrix_cells.sqlite3"
+# SQLite limits the number of bound parameters per statement.
+_SQL_CHUNK = 900
+# Eviction scans the table, so it runs once per 1% of max_entries written or per interval (s).
+_EVICT_FRACTION = 0.01
+_EVICT_INTERVAL = 60.0
+
+Coordinate = Sequence[float]
+
+
+class MatrixCellCache:
+    """Travel durations cached per matrix cell ``(source, target, profile)``.
+
+    Coordinates are quantized to ``precision`` decimal digits so repeated
+    requests from the same group land on already computed cells. The store is
+    a SQLite file in WAL mode shared by all gunicorn workers and kept across
+    restarts. Cells older than ``ttl`` seconds are ignored and the least
+    recently used ones are evicted once ``max_entries`` is exceeded (checked
+    in batches, so the table may briefly hold about 1% more).
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        ttl: float = 86400.0,
+        max_entries: int = 500_000,
+        precision: int = 5,
+    ) -> None:
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.precision = int(precision)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._evict_batch = max(1, int(self.max_entries * _EVICT_FRACTION))
+        self._written_since_evict = 0
+        self._last_evict = 0.0
+
+    # ------------------------------------------------------------------ keys
+    def make_key(self, source: Coordinate, target: Coordinate, profile: str) -> str:
+        p = self.precision
+        return (
+            f"{profile}|{float(source[0]):.{p}f},{float(source[1]):.{p}f}"
+            f"|{float(target[0]):.{p}f},{float(target[1]):.{p}f}"
+        )
+
+    @staticmethod
+    def parse_key(key: str) -> Tuple[str, Tuple[float, float], Tuple[float, float]]:
+        profile, source, target = key.split("|")
+        s_lon, s_lat = (float(v) for v in source.split(","))
+        t_lon, t_lat = (float(v) for v in target.split(","))
+        return profile, (s_lon, s_lat), (t_lon, t_lat)
+
+    # -------------------------------------------------------------- storage
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork into worker processes.
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cells ("
+                "key TEXT PRIMARY KEY, duration REAL NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cells_accessed ON cells(accessed)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """Return cached durations for the given keys, skipping expired cells."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, float] = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                for start in range(0, len(keys), _SQL_CHUNK):
+                    chunk = keys[start : start + _SQL_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, duration FROM cells WHERE created >= ? AND key IN ({marks})",
+                        [now - self.ttl, *chunk],
+                    ).fetchall()
+                    found.update(rows)
+                hit_keys = list(found)
+                for start in range(0, len(hit_keys), _SQL_CHUNK):
+                    chunk = hit_keys[start : start + _SQL_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    conn.execute(f"UPDATE cells SET accessed = ? WHERE key IN ({marks})", [now, *chunk])
+        except sqlite3.Error as exc:
+            logger.warning("Matrix cache read failed, treating cells as missing: %s", exc)
+            return {}
+        return found
+
+    def put_many(self, items: Dict[str, float]) -> None:
+        """Store finite durations and evict stale or least recently used cells."""
+        now = time.time()
+        rows = [(key, float(value), now, now) for key, value in items.items() if np.isfinite(value)]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?)", rows)
+                    self._written_since_evict += len(rows)
+                    if self._written_since_evict >= self._evict_batch or now - self._last_evict >= _EVICT_INTERVAL:
+                        self._evict(conn, now)
+                        self._written_since_evict = 0
+                        self._last_evict = now
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as exc:
+            logger.warning("Matrix cache write failed: %s", exc)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cells WHERE created < ?", (now - self.ttl,))
+        if self.max_entries <= 0:
+            return
+        (count,) = conn.execute("SELECT COUNT(*) FROM cells").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cells WHERE key IN (SELECT key FROM cells ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+
+    def iter_cells(
+        self, profile: Optional[str] = None, *, limit: Optional[int] = None
+    ) -> Iterator[Tuple[str, Tuple[float, float], Tuple[float, float], float]]:
+        """Yield ``(profile, source, target, duration)`` for every live cell.
+
+        With ``limit`` only the most recently used cells are read.
+        """
+        query = "SELECT key, duration FROM cells WHERE created >= ?"
+        params: List[object] = [time.time() - self.ttl]
+        if profile is not None:
+            query += " AND key >= ? AND key < ?"
+            params += [f"{profile}|", f"{profile}}}"]
+        if limit is not None:
+            query += " ORDER BY accessed DESC LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(query, params).fetchall()
+        for key, duration in rows:
+            cell_profile, source, target = self.parse_key(key)
+            if profile is None or cell_profile == profile:
+                yield cell_profile, source, target, duration
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM cells")
+
+    # --------------------------------------------------------------- matrix
+    def lookup(
+        self, sources: Sequence[Coordinate], targets: Sequence[Coordinate], profile: str
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(durations, missing)`` arrays of shape ``(len(sources), len(targets))``."""
+        keys: List[List[str]] = [[self.make_key(s, t, profile) for t in targets] for s in sources]
+        found = self.get_many(key for row in keys for key in row)
+        durations = np.full((len(sources), len(targets)), np.nan, dtype=float)
+        for i, row in enumerate(keys):
+            for j, key in enumerate(row):
+                value = found.get(key)
+                if value is not None:
+                    durations[i, j] = value
+        return durations, np.isnan(durations)
+
+    def store(
+        self,
+        sources: Sequence[Coordinate],
+        targets: Sequence[Coordinate],
+        profile: str,
+        durations: np.ndarray,
+    ) -> None:
+        items = {
+            self.make_key(s, t, profile): durations[i, j]
+            for i, s in enumerate(sources)
+            for j, t in enumerate(targets)
+        }
+        self.put_many(items)
@@ -0,0 +1,192 @@
+"""Lightweight UTM projection and search rectangles implemented with NumPy.
+
+Mirrors what the geopandas pipeline does with ``estimate_utm_crs``/``to_crs``
+(transverse Mercator on WGS84, Krüger series) without importing the
+geopandas/pyproj stack. Accuracy is millimetre-level inside a UTM zone.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+UTM_K0 = 0.9996
+UTM_FALSE_EASTING = 500000.0
+UTM_FALSE_NORTHING_SOUTH = 10000000.0
+EARTH_RADIUS_M = 6_371_008.8
+
+_N = WGS84_F / (2 - WGS84_F)
+_A = WGS84_A / (1 + _N) * (1 + _N**2 / 4 + _N**4 / 64)
+_ALPHA = (
+    _N / 2 - 2 * _N**2 / 3 + 5 * _N**3 / 16,
+    13 * _N**2 / 48 - 3 * _N**3 / 5,
+    61 * _N**3 / 240,
+)
+_BETA = (
+    _N / 2 - 2 * _N**2 / 3 + 37 * _N**3 / 96,
+    _N**2 / 48 + _N**3 / 15,
+    17 * _N**3 / 480,
+)
+_DELTA = (
+    2 * _N - 2 * _N**2 / 3 - 2 * _N**3,
+    7 * _N**2 / 3 - 8 * _N**3 / 5,
+    56 * _N**3 / 15,
+)
+_E_FACTOR = 2 * np.sqrt(_N) / (1 + _N)
+
+# shapely buffers a point with 8 segments per quarter circle.
+_BUFFER_ANGLES = np.linspace(0.0, 2 * np.pi, 32, endpoint=False)
+
+
+def utm_zone(lon: float) -> int:
+    """UTM zone number for a longitude in degrees."""
+    return int(min(max((lon + 180.0) // 6 + 1, 1), 60))
+
+
+@dataclass(frozen=True)
+class UTMProjection:
+    """Forward/inverse transverse Mercator for one UTM zone."""
+
+    zone: int
+    south: bool = False
+
+    @classmethod
+    def for_lonlat(cls, lon: float, lat: float) -> "UTMProjection":
+        return cls(zone=utm_zone(lon), south=lat < 0)
+
+    @property
+    def epsg(self) -> int:
+        return (32700 if self.south else 32600) + self.zone
+
+    @property
+    def crs(self) -> str:
+        return f"EPSG:{self.epsg}"
+
+    @property
+    def central_meridian(self) -> float:
+        return self.zone * 6.0 - 183.0
+
+    def forward(self, lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+        """Project WGS84 ``lon, lat`` (degrees) to UTM ``x, y`` (metres)."""
+        phi = np.radians(np.asarray(lat, dtype=float))
+        dlam = np.radians(np.asarray(lon, dtype=float) - self.central_meridian)
+        sin_phi = np.sin(phi)
+        t = np.sinh(np.arctanh(sin_phi) - _E_FACTOR * np.arctanh(_E_FACTOR * sin_phi))
+        xi_p = np.arctan2(t, np.cos(dlam))
+        eta_p = np.arctanh(np.sin(dlam) / np.sqrt(1 + t * t))
+
+        xi = xi_p.copy()
+        eta = eta_p.copy()
+        for j, alpha in enumerate(_ALPHA, start=1):
+            xi += alpha * np.sin(2 * j * xi_p) * np.cosh(2 * j * eta_p)
+            eta += alpha * np.cos(2 * j * xi_p) * np.sinh(2 * j * eta_p)
+
+        x = UTM_FALSE_EASTING + UTM_K0 * _A * eta
+        y = UTM_K0 * _A * xi
+        if self.south:
+            y = y + UTM_FALSE_NORTHING_SOUTH
+        return x, y
+
+    def inverse(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """Unproject UTM ``x, y`` (metres) back to WGS84 ``lon, lat`` (degrees)."""
+        northing = np.asarray(y, dtype=float)
+        if self.south:
+            northing = northing - UTM_FALSE_NORTHING_SOUTH
+        xi = northing / (UTM_K0 * _A)
+        eta = (np.asarray(x, dtype=float) - UTM_FALSE_EASTING) / (UTM_K0 * _A)
+
+        xi_p = xi.copy()
+        eta_p = eta.copy()
+        for j, beta in enumerate(_BETA, start=1):
+            xi_p -= beta * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+            eta_p -= beta * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+
+        chi = np.arcsin(np.sin(xi_p) / np.cosh(eta_p))
+        phi = chi.copy()
+        for j, delta in enumerate(_DELTA, start=1):
+            phi += delta * np.sin(2 * j * chi)
+
+        lon = self.central_meridian + np.degrees(np.arctan2(np.sinh(eta_p), np.cos(xi_p)))
+        return lon, np.degrees(phi)
+
+
+@dataclass(frozen=True)
+class SearchArea:
+    """Axis-aligned search rectangle in the metric coordinates of ``projection``."""
+
+    minx: float
+    miny: float
+    maxx: float
+    maxy: float
+    projection: UTMProjection
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self.minx, self.miny, self.maxx, self.maxy
+
+    @property
+    def crs(self) -> str:
+        return self.projection.crs
+
+    def contains_xy(self, x, y) -> np.ndarray:
+        """Strict interior test, same semantics as ``Polygon.contains``."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        return (x > self.minx) & (x < self.maxx) & (y > self.miny) & (y < self.maxy)
+
+    def to_wgs84(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        return self.projection.inverse(x, y)
+
+
+def base_search_area(lonlat: np.ndarray, buffer_m: float = 1000.0, point_buffer_deg: float = 0.01) -> SearchArea:
+    """Bounding rectangle of the points in UTM metres, widened by ``buffer_m``.
+
+    A single distinct point is first buffered by ``point_buffer_deg`` degrees,
+    like the geopandas pipeline does before projecting.
+    """
+    lonlat = np.asarray(lonlat, dtype=float).reshape(-1, 2)
+    if not len(lonlat):
+        raise ValueError("points collection cannot be empty")
+
+    if len(np.unique(lonlat, axis=0)) == 1:
+        lon0, lat0 = lonlat[0]
+        lonlat = np.column_stack(
+            [
+                lon0 + point_buffer_deg * np.cos(_BUFFER_ANGLES),
+                lat0 + point_buffer_deg * np.sin(_BUFFER_ANGLES),
+            ]
+        )
+
+    lon_min, lat_min = lonlat.min(axis=0)
+    lon_max, lat_max = lonlat.max(axis=0)
+    projection = UTMProjection.for_lonlat((lon_min + lon_max) / 2, (lat_min + lat_max) / 2)
+    x, y = projection.forward(lonlat[:, 0], lonlat[:, 1])
+    return SearchArea(
+        float(x.min() - buffer_m),
+        float(y.min() - buffer_m),
+        float(x.max() + buffer_m),
+        float(y.max() + buffer_m),
+        projection,
+    )
+
+
+def local_search_area(lonlat: Sequence[float], radius_m: float) -> SearchArea:
+    """Square of half-size ``radius_m`` metres around one WGS84 point."""
+    lon, lat = float(lonlat[0]), float(lonlat[1])
+    projection = UTMProjection.for_lonlat(lon, lat)
+    x, y = projection.forward(lon, lat)
+    x = float(x)
+    y = float(y)
+    return SearchArea(x - radius_m, y - radius_m, x + radius_m, y + radius_m, projection)
+
+
+def haversine_m(origins: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Great-circle distances in metres between ``(n, 2)`` and ``(m, 2)`` lon/lat arrays."""
+    lon1, lat1 = np.radians(origins[:, 0])[:, None], np.radians(origins[:, 1])[:, None]
+    lon2, lat2 = np.radians(targets[:, 0])[None, :], np.radians(targets[:, 1])[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
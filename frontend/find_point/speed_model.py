@@ -0,0 +1,215 @@
+"""Offline travel-time estimates from per-profile speed curves.
+
+A stand-in for the ORS Matrix API when routing is unavailable, and a cheap
+ranking signal before spending API quota. Durations are modelled as
+
+    t(d) = overhead + d * detour * (1 / cruise + (1 / short - 1 / cruise) * T / (d + T))
+
+for the straight-line distance ``d``: short trips crawl at ``short`` speed
+(lights, side streets), long ones approach ``cruise``, ``T`` sets the switch
+and ``overhead`` covers parking, unlocking a bike or waiting for a bus. The
+model is linear in ``(overhead, detour / cruise, detour * (1 / short - 1 / cruise))``,
+so calibrating it against cached real matrices is one least-squares solve.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if __package__ in {None, ""}:
+    from projection import EARTH_RADIUS_M, haversine_m  # type: ignore  # noqa: E402
+else:
+    from .projection import EARTH_RADIUS_M, haversine_m
+
+logger = logging.getLogger(__name__)
+
+KMH = 1 / 3.6
+# Cells needed before a profile's calibration replaces the defaults.
+MIN_CALIBRATION_CELLS = 50
+# Cells shorter than this are dominated by snapping noise and skipped.
+MIN_CALIBRATION_DISTANCE_M = 100.0
+
+
+@dataclass(frozen=True)
+class SpeedCurve:
+    """Speed curve, detour factor and fixed overhead of one profile."""
+
+    short_speed: float
+    cruise_speed: float
+    transition_m: float
+    detour: float
+    overhead: float
+
+    def coefficients(self) -> np.ndarray:
+        return np.array(
+            [
+                self.overhead,
+                self.detour / self.cruise_speed,
+                self.detour * (1 / self.short_speed - 1 / self.cruise_speed),
+            ]
+        )
+
+
+def _features(distance_m: np.ndarray, transition_m: float) -> np.ndarray:
+    return np.stack(
+        [
+            np.where(distance_m > 0, 1.0, 0.0),
+            distance_m,
+            distance_m * transition_m / (distance_m + transition_m),
+        ],
+        axis=-1,
+    )
+
+
+DEFAULT_CURVES: Dict[str, SpeedCurve] = {
+    # Parking and walking to the car at both ends.
+    "driving-car": SpeedCurve(18 * KMH, 55 * KMH, 4000.0, 1.3, 300.0),
+    "driving-hgv": SpeedCurve(15 * KMH, 45 * KMH, 4000.0, 1.3, 300.0),
+    "cycling-regular": SpeedCurve(12 * KMH, 16 * KMH, 2000.0, 1.2, 60.0),
+    "cycling-road": SpeedCurve(14 * KMH, 22 * KMH, 2000.0, 1.2, 60.0),
+    "cycling-mountain": SpeedCurve(10 * KMH, 14 * KMH, 2000.0, 1.2, 60.0),
+    "cycling-electric": SpeedCurve(15 * KMH, 20 * KMH, 2000.0, 1.2, 60.0),
+    "foot-walking": SpeedCurve(5 * KMH, 5 * KMH, 1000.0, 1.25, 0.0),
+    "foot-hiking": SpeedCurve(4.5 * KMH, 4.5 * KMH, 1000.0, 1.25, 0.0),
+    "wheelchair": SpeedCurve(3.5 * KMH, 3.5 * KMH, 1000.0, 1.3, 0.0),
+    # Walking to the stop and waiting dominate short trips.
+    "public-transport": SpeedCurve(6 * KMH, 25 * KMH, 2500.0, 1.3, 420.0),
+}
+DEFAULT_PROFILE = "driving-car"
+
+
+class SpeedModel:
+    """Travel-time matrices from :class:`SpeedCurve` s, optionally calibrated."""
+
+    def __init__(self, curves: Optional[Dict[str, SpeedCurve]] = None) -> None:
+        self.curves: Dict[str, SpeedCurve] = dict(DEFAULT_CURVES if curves is None else curves)
+        self._coefficients: Dict[str, np.ndarray] = {}
+        self.calibration: Dict[str, Dict[str, object]] = {}
+
+    def curve(self, profile: str) -> SpeedCurve:
+        return self.curves.get(profile) or self.curves.get(DEFAULT_PROFILE) or DEFAULT_CURVES[DEFAULT_PROFILE]
+
+    def durations(self, sources: np.ndarray, targets: np.ndarray, profile: str) -> np.ndarray:
+        """``len(sources) x len(targets)`` durations in seconds for one profile."""
+        curve = self.curve(profile)
+        distance = haversine_m(np.asarray(sources, dtype=float).reshape(-1, 2), np.asarray(targets, dtype=float).reshape(-1, 2))
+        coefficients = self._coefficients.get(profile, curve.coefficients())
+        return _features(distance, curve.transition_m) @ coefficients
+
+    def matrix(self, sources: np.ndarray, targets: np.ndarray, profiles: Sequence[str]) -> np.ndarray:
+        """Durations shaped like ``build_matrix``: one row per person with their own profile."""
+        sources = np.asarray(sources, dtype=float).reshape(-1, 2)
+        result = np.empty((len(sources), len(targets)), dtype=float)
+        groups: Dict[str, List[int]] = {}
+        for index, profile in enumerate(profiles):
+            groups.setdefault(profile, []).append(index)
+        for profile, rows in groups.items():
+            result[rows] = self.durations(sources[rows], targets, profile)
+        return result
+
+    def calibrate(
+        self,
+        cells: Iterable[Tuple[str, Sequence[float], Sequence[float], float]],
+        *,
+        min_cells: int = MIN_CALIBRATION_CELLS,
+    ) -> Dict[str, Dict[str, object]]:
+        """Fit coefficients per profile to real ``(profile, source, target, duration)`` cells.
+
+        Profiles with fewer than ``min_cells`` usable cells keep their curve.
+        Coefficients are kept non-negative so durations stay monotone in
+        distance. Returns (and stores in ``calibration``) the median absolute
+        percentage error before and after the fit.
+        """
+        samples: Dict[str, List[Tuple[float, float, float, float, float]]] = {}
+        for profile, source, target, duration in cells:
+            if duration is not None and np.isfinite(duration) and duration > 0:
+                samples.setdefault(profile, []).append((*source, *target, float(duration)))
+
+        report: Dict[str, Dict[str, object]] = {}
+        for profile, rows in samples.items():
+            data = np.array(rows, dtype=float)
+            distance = _pairwise_m(data[:, :4])
+            usable = distance >= MIN_CALIBRATION_DISTANCE_M
+            distance, duration = distance[usable], data[usable, 4]
+            curve = self.curve(profile)
+            features = _features(distance, curve.transition_m)
+            before = features @ self._coefficients.get(profile, curve.coefficients())
+            entry: Dict[str, object] = {"cells": int(usable.sum()), "mape_default": _mape(before, duration)}
+            if usable.sum() >= min_cells:
+                coefficients = _nonnegative_lstsq(features, duration)
+                self._coefficients[profile] = coefficients
+                entry["mape"] = _mape(features @ coefficients, duration)
+                entry["coefficients"] = [round(float(value), 6) for value in coefficients]
+            report[profile] = entry
+        self.calibration = report
+        return report
+
+    @classmethod
+    def from_cache(cls, cache, *, limit: Optional[int] = 20000, curves: Optional[Dict[str, SpeedCurve]] = None) -> "SpeedModel":
+        """Model calibrated on the ``limit`` most recently used cells of a ``MatrixCellCache``."""
+        model = cls(curves)
+        if cache is None:
+            return model
+        try:
+            report = model.calibrate(cache.iter_cells(limit=limit))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Speed model calibration failed, using default curves: %s", exc)
+            return model
+        logger.info("Speed model calibrated: %s", report)
+        return model
+
+
+def _pairwise_m(pairs: np.ndarray) -> np.ndarray:
+    """Great-circle distance of each ``(lon1, lat1, lon2, lat2)`` row, without the full matrix."""
+    lon1, lat1, lon2, lat2 = np.radians(pairs).T
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _nonnegative_lstsq(features: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Least squares with non-negative coefficients by dropping negative ones (3 unknowns)."""
+    active = list(range(features.shape[1]))
+    coefficients = np.zeros(features.shape[1])
+    while active:
+        solution, *_ = np.linalg.lstsq(features[:, active], target, rcond=None)
+        if (solution >= 0).all():
+            coefficients[active] = solution
+            break
+        active.pop(int(np.argmin(solution)))
+    return coefficients
+
+
+def _mape(estimate: np.ndarray, actual: np.ndarray) -> Optional[float]:
+    if not len(actual):
+        return None
+    return round(float(np.median(np.abs(estimate - actual) / actual)) * 100, 2)
+
+
+@dataclass
+class _MatrixResult:
+    durations: List[List[float]]
+
+
+class SpeedModelClient:
+    """Drop-in for the routingpy ORS client's ``matrix`` call backed by a :class:`SpeedModel`.
+
+    ``cacheable = False`` keeps estimates out of the matrix cell cache;
+    ``any_profile = True`` passes profiles ORS lacks (``public-transport``) through unchanged.
+    """
+
+    cacheable = False
+    any_profile = True
+
+    def __init__(self, model: Optional[SpeedModel] = None) -> None:
+        self.model = model or SpeedModel()
+
+    def matrix(self, locations, profile: str, sources=None, destinations=None, metrics=None) -> _MatrixResult:
+        locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+        sources = range(len(locations)) if sources is None else sources
+        destinations = range(len(locations)) if destinations is None else destinations
+        durations = self.model.durations(locations[list(sources)], locations[list(destinations)], profile)
+        return _MatrixResult(durations=durations.tolist())
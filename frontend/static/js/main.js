@@ -1582,7 +1582,8 @@ function persistFriendTransport(friend, state, previousMode) {
         var body = {
             start: {lat: startLat, lng: startLng},
             destination: {lat: destLat, lng: destLng},
-            transport: options.transport || 'driving'
+            transport: options.transport || 'driving',
+            format: 'polyline'
         };
         if (options.startName) {
             body.start_name = options.startName;
@@ -1620,6 +1621,64 @@ function persistFriendTransport(friend, state, previousMode) {
         return body;
     }
 
+    function decodePolyline(encoded, precision) {
+        var factor = Math.pow(10, typeof precision === 'number' ? precision : 5);
+        var coordinates = [];
+        var index = 0;
+        var lat = 0;
+        var lng = 0;
+        while (index < encoded.length) {
+            var deltas = [0, 0];
+            for (var k = 0; k < 2; k += 1) {
+                var result = 0;
+                var shift = 0;
+                var byte;
+                do {
+                    byte = encoded.charCodeAt(index) - 63;
+                    index += 1;
+                    result += (byte & 0x1f) * Math.pow(2, shift);
+                    shift += 5;
+                } while (byte >= 0x20);
+                deltas[k] = (result % 2) ? -(result + 1) / 2 : result / 2;
+            }
+            lat += deltas[0];
+            lng += deltas[1];
+            coordinates.push([lng / factor, lat / factor]);
+        }
+        return coordinates;
+    }
+
+    function expandCompactRoute(data) {
+        // Restores GeoJSON coordinates for responses requested with format=polyline.
+        if (!data || data.encoding !== 'polyline') {
+            return data;
+        }
+        (data.features || []).forEach(function (feature) {
+            var geometry = feature && feature.geometry;
+            if (geometry && geometry.encoding === 'polyline') {
+                geometry.coordinates = decodePolyline(geometry.polyline, geometry.precision);
+                delete geometry.polyline;
+                delete geometry.encoding;
+                delete geometry.precision;
+            }
+        });
+        var graph = data.properties && data.properties.graph;
+        if (graph && graph.nodes_encoding === 'polyline') {
+            var nodeCoords = decodePolyline(graph.nodes_polyline, graph.nodes_precision);
+            graph.nodes.forEach(function (node, idx) {
+                if (nodeCoords[idx]) {
+                    node.lng = nodeCoords[idx][0];
+                    node.lat = nodeCoords[idx][1];
+                }
+            });
+            delete graph.nodes_polyline;
+            delete graph.nodes_encoding;
+            delete graph.nodes_precision;
+        }
+        delete data.encoding;
+        return data;
+    }
+
     function requestRoute(body, label) {
         return fetch('/api/quick_route', {
             method: 'POST',
@@ -1628,7 +1687,7 @@ function persistFriendTransport(friend, state, previousMode) {
         })
             .then(function (response) {
                 return response.text().then(function (rawText) {
-                    var data = rawText ? JSON.parse(rawText) : null;
+                    var data = rawText ? expandCompactRoute(JSON.parse(rawText)) : null;
                     if (!response.ok || !data) {
                         log('Ошибка маршрута (' + label + '): ' + (rawText || ('HTTP ' + response.status)));
                         return null;
@@ -0,0 +1,39 @@
+"""Shared fixtures; run ``python -m pytest`` from ``frontend``."""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Any ``app.*`` import runs ``app/__init__.py``, which calls ``create_app()`` and, through the routes,
+# opens the task backend. Keep that from warming find_point in a thread, from starting compute pool
+# processes and from writing to the shared state directory.
+os.environ.setdefault("MEETPOINT_PRELOAD", "lazy")
+os.environ.setdefault("COMPUTE_POOL_WORKERS", "0")
+os.environ.setdefault("APP_STATE_DIR", tempfile.mkdtemp(prefix="meetpoint-tests-"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+
+
+class Clock:
+    """Stands in for ``time.time`` and ``time.monotonic`` so expiry tests do not sleep."""
+
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    fake = Clock()
+    monkeypatch.setattr(time, "time", fake)
+    monkeypatch.setattr(time, "monotonic", fake)
+    return fake
@@ -0,0 +1,146 @@
+"""TTLCache expiry, negative entries, byte accounting and eviction callbacks; SingleFlight."""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.cache import MISSING, SingleFlight, TTLCache
+
+
+def sized_cache(max_bytes: int = 10, **kwargs) -> TTLCache:
+    return TTLCache(100, 60.0, max_bytes=max_bytes, sizeof=len, **kwargs)
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLCache(10, 60.0)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+
+    clock.advance(6)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    clock.advance(55)
+    assert cache.get("a") is MISSING
+
+
+def test_negative_entries_read_as_none(clock):
+    cache = TTLCache(10, 60.0, 5.0)
+    cache.set("k", None, negative=True)
+
+    assert cache.get("k") is None
+    clock.advance(6)
+    assert cache.get("k") is MISSING
+    with pytest.raises(ValueError):
+        cache.set("k", None)
+
+
+def test_bytes_track_set_replace_and_pop():
+    cache = sized_cache(100)
+    cache.set("a", "xxxx")
+    cache.set("b", "yy")
+    assert cache.stats()["bytes"] == 6
+
+    cache.set("a", "x")
+    assert cache.stats()["bytes"] == 3
+
+    assert cache.pop("b") == "yy"
+    assert cache.pop("b") is MISSING
+    assert cache.stats()["bytes"] == 1
+
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_byte_limit_evicts_least_recently_used():
+    cache = sized_cache(10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == "aaaa"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_oversized_value_is_not_stored():
+    cache = sized_cache(4)
+    cache.set("a", "aa")
+    cache.set("big", "bbbbb")
+
+    assert cache.get("big") is MISSING
+    assert cache.get("a") == "aa"
+    assert cache.stats()["bytes"] == 2
+
+
+def test_expired_entries_release_their_bytes(clock):
+    cache = sized_cache(100)
+    cache.set("a", "aaaa", ttl=5)
+    clock.advance(6)
+
+    assert cache.get("a") is MISSING
+    assert cache.stats()["bytes"] == 0
+
+
+def test_byte_limit_eviction_is_reported_to_on_evict():
+    evicted = []
+    cache = sized_cache(10, on_evict=lambda key, value: evicted.append((key, value)))
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert evicted == [("b", "bbbb")]
+
+
+def test_on_evict_skips_pop_replace_expiry_and_negative_entries(clock):
+    evicted = []
+    cache = TTLCache(2, 60.0, 10.0, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", 1)
+    cache.pop("a")
+    cache.set("b", 1)
+    cache.set("b", 2)
+    clock.advance(61)
+    assert cache.get("b") is MISSING
+
+    cache.set("n", None, negative=True)
+    cache.set("c", 1)
+    cache.set("d", 1)
+    assert evicted == []
+    cache.set("e", 1)
+    assert evicted == ["c"]
+
+
+def test_single_flight_shares_result_and_error():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    follower.start()
+    while flights.stats()["shared"] < 1:
+        pass
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False), ("result", True)]
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flights.do("k", fail)
+    assert flights.stats()["in_flight"] == 0
@@ -0,0 +1,113 @@
+"""Meetpoint search: lower-bound pruning and the polish stage's share of the cell budget."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from find_point import find_meetpoint
+from find_point.speed_model import SpeedModelClient
+
+PEOPLE = [
+    {"lat": 55.668757, "lng": 37.802357},
+    {"lat": 55.644621, "lng": 37.527237},
+    {"lat": 55.790507, "lng": 37.531429},
+    {"lat": 55.903512, "lng": 37.700379},
+]
+PROFILES = ["foot-walking", "cycling-regular", "cycling-regular", "driving-car"]
+DESTINATION = {"lat": 55.75, "lng": 37.62}
+
+
+class CountingClient(SpeedModelClient):
+    """Offline client that counts the matrix cells it is asked for."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cells = 0
+
+    def matrix(self, locations, profile, sources=None, destinations=None, metrics=None):
+        self.cells += len(sources) * len(destinations)
+        return super().matrix(locations, profile, sources, destinations, metrics)
+
+
+@pytest.mark.parametrize("keep_top", [1, 3])
+@pytest.mark.parametrize("with_known", [False, True])
+def test_pruning_keeps_the_exact_top_candidates(keep_top, with_known):
+    rng = np.random.default_rng(keep_top)
+    full = rng.uniform(100, 1000, 200)
+    lower = full * rng.uniform(0.2, 1.0, 200)
+    known = rng.uniform(150, 400, 5) if with_known else np.empty(0)
+    requested = []
+
+    def evaluate(index):
+        requested.append(len(index))
+        return full[index]
+
+    objective, pruned = find_meetpoint._evaluate_with_pruning(evaluate, lower, known, keep_top)
+    assert pruned > 0 and sum(requested) + pruned == len(full)
+    evaluated = np.isfinite(objective)
+    assert (objective[evaluated] == full[evaluated]).all()
+    everything = np.concatenate([known, full])
+    assert np.sort(np.concatenate([known, objective]))[:keep_top].tolist() == np.sort(everything)[:keep_top].tolist()
+
+
+@pytest.mark.parametrize("kind", ["minisum", "minimax"])
+@pytest.mark.parametrize("destination", [None, DESTINATION])
+def test_pruned_search_matches_the_full_search(kind, destination):
+    results = {}
+    for prune in (False, True):
+        client = CountingClient()
+        coordinates, meta = find_meetpoint.compute_best_meetpoint(
+            PEOPLE, PROFILES, destination, type_of_meetpoint=kind, client_instance=client, prune=prune, cell_budget=600
+        )
+        results[prune] = coordinates, [stage["best_objective"] for stage in meta["stages"]], client.cells, meta
+
+    assert results[True][:2] == results[False][:2]
+    assert results[True][2] == results[False][2] - results[True][3]["pruning"]["cells_pruned"]
+
+
+def test_lower_bounds_never_exceed_the_speed_model():
+    model = find_meetpoint.SpeedModel()
+    points = np.array([[item["lng"], item["lat"]] for item in PEOPLE])
+    candidates = points.mean(axis=0) + np.random.default_rng(0).uniform(-0.1, 0.1, (50, 2))
+
+    lower = find_meetpoint.lower_bound_durations(points, candidates, PROFILES)
+    assert (lower <= model.matrix(points, candidates, PROFILES)).all()
+
+
+@pytest.mark.parametrize("budget", [60, 200, 600, 1750])
+@pytest.mark.parametrize("polish_cells", [50, 200, 5000])
+@pytest.mark.parametrize("destination", [None, DESTINATION])
+def test_cells_used_with_polish_stays_within_budget(budget, polish_cells, destination):
+    client = CountingClient()
+    _, meta = find_meetpoint.compute_best_meetpoint(
+        PEOPLE,
+        PROFILES,
+        destination,
+        type_of_meetpoint="minimax",
+        client_instance=client,
+        prune=False,
+        cell_budget=budget,
+        polish_cells=polish_cells,
+    )
+
+    assert client.cells == meta["cells_used"] <= budget
+    assert sum(stage["cells"] for stage in meta["stages"]) == meta["cells_used"]
+    if meta["polish"]["enabled"]:
+        assert meta["polish"]["cells"] <= polish_cells
+        assert meta["polish"]["objective"] <= meta["polish"]["grid_objective"]
+
+
+def test_polish_can_be_disabled():
+    _, meta = find_meetpoint.compute_best_meetpoint(
+        PEOPLE, PROFILES, client_instance=CountingClient(), cell_budget=600, polish_cells=0
+    )
+
+    assert meta["polish"] == {"enabled": False}
+    assert [stage["stage"] for stage in meta["stages"]][-1] != "polish"
+
+
+def test_cells_of_an_uncached_client_are_not_counted_as_misses():
+    client = CountingClient()
+    _, meta = find_meetpoint.compute_best_meetpoint(PEOPLE, PROFILES, client_instance=client, cell_budget=600)
+
+    assert meta["matrix_cache"] == {"hits": 0, "misses": 0, "requested": client.cells}
@@ -0,0 +1,34 @@
+"""Weighted geometric median used by the meetpoint fallback."""
+from __future__ import annotations
+
+import pytest
+
+from app.geomedian import geometric_median, geometric_medians
+
+
+def test_median_of_symmetric_points_is_the_centre():
+    points = [(55.70, 37.60), (55.70, 37.70), (55.80, 37.60), (55.80, 37.70)]
+
+    lat, lng = geometric_median(points)
+    assert lat == pytest.approx(55.75, abs=1e-4)
+    assert lng == pytest.approx(37.65, abs=1e-4)
+
+
+def test_dominant_weight_pins_the_median_to_its_point():
+    points = [(55.70, 37.60), (55.75, 37.70), (55.80, 37.60)]
+
+    lat, lng = geometric_median(points, [10.0, 1.0, 1.0])
+    assert (lat, lng) == pytest.approx((55.70, 37.60), abs=1e-6)
+
+
+def test_batched_groups_match_single_solves():
+    groups = [[(55.70, 37.60), (55.80, 37.70)], [(59.90, 30.30), (59.95, 30.35), (59.92, 30.40)]]
+
+    batched = geometric_medians(groups)
+    for group, row in zip(groups, batched):
+        assert tuple(row) == pytest.approx(geometric_median(group), abs=1e-6)
+
+
+def test_empty_group_is_rejected():
+    with pytest.raises(ValueError):
+        geometric_medians([[(55.7, 37.6)], []])
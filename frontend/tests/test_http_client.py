@@ -0,0 +1,72 @@
+"""PooledHttpClient retries and release of streamed error responses."""
+from __future__ import annotations
+
+import io
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from app.http_client import PooledHttpClient
+
+
+class RawBody(io.BytesIO):
+    """Stands in for urllib3's response: ``release_conn`` hands the connection back."""
+
+    released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Answers with the queued status codes in order and keeps the responses."""
+
+    def __init__(self, statuses):
+        super().__init__()
+        self.statuses = list(statuses)
+        self.responses = []
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response.raw = RawBody(b'{"error": "nope"}')
+        response.url = request.url
+        response.request = request
+        self.responses.append(response)
+        return response
+
+    def close(self):
+        pass
+
+
+def client_with(statuses, **kwargs):
+    client = PooledHttpClient(backoff=0, **kwargs)
+    adapter = ScriptedAdapter(statuses)
+    client._session("example.test").mount("http://", adapter)
+    return client, adapter
+
+
+@pytest.mark.parametrize("status", [400, 503])
+def test_streamed_error_response_is_read_and_closed(status):
+    client, adapter = client_with([status, status, status])
+
+    response = client.post("http://example.test/route", idempotent=True, stream=True)
+
+    assert response.status_code == status
+    assert response.text == '{"error": "nope"}'
+    assert all(sent.raw.released for sent in adapter.responses)
+    with pytest.raises(requests.HTTPError):
+        response.raise_for_status()
+
+
+def test_retryable_status_is_retried_until_success():
+    client, adapter = client_with([503, 200], max_retries=2)
+
+    response = client.get("http://example.test/items", stream=True)
+
+    assert response.status_code == 200
+    assert len(adapter.responses) == 2
+    assert adapter.responses[0].raw.released
+    assert not response.raw.released
+    assert client.stats()["example.test"]["retries"] == 1
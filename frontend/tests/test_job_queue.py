@@ -0,0 +1,160 @@
+"""Lease, acknowledgement and retry semantics shared by the task backends."""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from app.job_queue import MemoryQueue, SQLiteQueue, _encode
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "memory":
+        return MemoryQueue()
+    return SQLiteQueue(tmp_path / "tasks.sqlite3")
+
+
+def test_claim_hands_a_job_to_one_consumer(queue, clock):
+    queue.enqueue("a", {"script_id": "s"})
+
+    job = queue.claim(30)
+    assert job is not None
+    assert (job.job_id, job.payload, job.attempts) == ("a", {"script_id": "s"}, 1)
+    assert queue.claim(30) is None
+
+
+def test_expired_lease_is_redelivered(queue, clock):
+    queue.enqueue("a", {})
+    queue.claim(30)
+
+    clock.advance(29)
+    assert queue.claim(30) is None
+    clock.advance(2)
+    job = queue.claim(30)
+    assert job is not None and job.attempts == 2
+
+
+def test_extend_pushes_the_lease_back(queue, clock):
+    queue.enqueue("a", {})
+    queue.claim(30)
+
+    clock.advance(20)
+    queue.extend("a", 30)
+    clock.advance(20)
+    assert queue.claim(30) is None
+    clock.advance(11)
+    assert queue.claim(30) is not None
+
+
+def test_acked_job_is_never_redelivered(queue, clock):
+    queue.enqueue("a", {})
+    queue.claim(30)
+    queue.ack("a")
+
+    clock.advance(60)
+    assert queue.claim(30) is None
+    assert queue.stats()["queued"] == 0
+
+
+def test_retry_waits_for_the_delay_and_counts_attempts(queue, clock):
+    queue.enqueue("a", {})
+    queue.claim(30)
+    queue.retry("a", 5)
+
+    assert queue.claim(30) is None
+    clock.advance(5)
+    job = queue.claim(30)
+    assert job is not None and job.attempts == 2
+
+
+def test_jobs_are_claimed_in_order(queue, clock):
+    queue.enqueue("a", {})
+    clock.advance(1)
+    queue.enqueue("b", {})
+
+    assert [queue.claim(30).job_id, queue.claim(30).job_id] == ["a", "b"]
+
+
+def test_sqlite_results_expire(tmp_path, clock):
+    queue = SQLiteQueue(tmp_path / "tasks.sqlite3")
+    queue.put("status", "a", {"status": "done"}, 10)
+
+    assert queue.get("status", "a") == {"status": "done"}
+    clock.advance(11)
+    assert queue.get("status", "a") is None
+
+
+def test_add_keeps_the_first_value(queue, clock):
+    assert queue.add("inflight", "k", "first", 60) == "first"
+    assert queue.add("inflight", "k", "second", 60) == "first"
+    queue.delete("inflight", "k")
+    assert queue.get("inflight", "k") is None
+    assert queue.add("inflight", "k", "third", 60) == "third"
+
+
+def test_replace_if_only_swaps_the_expected_value(queue, clock):
+    queue.put("inflight", "k", "old", 60)
+
+    assert not queue.replace_if("inflight", "k", "other", "new", 60)
+    assert queue.get("inflight", "k") == "old"
+    assert queue.replace_if("inflight", "k", "old", "new", 60)
+    assert queue.get("inflight", "k") == "new"
+    assert not queue.replace_if("inflight", "missing", None, "new", 60)
+
+
+def test_sqlite_results_are_bounded_by_entries(tmp_path, clock):
+    queue = SQLiteQueue(tmp_path / "tasks.sqlite3", limits={"route": (3, None)})
+    for index in range(5):
+        queue.put("route", f"r{index}", {"index": index}, 60)
+        clock.advance(1)
+    queue.put("status", "s", {"status": "done"}, 60)
+
+    assert [queue.get("route", f"r{index}") is not None for index in range(5)] == [False, False, True, True, True]
+    assert queue.stats()["results"] == {"route": 3, "status": 1}
+
+
+def test_sqlite_results_are_bounded_by_stored_bytes(tmp_path, clock):
+    queue = SQLiteQueue(tmp_path / "tasks.sqlite3", limits={"route": (0, 100)})
+    queue.put("route", "a", {"n": 1}, 60)
+    clock.advance(1)
+    queue.put("route", "b", {"n": 2}, 60)
+    clock.advance(1)
+    queue.put("route", "a", {"n": 3}, 60)
+    written = 0
+    while queue.get("route", "b") is not None:
+        clock.advance(1)
+        queue.put("route", f"c{written}", {"n": written}, 60)
+        written += 1
+        assert queue.stats()["result_bytes"]["route"] <= 100
+
+    assert written > 1
+    assert queue.get("route", "a") == {"n": 3}
+
+
+def test_sqlite_drops_an_oversized_result(tmp_path, clock):
+    queue = SQLiteQueue(tmp_path / "tasks.sqlite3", limits={"route": (0, 64)})
+    queue.put("route", "small", {"n": 1}, 60)
+    queue.put("route", "big", {"n": 1}, 60)
+    queue.put("route", "big", {"blob": bytes(range(256)).hex()}, 60)
+
+    assert queue.get("route", "big") is None
+    assert queue.get("route", "small") == {"n": 1}
+
+
+def test_sqlite_upgrades_a_results_table_without_sizes(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE results (kind TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires REAL, "
+        "PRIMARY KEY (kind, key))"
+    )
+    conn.execute("INSERT INTO results VALUES (?, ?, ?, NULL)", ("status", "old", _encode({"status": "done"})))
+    conn.commit()
+    conn.close()
+
+    queue = SQLiteQueue(path, limits={"status": (10, None)})
+    assert queue.get("status", "old") == {"status": "done"}
+    assert queue.stats()["result_bytes"]["status"] > 0
+    queue.put("status", "new", {"status": "pending"}, 60)
+    assert queue.stats()["results"] == {"status": 2}
@@ -0,0 +1,30 @@
+"""MatrixCellCache storage across processes."""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from find_point.matrix_cache import MatrixCellCache
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_opens_its_own_connection(tmp_path):
+    cache = MatrixCellCache(tmp_path / "cells.sqlite3")
+    key = cache.make_key((37.6, 55.7), (37.7, 55.8), "driving-car")
+    cache.put_many({key: 600.0})
+    parent_conn = cache._connect()
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        try:
+            ok = cache._connect() is not parent_conn and cache.get_many([key]) == {key: 600.0}
+            cache.put_many({cache.make_key((37.6, 55.7), (37.8, 55.9), "driving-car"): 900.0})
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache._connect() is parent_conn
+    assert len(cache.get_many([cache.make_key((37.6, 55.7), (37.8, 55.9), "driving-car")])) == 1
@@ -0,0 +1,93 @@
+"""Encoded-polyline round trip, simplification and compact collections."""
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from app import polyline
+from app.polyline import compact_collection, decode, encode, simplify
+
+
+def test_encode_matches_the_reference_example():
+    # Example from Google's polyline algorithm documentation, as [lon, lat].
+    points = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+
+    assert encode(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode("_p~iF~ps|U_ulLnnqC_mqNvxq`@") == points
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_round_trip_is_exact_to_the_precision(precision):
+    rng = random.Random(precision)
+    points = [[rng.uniform(-180, 180), rng.uniform(-90, 90)] for _ in range(200)]
+
+    decoded = decode(encode(points, precision), precision)
+    assert len(decoded) == len(points)
+    for (lon, lat), (dlon, dlat) in zip(points, decoded):
+        assert dlon == pytest.approx(lon, abs=0.5 / 10 ** precision + 1e-12)
+        assert dlat == pytest.approx(lat, abs=0.5 / 10 ** precision + 1e-12)
+
+
+def wiggly_line(count: int):
+    rng = random.Random(count)
+    return [[37.6 + i * 1e-4, 55.75 + 2e-5 * math.sin(i / 7) + rng.uniform(-1e-6, 1e-6)] for i in range(count)]
+
+
+def deviation(point, start, end, scale):
+    """Distance from ``point`` to segment ``start``–``end`` in scaled degrees."""
+    px, py = (point[0] - start[0]) * scale, point[1] - start[1]
+    dx, dy = (end[0] - start[0]) * scale, end[1] - start[1]
+    t = max(0.0, min(1.0, (px * dx + py * dy) / (dx * dx + dy * dy or 1.0)))
+    return math.hypot(px - t * dx, py - t * dy)
+
+
+@pytest.mark.parametrize("count", [10, 500])
+def test_simplify_keeps_end_points_and_stays_within_tolerance(count):
+    line = wiggly_line(count)
+    tolerance = 1e-5
+
+    simplified = simplify(line, tolerance)
+    assert simplified[0] == line[0] and simplified[-1] == line[-1]
+    assert len(simplified) < len(line)
+
+    scale = math.cos(math.radians(line[0][1]))
+    kept = [line.index(point) for point in simplified]
+    for first, last in zip(kept, kept[1:]):
+        for point in line[first + 1 : last]:
+            # Radial pre-pass and Douglas–Peucker each stay within the tolerance.
+            assert deviation(point, line[first], line[last], scale) <= 2 * tolerance
+
+
+def test_simplify_leaves_short_lines_alone():
+    line = [[37.6, 55.7], [37.61, 55.71]]
+
+    assert simplify(line, 1.0) == line
+    assert simplify(wiggly_line(5), 0) == wiggly_line(5)
+
+
+def test_numpy_and_plain_scans_agree(monkeypatch):
+    line = wiggly_line(500)
+    with_numpy = simplify(line, 1e-6)
+    monkeypatch.setattr(polyline, "np", None)
+
+    assert simplify(line, 1e-6) == with_numpy
+
+
+def test_compact_collection_does_not_modify_its_input():
+    coordinates = wiggly_line(50)
+    collection = {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "geometry": {"type": "LineString", "coordinates": coordinates}}],
+    }
+
+    compact = compact_collection(collection, precision=6)
+    geometry = compact["features"][0]["geometry"]
+    assert collection["features"][0]["geometry"]["coordinates"] is coordinates
+    assert geometry["encoding"] == "polyline" and geometry["precision"] == 6
+    decoded = decode(geometry["polyline"], 6)
+    assert [value for point in decoded for value in point] == pytest.approx(
+        [value for point in coordinates for value in point], abs=1e-6
+    )
+    assert compact_collection(collection, precision=6) == compact
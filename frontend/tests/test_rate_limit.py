@@ -0,0 +1,60 @@
+"""Token buckets and rolling windows on the local rate-limit backends."""
+from __future__ import annotations
+
+import pytest
+
+from app.rate_limit import BucketSpec, MemoryBackend, RateLimiter, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(tmp_path / "rate.sqlite3")
+
+
+def test_sliding_window_allows_capacity_per_rolling_period(backend):
+    day = BucketSpec("day", 5, 100.0, sliding=True)
+    taken = [t for t in range(0, 300, 7) if backend.try_acquire([day], float(t))[1] is None]
+
+    assert taken
+    for start in range(300):
+        assert sum(start <= t < start + 100 for t in taken) <= 5
+
+
+def test_sliding_window_waits_for_the_oldest_take(backend):
+    day = BucketSpec("day", 2, 100.0, sliding=True)
+    assert backend.try_acquire([day], 0.0) == (0.0, None)
+    assert backend.try_acquire([day], 10.0) == (0.0, None)
+
+    wait, blocking = backend.try_acquire([day], 30.0)
+    assert blocking == "day" and wait == pytest.approx(70.0)
+    assert backend.try_acquire([day], 100.0) == (0.0, None)
+
+
+def test_token_bucket_refills_at_its_rate(backend):
+    minute = BucketSpec("minute", 2, 60.0)
+    assert backend.try_acquire([minute], 0.0)[1] is None
+    assert backend.try_acquire([minute], 0.0)[1] is None
+
+    wait, blocking = backend.try_acquire([minute], 0.0)
+    assert blocking == "minute" and wait == pytest.approx(30.0)
+    assert backend.try_acquire([minute], 30.0)[1] is None
+
+
+def test_blocked_take_consumes_no_other_bucket(backend):
+    day = BucketSpec("day", 1, 100.0, sliding=True)
+    minute = BucketSpec("minute", 10, 60.0)
+    backend.try_acquire([day, minute], 0.0)
+
+    assert backend.try_acquire([day, minute], 1.0)[1] == "day"
+    assert backend.try_acquire([minute], 1.0)[1] is None
+    for _ in range(8):
+        assert backend.try_acquire([minute], 1.0)[1] is None
+    assert backend.try_acquire([minute], 1.0)[1] == "minute"
+
+
+def test_zero_capacity_specs_are_unlimited():
+    limiter = RateLimiter([BucketSpec("off", 0, 60.0)])
+
+    assert all(limiter.try_acquire() == (0.0, None) for _ in range(100))
@@ -0,0 +1,78 @@
+"""ResultStore spill to disk and reload."""
+from __future__ import annotations
+
+from app.result_store import ResultStore
+
+
+def collection(name: str, complete: bool = True):
+    return {"type": "FeatureCollection", "features": [{"id": name}], "properties": {"complete": complete}}
+
+
+def test_evicted_collection_is_spilled_and_reloaded(tmp_path):
+    store = ResultStore(max_entries=1, spill_dir=tmp_path)
+    store.set("a", collection("a"))
+    store.set("b", collection("b"))
+    store.flush()
+
+    assert store.stats()["spilled"] == 1
+    assert store.get("a") == collection("a")
+    assert store.stats()["reloaded"] == 1
+
+
+def test_incomplete_collection_is_not_spilled(tmp_path):
+    store = ResultStore(max_entries=1, spill_dir=tmp_path)
+    store.set("a", collection("a", complete=False))
+    store.set("b", collection("b"))
+    store.flush()
+
+    assert store.stats()["spilled"] == 0
+    assert store.get("a") is None
+
+
+def test_without_spill_dir_evicted_results_are_gone():
+    store = ResultStore(max_entries=1)
+    store.set("a", collection("a"))
+    store.set("b", collection("b"))
+
+    assert store.get("a") is None
+    assert store.get("b") == collection("b")
+
+
+def test_pending_spill_is_served_before_the_write_lands(tmp_path):
+    store = ResultStore(max_entries=1, spill_dir=tmp_path)
+    store.set("a", collection("a"))
+    store.set("b", collection("b"))
+
+    # Whether or not the background write finished, "a" comes back.
+    assert store.get("a") == collection("a")
+    store.flush()
+    assert store.stats()["spill_pending"] == 0
+
+
+def test_set_removes_the_stale_spilled_file(tmp_path):
+    store = ResultStore(max_entries=1, spill_dir=tmp_path)
+    store.set("a", collection("a"))
+    store.set("b", collection("b"))
+    store.flush()
+    assert list(tmp_path.glob("*.gz"))
+
+    store.set("a", collection("a2"))
+    store.set("b", collection("b"))  # evicts the new "a" from memory
+    store.flush()
+
+    assert store.get("a") == collection("a2")
+
+
+def test_evicting_an_incomplete_value_drops_the_older_spill(tmp_path):
+    store = ResultStore(max_entries=1, spill_dir=tmp_path)
+    store.set("a", collection("a"))
+    store.set("b", collection("b"))
+    store.flush()
+
+    # The key is rebuilt: a stale finished copy must not be reloaded later.
+    store._memory.set("a", collection("a", complete=False))
+    store.set("b", collection("b"))
+    store.flush()
+
+    assert store.get("a") is None
+    assert not list(tmp_path.glob("*.gz"))
@@ -0,0 +1,93 @@
+"""Pruned routing JSON: the streaming and the json.loads paths agree."""
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+import requests
+
+from app import route_json
+from app.route_json import read_route_json
+
+DOCUMENT = {
+    "query": {"points": [{"lat": 55.7, "lon": 37.6, "unused": True}], "anything": [1, 2]},
+    "result": [
+        {
+            "id": "r1",
+            "total_distance": 1234,
+            "total_duration": 456.5,
+            "ui_total_duration": "8 мин",
+            "debug": {"trace": list(range(50)), "nested": {"selection": "dropped"}},
+            "maneuvers": [
+                {
+                    "comment": "Налево",
+                    "outcoming_path": {
+                        "distance": 100,
+                        "duration": 20,
+                        "geometry": [{"selection": "LINESTRING(37.6 55.7, 37.61 55.71)", "color": "fast"}],
+                    },
+                    "icon": "turn_left",
+                },
+                {"comment": None, "outcoming_path_comment": "", "extra": [[1], {"a": 1}]},
+            ],
+            "transport": {"type": "car", "vendor": {"kept": "whole"}},
+        },
+        "not a route",
+        [1.5, True, False, None],
+    ],
+    "status": "OK",
+    "unused_top": {"deep": [{"id": 1}]},
+}
+
+
+def make_response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def expected(document, keep=route_json.ROUTE_KEYS, keep_whole=route_json.KEEP_WHOLE):
+    return route_json._prune(json.loads(json.dumps(document)), keep, keep_whole)[0]
+
+
+def test_streaming_result_matches_full_decode_and_prune():
+    body = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+
+    streamed = read_route_json(make_response(body))
+    assert streamed == expected(DOCUMENT)
+    assert "debug" not in streamed["result"][0]
+    assert streamed["result"][0]["transport"]["vendor"] == {"kept": "whole"}
+    assert streamed["query"] == DOCUMENT["query"]
+
+
+@pytest.mark.skipif(route_json.ijson is None, reason="ijson is not installed")
+def test_pruned_events_and_pruned_document_drop_the_same_values():
+    body = json.dumps(DOCUMENT).encode()
+    events = route_json.ijson.basic_parse(io.BytesIO(body), use_float=True)
+
+    built, dropped = route_json._build_pruned(events, route_json.ROUTE_KEYS, route_json.KEEP_WHOLE)
+    assert (built, dropped) == route_json._prune(DOCUMENT, route_json.ROUTE_KEYS, route_json.KEEP_WHOLE)
+
+
+def test_fallback_without_ijson_gives_the_same_document(monkeypatch):
+    body = json.dumps(DOCUMENT).encode()
+    streamed = read_route_json(make_response(body))
+    monkeypatch.setattr(route_json, "ijson", None)
+
+    assert read_route_json(make_response(body)) == streamed
+
+
+@pytest.mark.parametrize("document", [[], {}, 5, "text", None, [{"result": [{"id": 1}]}]])
+def test_scalar_and_empty_documents(document):
+    assert read_route_json(make_response(json.dumps(document).encode())) == expected(document)
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_malformed_json_raises_value_error(monkeypatch, streaming):
+    if not streaming:
+        monkeypatch.setattr(route_json, "ijson", None)
+
+    with pytest.raises(ValueError):
+        read_route_json(make_response(b'{"result": [1, 2'))
@@ -0,0 +1,119 @@
+"""Speed-model calibration against cached matrix cells."""
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pytest
+
+from find_point.matrix_cache import MatrixCellCache
+from find_point.speed_model import DEFAULT_CURVES, SpeedModel, SpeedModelClient, _features, _pairwise_m
+
+MOSCOW = np.array([37.62, 55.75])
+
+
+def random_pairs(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sources = MOSCOW + rng.uniform(-0.2, 0.2, (count, 2))
+    targets = MOSCOW + rng.uniform(-0.2, 0.2, (count, 2))
+    return sources, targets
+
+
+def cells_from(profile, sources, targets, durations):
+    return [(profile, tuple(s), tuple(t), float(d)) for s, t, d in zip(sources, targets, durations)]
+
+
+def test_calibration_recovers_the_generating_coefficients():
+    sources, targets = random_pairs(300)
+    distance = _pairwise_m(np.hstack([sources, targets]))
+    true = np.array([200.0, 0.03, 0.08])
+    durations = _features(distance, DEFAULT_CURVES["driving-car"].transition_m) @ true
+
+    model = SpeedModel()
+    report = model.calibrate(cells_from("driving-car", sources, targets, durations))
+    assert report["driving-car"]["coefficients"] == pytest.approx(true.tolist(), rel=1e-4)
+    assert report["driving-car"]["mape"] == 0.0
+    assert report["driving-car"]["mape_default"] > 0.0
+    assert model.durations(sources[:1], targets[:1], "driving-car")[0, 0] == pytest.approx(durations[0])
+
+
+def test_coefficients_stay_non_negative():
+    sources, targets = random_pairs(300, seed=1)
+    distance = _pairwise_m(np.hstack([sources, targets]))
+    # A negative intercept would fit best; the model must not learn one.
+    durations = np.maximum(0.05 * distance - 300.0, 1.0)
+
+    model = SpeedModel()
+    coefficients = model.calibrate(cells_from("cycling-regular", sources, targets, durations))["cycling-regular"]["coefficients"]
+    assert min(coefficients) >= 0.0
+    ordered = np.linspace(200, 30000, 50)
+    estimates = model.durations(MOSCOW.reshape(1, 2), MOSCOW + np.column_stack([np.zeros(50), ordered / 111_320]), "cycling-regular")
+    assert (np.diff(estimates[0]) >= 0).all()
+
+
+def test_too_few_cells_keep_the_default_curve():
+    sources, targets = random_pairs(10)
+    model = SpeedModel()
+    before = model.durations(sources, targets, "foot-walking")
+
+    report = model.calibrate(cells_from("foot-walking", sources, targets, np.full(10, 600.0)))
+    assert "coefficients" not in report["foot-walking"]
+    assert (model.durations(sources, targets, "foot-walking") == before).all()
+
+
+def test_from_cache_calibrates_on_stored_cells(tmp_path):
+    cache = MatrixCellCache(tmp_path / "cells.sqlite3", precision=6)
+    sources, targets = random_pairs(120, seed=2)
+    distance = _pairwise_m(np.hstack([sources, targets]))
+    for source, target, meters in zip(sources, targets, distance):
+        cache.store([source], [target], "driving-car", np.array([[120.0 + meters / 10.0]]))
+
+    model = SpeedModel.from_cache(cache, limit=1000)
+    assert model.calibration["driving-car"]["cells"] == int((distance >= 100).sum())
+    assert model.calibration["driving-car"]["mape"] < 0.1
+
+
+def test_from_cache_falls_back_to_defaults_when_the_cache_fails():
+    class BrokenCache:
+        def iter_cells(self, limit=None):
+            raise OSError("disk gone")
+
+    model = SpeedModel.from_cache(BrokenCache())
+    assert model.calibration == {}
+
+
+def test_client_answers_like_the_ors_matrix_call():
+    sources, targets = random_pairs(3)
+    locations = np.vstack([sources, targets]).tolist()
+
+    result = SpeedModelClient().matrix(locations, "public-transport", sources=[0, 1, 2], destinations=[3, 4, 5])
+    assert np.array(result.durations).shape == (3, 3)
+    assert np.array(result.durations) == pytest.approx(SpeedModel().durations(sources, targets, "public-transport"))
+
+
+def test_get_speed_model_recalibrates_in_the_background(monkeypatch):
+    import find_point.find_meetpoint as fm
+
+    release = threading.Event()
+    calibrated = SpeedModel()
+
+    def slow_from_cache(cache, *, limit):
+        release.wait(5)
+        return calibrated
+
+    monkeypatch.setattr(fm.SpeedModel, "from_cache", staticmethod(slow_from_cache))
+    monkeypatch.setattr(fm, "matrix_cache", object())
+    monkeypatch.setattr(fm, "_speed_model", SpeedModel())
+    monkeypatch.setattr(fm, "_speed_model_calibrated", None)
+    monkeypatch.setattr(fm, "_speed_model_refresh", None)
+
+    current = fm.get_speed_model()
+    refresh = fm._speed_model_refresh
+    # The caller is not held up by the calibration, and a second caller starts no second one.
+    assert current is not calibrated
+    assert fm.get_speed_model() is current
+    assert fm._speed_model_refresh is refresh
+
+    release.set()
+    refresh.join(5)
+    assert fm.get_speed_model() is calibrated
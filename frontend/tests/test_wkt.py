@@ -0,0 +1,89 @@
+"""WKT LINESTRING parsing into flat arrays matches the per-pair parser."""
+from __future__ import annotations
+
+import random
+from typing import List
+
+import pytest
+
+from app import gis_client
+
+
+def reference_parse(selection: str) -> List[List[float]]:
+    """The original pair-by-pair parser the array path replaced."""
+    selection = (selection or "").strip()
+    if not selection.upper().startswith("LINESTRING"):
+        return []
+    try:
+        inside = selection[selection.index("(") + 1 : selection.rindex(")")]
+    except ValueError:
+        return []
+    coordinates = []
+    for pair in inside.split(","):
+        parts = pair.strip().split()
+        if len(parts) >= 2:
+            try:
+                coordinates.append([float(parts[0]), float(parts[1])])
+            except ValueError:
+                continue
+    return coordinates
+
+
+SELECTIONS = [
+    "",
+    "POINT (37.6 55.7)",
+    "LINESTRING EMPTY",
+    "LINESTRING(37.6 55.7, 37.61 55.71)",
+    "  linestring ( 37.6   55.7 ,37.61 55.71 )  ",
+    "LINESTRING Z (37.6 55.7 140, 37.61 55.71 141)",
+    "LINESTRING (37.6 55.7 140, 37.61)",
+    "LINESTRING (37.6 55.7, bad 55.71, 37.62 55.72)",
+    "LINESTRING (37.6 55.7,, 37.62 55.72)",
+    "LINESTRING (1e1 -2.5E-3, 3 4)",
+]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_array_parser_matches_reference(selection):
+    gis_client.wkt_parse_cache.clear()
+
+    assert gis_client._parse_wkt_linestring(selection) == reference_parse(selection)
+
+
+def test_long_selection_matches_reference():
+    rng = random.Random(7)
+    pairs = ", ".join(f"{rng.uniform(37, 38):.6f} {rng.uniform(55, 56):.6f}" for _ in range(5000))
+    selection = f"LINESTRING({pairs})"
+
+    assert gis_client._parse_wkt_linestring(selection) == reference_parse(selection)
+    assert gis_client._wkt_last_point(selection) == tuple(reference_parse(selection)[-1])
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_last_point_matches_the_last_parsed_pair(selection):
+    parsed = reference_parse(selection)
+
+    assert gis_client._wkt_last_point(selection) == (tuple(parsed[-1]) if parsed else None)
+
+
+def test_repeated_selection_is_parsed_once(monkeypatch):
+    gis_client.wkt_parse_cache.clear()
+    calls = []
+    parse = gis_client._parse_wkt_uncached
+    monkeypatch.setattr(gis_client, "_parse_wkt_uncached", lambda selection: calls.append(1) or parse(selection))
+
+    selection = "LINESTRING(37.6 55.7, 37.61 55.71)"
+    first = gis_client._parse_wkt_buffer(selection)
+    assert gis_client._parse_wkt_buffer(selection) is first
+    assert len(calls) == 1
+    assert gis_client.wkt_parse_cache.stats()["bytes"] == 4 * first.itemsize
+
+
+def test_nested_geometry_is_collected_in_path_order():
+    source = {
+        "selection": "LINESTRING(1 2, 3 4)",
+        "geometry": {"items": [{"selection": "LINESTRING(5 6)"}, "LINESTRING(7 8, 9 10)"]},
+    }
+
+    assert gis_client._collect_geometry_coords(source) == [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10]]
+    assert gis_client._last_geometry_coord(source) == (9.0, 10.0)
@@ -0,0 +1,81 @@
+"""Lease renewal of running tasks and coalescing of enqueues."""
+from __future__ import annotations
+
+import threading
+import time
+
+from app import worker
+from app.job_queue import Job, MemoryQueue
+from app.models import OptimizeRequest
+
+
+class RecordingQueue(MemoryQueue):
+    def __init__(self) -> None:
+        super().__init__()
+        self.extended = []
+
+    def extend(self, job_id: str, visibility_timeout: float) -> None:
+        self.extended.append(job_id)
+        super().extend(job_id, visibility_timeout)
+
+
+def test_lease_is_renewed_while_the_task_runs(monkeypatch):
+    monkeypatch.setattr(worker, "TASK_VISIBILITY_TIMEOUT", 0.03)
+    queue = RecordingQueue()
+    manager = worker.TaskManager(queue)
+
+    def run_task(task_id, request):
+        # Stands in for a long optimization that reports no progress of its own.
+        while len(queue.extended) < 3:
+            time.sleep(0.01)
+
+    monkeypatch.setattr(manager, "_run_task", run_task)
+    monkeypatch.setattr(manager, "_finish", lambda task_id, request: None)
+    job = Job("t1", {"script_id": "s"}, 1)
+    thread = threading.Thread(target=manager._process, args=(job,))
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert queue.extended[:3] == ["t1"] * 3
+
+
+def test_renewal_stops_after_the_max_runtime(monkeypatch):
+    monkeypatch.setattr(worker, "TASK_VISIBILITY_TIMEOUT", 0.03)
+    monkeypatch.setattr(worker, "TASK_MAX_RUNTIME", 0.0)
+    queue = RecordingQueue()
+    manager = worker.TaskManager(queue)
+    done = threading.Event()
+    thread = threading.Thread(target=manager._renew_lease, args=("t1", done))
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert queue.extended == []
+
+
+def idle_manager(monkeypatch):
+    manager = worker.TaskManager(MemoryQueue())
+    monkeypatch.setattr(manager, "_ensure_consumers", lambda: None)
+    return manager
+
+
+def test_enqueue_joins_a_marker_whose_status_is_still_being_written(monkeypatch):
+    manager = idle_manager(monkeypatch)
+    request = OptimizeRequest(script_id="s")
+    manager.backend.add("inflight", "s:greedy", {"task_id": "other", "created": time.time()}, 60)
+
+    assert manager.enqueue(request) == "other"
+
+
+def test_enqueue_takes_over_a_marker_without_status_after_the_grace_period(monkeypatch):
+    manager = idle_manager(monkeypatch)
+    request = OptimizeRequest(script_id="s")
+    orphan = {"task_id": "orphan", "created": time.time() - worker.TASK_ENQUEUE_GRACE - 1}
+    manager.backend.add("inflight", "s:greedy", orphan, 60)
+
+    task_id = manager.enqueue(request)
+
+    assert task_id != "orphan"
+    assert manager.get_status(task_id).status == "pending"
+    assert manager.enqueue(request) == task_id